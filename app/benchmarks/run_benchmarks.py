@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import argparse
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index import potential_inheritance_tax_liability
+from utils._helpers import get_record_type
+from utils.get_estate_value import get_estate_value
+from benchmarks.synthetic import generate_households
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+DEFAULT_SIZES = (1, 1000, 100000, 1000000)
+
+# households generated per chunk; only calculation time is measured
+CHUNK_SIZE = 10000
+
+# chunks smaller than CHUNK_SIZE are timed as the best of REPEATS samples,
+# each looping over the chunk until it has covered CHUNK_SIZE households, so
+# one household is not timed against the clock's resolution
+REPEATS = 15
+
+# smaller sizes are still reported but too noisy to fail the run on
+MIN_GATED_SIZE = 1000
+
+
+def bench_get_estate_value(crm_records):
+    for crm_record in crm_records:
+        get_estate_value(crm_record, get_record_type(crm_record))
+
+
+def bench_potential_inheritance_tax_liability(crm_records):
+    for crm_record in crm_records:
+        potential_inheritance_tax_liability(crm_record, 40)
+
+
+BENCHMARKS = {
+    "get_estate_value": bench_get_estate_value,
+    "potential_inheritance_tax_liability": bench_potential_inheritance_tax_liability,
+}
+
+
+def run_benchmark(benchmark, size, seed):
+    households = generate_households(size, seed)
+    elapsed_ns = 0
+
+    while True:
+        chunk = list(islice(households, CHUNK_SIZE))
+        if not chunk:
+            break
+        loops = max(1, CHUNK_SIZE // len(chunk))
+        best_ns = None
+        for _ in range(REPEATS if loops > 1 else 1):
+            started = time.perf_counter_ns()
+            for _ in range(loops):
+                benchmark(chunk)
+            run_ns = (time.perf_counter_ns() - started) / loops
+            best_ns = run_ns if best_ns is None else min(best_ns, run_ns)
+        elapsed_ns += best_ns
+
+    return {
+        "households": size,
+        "seconds": elapsed_ns / 1e9,
+        "ns_per_household": elapsed_ns / size,
+    }
+
+
+def get_regressions(results, baseline, threshold, min_size=MIN_GATED_SIZE):
+    regressions = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            if int(size) < min_size:
+                continue
+            expected = baseline.get(name, {}).get(size)
+            if expected is None:
+                continue
+            limit = expected["ns_per_household"] * (1 + threshold)
+            if result["ns_per_household"] > limit:
+                regressions.append(
+                    f"{name} @ {size}: {result['ns_per_household']:.0f}ns "
+                    f"per household, baseline {expected['ns_per_household']:.0f}ns"
+                )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculator throughput benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--min-gated-size",
+        type=int,
+        default=MIN_GATED_SIZE,
+        help="smaller sizes are reported but never count as regressions",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write these results as the new baseline instead of checking",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        for size in args.sizes:
+            result = run_benchmark(benchmark, size, args.seed)
+            results.setdefault(name, {})[str(size)] = result
+            print(
+                f"{name:<40} {size:>9} households "
+                f"{result['ns_per_household']:>10.0f} ns/household"
+            )
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=4)
+            baseline_file.write("\n")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --update-baseline")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = get_regressions(
+        results, baseline, args.threshold, args.min_gated_size
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import random
+
+# name pools for readable synthetic records
+FIRST_NAMES = ("Alex", "Sam", "Jo", "Chris", "Pat", "Robin", "Jamie", "Lee")
+SURNAMES = ("Smith", "Jones", "Taylor", "Brown", "Wilson", "Evans", "Walker")
+ASSET_NAMES = (
+    "Main Residence",
+    "Holiday Property",
+    "Deposit Account",
+    "Current Account",
+    "SJP - ISA",
+    "SJP - Unit Trust",
+    "Share Portfolio",
+    "Investment Bond",
+    "Premium Bonds",
+)
+DEBT_NAMES = ("Repayment Mortgage", "Interest Only Mortgage", "Personal Loan")
+GIFT_NAMES = ("SJP Bond (Gift Plan)", "Discounted Gift Plan", "Loan Plan")
+OUTSIDE_NAMES = ("EIS Fund (held for over 2 years)", "Loan Trust", "Trustee Bond")
+POLICY_NAMES = ("20 Year Term Assurance", "Whole of Life", "Level Term Assurance")
+PENSION_NAMES = ("Retirement Account", "Work Pension", "SIPP")
+
+# (minimum, maximum) items per list and value range in pence
+DEFAULT_SHAPE = {
+    "assets": (1, 8),
+    "debts": (0, 2),
+    "gifts": (0, 3),
+    "policies": (0, 2),
+    "pensions": (0, 3),
+    "value": (100000, 150000000),
+}
+
+
+def get_items(rng, count_range, value_range, key, names):
+    return [
+        {key: rng.choice(names), "value": rng.randint(*value_range)}
+        for _ in range(rng.randint(*count_range))
+    ]
+
+
+def generate_household(rng, joint, shape=DEFAULT_SHAPE):
+    value = shape["value"]
+
+    def items(kind, key, names):
+        return get_items(rng, shape[kind], value, key, names)
+
+    surname = rng.choice(SURNAMES)
+    crm_record = {"client1": {"name": f"{rng.choice(FIRST_NAMES)} {surname}"}}
+    if joint:
+        crm_record["client2"] = {"name": f"{rng.choice(FIRST_NAMES)} {surname}"}
+
+    # same keys, in the same order, as tests/cases.py
+    crm_record.update(
+        {
+            "joint_assets_and_investments": (
+                items("assets", "asset", ASSET_NAMES) if joint else []
+            ),
+            "client1_assets_and_investments": items("assets", "asset", ASSET_NAMES),
+            "client2_assets_and_investments": (
+                items("assets", "asset", ASSET_NAMES) if joint else []
+            ),
+            "joint_debts_and_mortgages": (
+                items("debts", "debts_and_mortgages", DEBT_NAMES) if joint else []
+            ),
+            "client1_debts_and_mortgages": items(
+                "debts", "debts_and_mortgages", DEBT_NAMES
+            ),
+            "client2_debts_and_mortgages": (
+                items("debts", "debts_and_mortgages", DEBT_NAMES) if joint else []
+            ),
+            "gifts_made_still_in_estate_clts": items("gifts", "gift", GIFT_NAMES),
+            "gifts_made_still_in_estate_pets": items("gifts", "gift", GIFT_NAMES),
+            "assets_outside_of_estate": items("assets", "asset", OUTSIDE_NAMES),
+            "life_cover_policies_outside_of_estate": items(
+                "policies", "policy", POLICY_NAMES
+            ),
+            "pension_assets": items("pensions", "policy", PENSION_NAMES),
+        }
+    )
+
+    return crm_record
+
+
+def generate_households(count, seed=0, joint_ratio=0.5, shape=DEFAULT_SHAPE):
+    # lazy so a million households never sit in memory at once
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_household(rng, rng.random() < joint_ratio, shape)
@@ -0,0 +1,123 @@
+import argparse
+import sys
+
+from index import potential_inheritance_tax_liability
+from utils.logger import disable_queue_logging, enable_queue_logging, get_logger
+from utils.parallel import ParallelRunner
+from utils.stream import calculate_records, parse_records, read_lines, write_results
+
+logger = get_logger(__name__)
+
+
+def number(value):
+    # keep whole-number rates as ints so results stay in integer pence
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="Stream CRM records (JSONL) through the inheritance tax calculator."
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="JSONL file of crm records, or - for stdin (default)",
+    )
+    parser.add_argument(
+        "--rejects",
+        default="-",
+        help="file for malformed rows, or - for stderr (default)",
+    )
+    parser.add_argument("--inheritance-tax-rate", type=number, default=40)
+    parser.add_argument("--charity-donation", type=number, default=0)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="worker processes; 0 runs in-process (default)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=256,
+        help="households sent to a worker at a time",
+    )
+
+    parser.add_argument(
+        "--log-json", action="store_true", help="write log lines as json"
+    )
+    parser.add_argument(
+        "--log-rate",
+        type=int,
+        default=10,
+        help="repeats of the same log message allowed per second",
+    )
+
+    return parser
+
+
+def open_stream(path, mode, default):
+    if path == "-":
+        return default
+    if "b" in mode:
+        return open(path, mode)
+    return open(path, mode, encoding="utf-8")
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+
+    # log formatting and I/O happen on a background thread during the run;
+    # the listener is stopped even when the run fails, so queued records
+    # are flushed and the thread does not outlive main
+    enable_queue_logging(json_format=args.log_json, rate=args.log_rate)
+    try:
+        return run(args)
+    finally:
+        disable_queue_logging()
+
+
+def run(args):
+    # input is read as bytes and decoded per line, see utils.stream
+    source = open_stream(args.input, "rb", sys.stdin.buffer)
+    rejects = open_stream(args.rejects, "w", sys.stderr)
+
+    try:
+        lines = read_lines(source)
+        records = parse_records(
+            lines, rejects, args.inheritance_tax_rate, args.charity_donation
+        )
+        if args.workers:
+            runner = ParallelRunner(args.workers, args.chunk_size)
+            results = runner.calculate_records(records, rejects)
+        else:
+            runner = None
+            results = calculate_records(
+                records, rejects, potential_inheritance_tax_liability
+            )
+        count = write_results(results, sys.stdout, rejects)
+    finally:
+        for stream in (source, rejects):
+            if stream not in (sys.stdin.buffer, sys.stderr):
+                stream.close()
+
+    logger.info("%d households calculated", count)
+
+    if runner is not None:
+        for pid, stats in runner.get_throughput().items():
+            logger.info(
+                "worker %s: %d households, %.0f households/s",
+                pid,
+                stats["households"],
+                stats["households_per_second"],
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
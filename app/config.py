@@ -0,0 +1,94 @@
+from bisect import bisect_right
+from datetime import date
+
+# nil rate band per person, in pence (£325,000)
+NIL_RATE_BAND = 32500000
+
+# the original spreadsheet RNRB figures. They are not in pence like the
+# records (£350,000 would be 35000000). They are kept as the default so
+# existing results do not change; pass date_of_death to use TAX_YEARS instead
+LEGACY_RESIDENCE_NIL_RATE_BAND = 350000
+LEGACY_RNRB_TAPER_THRESHOLD = 2000000
+
+# per-person allowances in whole pounds, as in src/config/tax-years.ts
+# (year, nil rate band, residence nil rate band, rnrb taper threshold)
+_TAX_YEAR_ROWS = (
+    ("2009-10", 325000, 0, 2000000),
+    ("2010-11", 325000, 0, 2000000),
+    ("2011-12", 325000, 0, 2000000),
+    ("2012-13", 325000, 0, 2000000),
+    ("2013-14", 325000, 0, 2000000),
+    ("2014-15", 325000, 0, 2000000),
+    ("2015-16", 325000, 0, 2000000),
+    ("2016-17", 325000, 0, 2000000),
+    ("2017-18", 325000, 100000, 2000000),
+    ("2018-19", 325000, 125000, 2000000),
+    ("2019-20", 325000, 150000, 2000000),
+    ("2020-21", 325000, 175000, 2000000),
+    ("2021-22", 325000, 175000, 2000000),
+    ("2022-23", 325000, 175000, 2000000),
+    ("2023-24", 325000, 175000, 2000000),
+    ("2024-25", 325000, 175000, 2000000),
+    ("2025-26", 325000, 175000, 2000000),
+    ("2026-27", 325000, 175000, 2000000),
+    ("2027-28", 325000, 175000, 2000000),
+    ("2028-29", 325000, 175000, 2000000),
+    ("2029-30", 325000, 175000, 2000000),
+)
+
+
+def _build_tax_years(rows):
+    # runs once at import: convert to pence and precompute the bisect index
+    tax_years = {}
+    for year, nil_rate_band, residence_nil_rate_band, rnrb_taper_threshold in rows:
+        start_year = int(year[:4])
+        tax_years[year] = {
+            "year": year,
+            "start_date": date(start_year, 4, 6),
+            "end_date": date(start_year + 1, 4, 5),
+            "nil_rate_band": nil_rate_band * 100,
+            "residence_nil_rate_band": residence_nil_rate_band * 100,
+            "rnrb_taper_threshold": rnrb_taper_threshold * 100,
+        }
+
+    return tax_years
+
+
+TAX_YEARS = _build_tax_years(_TAX_YEAR_ROWS)
+
+TAX_YEAR_NAMES = tuple(TAX_YEARS)
+
+TAX_YEAR_START_ORDINALS = tuple(
+    TAX_YEARS[year]["start_date"].toordinal() for year in TAX_YEAR_NAMES
+)
+
+
+def get_tax_year_config(year):
+    try:
+        return TAX_YEARS[year]
+    except KeyError:
+        raise ValueError(f"Tax year configuration not found for: {year}") from None
+
+
+def get_tax_year_for_date(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+
+    index = bisect_right(TAX_YEAR_START_ORDINALS, day.toordinal()) - 1
+    if index < 0:
+        raise ValueError(f"No tax year configuration on or before: {day}")
+
+    # thresholds after the last configured year are carried forward
+    return TAX_YEAR_NAMES[index]
+
+
+def get_thresholds(day, record_type):
+    # estate-level allowances; a joint record gets both clients' bands
+    tax_year = TAX_YEARS[get_tax_year_for_date(day)]
+    clients = 2 if record_type == "joint" else 1
+
+    return {
+        "nil_rate_band": tax_year["nil_rate_band"] * clients,
+        "residence_nil_rate_band": tax_year["residence_nil_rate_band"] * clients,
+        "rnrb_taper_threshold": tax_year["rnrb_taper_threshold"],
+    }
@@ -1,126 +1,380 @@
-from pprint import pprint
-
-
 from utils._helpers import (
     get_residential_nil_rate_bands,
     get_taxable_estate,
     get_plus_pets_when_estate_plus_pets_is_less_than_exemptions,
     get_total_estate_passing_to_beneficiaries,
-    get_total_estate_passing_to_beneficiaries,
     get_record_type,
-    get_testcase,
 )
 
+from config import (
+    LEGACY_RESIDENCE_NIL_RATE_BAND,
+    LEGACY_RNRB_TAPER_THRESHOLD,
+    NIL_RATE_BAND,
+    get_thresholds,
+)
+from utils import instrumentation, money
+from utils.calculation_graph import CalculationGraph
 from utils.get_estate_value import get_estate_value
+from utils.gift_ledger import GiftLedger
+from utils.logger import get_logger
 
+logger = get_logger(__name__)
 
-from tests.cases import test_cases
+# the calculation as named nodes; each output field is a node, and the
+# caller supplies crm_record (or estate_value and record_type),
+# inheritance_tax_rate, charity_donation, date_of_death and exact_pence
+GRAPH = CalculationGraph()
 
-crm_record = get_testcase(test_cases, "Ravi Sumoreeah")
+# output fields, in the order a full calculation returns them
+OUTPUTS = (
+    "base_estate_for_rnrb_purposes",
+    "less_money_going_to_charity",
+    "less_available_nil_rate_bands_less_clts",
+    "less_residential_nil_rate_bands",
+    "plus_gifts_made_less_pets",
+    "taxable_estate",
+    "inheritance_tax",
+    "estate_after_tax",
+    "plus_assets_outside_estate",
+    "plus_life_cover_policies_outside_estate",
+    "plus_pets_when_estate_plus_pets_is_less_than_exemptions",
+    "plus_gifts_made_less_clts",
+    "plus_available_nil_rate_bands_less_clts",
+    "plus_residential_nil_rate_bands",
+    "total_estate_passing_to_beneficiaries_ex_pensions",
+    "plus_pension_assets",
+    "total_estate_passing_to_beneficiaries_inc_pensions",
+)
 
+INPUTS = (
+    "crm_record",
+    "inheritance_tax_rate",
+    "charity_donation",
+    "date_of_death",
+    "exact_pence",
+)
 
-def potential_inheritance_tax_liability(
-    crm_record, inheritance_tax_rate=0, charity_donation=0
+
+def apply_legacy_rate(amount, rate):
+    return amount * rate // 100
+
+
+@GRAPH.node("crm_record", stage="record_type")
+def record_type(crm_record):
+    return get_record_type(crm_record)
+
+
+@GRAPH.node("crm_record", "record_type", stage="estate_value")
+def estate_value(crm_record, record_type):
+    return get_estate_value(
+        crm_record, record_type, single_pass=True, include_items=False
+    )
+
+
+@GRAPH.node("estate_value", "exact_pence")
+def totals(estate_value, exact_pence):
+    # exact_pence keeps every figure in int pence, see utils/money.py
+    if exact_pence:
+        return money.get_exact_estate_value(estate_value)
+    return estate_value
+
+
+@GRAPH.node("record_type", "date_of_death")
+def thresholds(record_type, date_of_death):
+    # thresholds come from the tax year of death when one is given,
+    # otherwise the original hard-coded figures are used
+    if date_of_death is not None:
+        return get_thresholds(date_of_death, record_type)
+
+    return {
+        "nil_rate_band": (
+            2 * NIL_RATE_BAND if record_type == "joint" else NIL_RATE_BAND
+        ),
+        "residence_nil_rate_band": LEGACY_RESIDENCE_NIL_RATE_BAND,
+        "rnrb_taper_threshold": LEGACY_RNRB_TAPER_THRESHOLD,
+    }
+
+
+@GRAPH.node("totals")
+def base_estate_for_rnrb_purposes(totals):
+    return totals["total_assets"]
+
+
+@GRAPH.node("base_estate_for_rnrb_purposes", "charity_donation", "exact_pence")
+def less_money_going_to_charity(
+    base_estate_for_rnrb_purposes, charity_donation, exact_pence
 ):
+    apply_rate = money.apply_rate if exact_pence else apply_legacy_rate
+    return apply_rate(base_estate_for_rnrb_purposes, charity_donation)
+
 
-    record_type = get_record_type(crm_record)
+@GRAPH.node("totals", "thresholds", "record_type")
+def less_available_nil_rate_bands_less_clts(totals, thresholds, record_type):
+    # %-style args so the message is only formatted if debug is enabled
+    logger.debug("record_type: %s", record_type)
+    logger.debug("estate_value: %s", totals["gifts_made_still_in_estate_clts"]["total"])
+
+    return (
+        thresholds["nil_rate_band"] - totals["gifts_made_still_in_estate_clts"]["total"]
+    )
 
-    estate_value = get_estate_value(crm_record, record_type)
 
-    base_estate_for_rnrb_purposes = estate_value["total_assets"]
+@GRAPH.node("totals", "thresholds", "exact_pence", stage="residential_nil_rate_bands")
+def less_residential_nil_rate_bands(totals, thresholds, exact_pence):
+    if exact_pence:
+        residential_nil_rate_bands = money.get_residential_nil_rate_bands
+    else:
+        residential_nil_rate_bands = get_residential_nil_rate_bands
 
-    less_money_going_to_charity = (
-        base_estate_for_rnrb_purposes * charity_donation // 100
+    return residential_nil_rate_bands(
+        totals["total_assets"],
+        thresholds["residence_nil_rate_band"],
+        thresholds["rnrb_taper_threshold"],
     )
 
-    # TODO move nil rate to constant 32500000
-    print(f"record_type: {record_type}")
-    total = estate_value["gifts_made_still_in_estate_clts"]["total"]
-    print(f"estate_value: {total}")
-    less_available_nil_rate_bands_less_clts = (
-        65000000 - estate_value["gifts_made_still_in_estate_clts"]["total"]
-        if record_type == "joint"
-        else 32500000 - estate_value["gifts_made_still_in_estate_clts"]["total"]
+
+@GRAPH.node("totals")
+def plus_gifts_made_less_pets(totals):
+    return totals["gifts_made_still_in_estate_pets"]["total"]
+
+
+GRAPH.add(
+    "taxable_estate",
+    get_taxable_estate,
+    (
+        "base_estate_for_rnrb_purposes",
+        "less_available_nil_rate_bands_less_clts",
+        "less_residential_nil_rate_bands",
+        "plus_gifts_made_less_pets",
+    ),
+)
+
+
+@GRAPH.node("taxable_estate", "inheritance_tax_rate", "exact_pence")
+def tax_before_quick_succession_relief(
+    taxable_estate, inheritance_tax_rate, exact_pence
+):
+    #! constant tax band? or apply applicable tax band
+    apply_rate = money.apply_rate if exact_pence else apply_legacy_rate
+    return apply_rate(taxable_estate, inheritance_tax_rate)
+
+
+@GRAPH.node("crm_record")
+def quick_succession_relief_claims(crm_record):
+    return crm_record.get("quick_succession_relief", ())
+
+
+# not one of OUTPUTS; ask for it with outputs=["quick_succession_relief"]
+@GRAPH.node(
+    "quick_succession_relief_claims",
+    "date_of_death",
+    "tax_before_quick_succession_relief",
+)
+def quick_succession_relief(
+    quick_succession_relief_claims, date_of_death, tax_before_quick_succession_relief
+):
+    if not quick_succession_relief_claims:
+        return {"relief_applied": 0, "claims": []}
+
+    # numpy is only loaded for an estate with claims, so importing index
+    # stays cheap
+    from utils.quick_succession_relief import get_quick_succession_relief
+
+    return get_quick_succession_relief(
+        quick_succession_relief_claims,
+        date_of_death,
+        tax_before_quick_succession_relief,
     )
 
-    less_residential_nil_rate_bands = get_residential_nil_rate_bands(
-        estate_value["total_assets"]
+
+@GRAPH.node("tax_before_quick_succession_relief", "quick_succession_relief")
+def inheritance_tax(tax_before_quick_succession_relief, quick_succession_relief):
+    return (
+        tax_before_quick_succession_relief - quick_succession_relief["relief_applied"]
     )
 
-    plus_gifts_made_less_pets = estate_value["gifts_made_still_in_estate_pets"]["total"]
 
-    taxable_estate = get_taxable_estate(
-        base_estate_for_rnrb_purposes,
-        less_available_nil_rate_bands_less_clts,
-        less_residential_nil_rate_bands,
-        plus_gifts_made_less_pets,
+@GRAPH.node("taxable_estate", "inheritance_tax", stage="taxable_estate")
+def estate_after_tax(taxable_estate, inheritance_tax):
+    return taxable_estate - inheritance_tax
+
+
+@GRAPH.node("totals")
+def plus_assets_outside_estate(totals):
+    return totals["assets_outside_of_estate"]["total"]
+
+
+@GRAPH.node("totals")
+def plus_life_cover_policies_outside_estate(totals):
+    return totals["life_cover_policies_outside_of_estate"]["total"]
+
+
+GRAPH.add(
+    "plus_pets_when_estate_plus_pets_is_less_than_exemptions",
+    get_plus_pets_when_estate_plus_pets_is_less_than_exemptions,
+    (
+        "base_estate_for_rnrb_purposes",
+        "less_available_nil_rate_bands_less_clts",
+        "less_residential_nil_rate_bands",
+        "plus_gifts_made_less_pets",
+        "taxable_estate",
+    ),
+)
+
+
+@GRAPH.node("totals")
+def plus_gifts_made_less_clts(totals):
+    return totals["gifts_made_still_in_estate_clts"]["total"]
+
+
+@GRAPH.node("less_available_nil_rate_bands_less_clts")
+def plus_available_nil_rate_bands_less_clts(less_available_nil_rate_bands_less_clts):
+    return less_available_nil_rate_bands_less_clts
+
+
+@GRAPH.node("less_residential_nil_rate_bands")
+def plus_residential_nil_rate_bands(less_residential_nil_rate_bands):
+    return less_residential_nil_rate_bands
+
+
+GRAPH.add(
+    "total_estate_passing_to_beneficiaries_ex_pensions",
+    get_total_estate_passing_to_beneficiaries,
+    (
+        "totals",
+        "less_available_nil_rate_bands_less_clts",
+        "less_residential_nil_rate_bands",
+        "base_estate_for_rnrb_purposes",
+        "estate_after_tax",
+        "plus_assets_outside_estate",
+        "plus_life_cover_policies_outside_estate",
+        "plus_pets_when_estate_plus_pets_is_less_than_exemptions",
+        "plus_gifts_made_less_clts",
+        "plus_available_nil_rate_bands_less_clts",
+        "plus_residential_nil_rate_bands",
+    ),
+)
+
+
+@GRAPH.node("totals")
+def plus_pension_assets(totals):
+    return totals["pension_assets"]["total"]
+
+
+@GRAPH.node(
+    "total_estate_passing_to_beneficiaries_ex_pensions",
+    "plus_pension_assets",
+    stage="total_estate_passing_to_beneficiaries",
+)
+def total_estate_passing_to_beneficiaries_inc_pensions(
+    total_estate_passing_to_beneficiaries_ex_pensions, plus_pension_assets
+):
+    return total_estate_passing_to_beneficiaries_ex_pensions + plus_pension_assets
+
+
+# not one of OUTPUTS; ask for it with outputs=["gift_impact"]
+@GRAPH.node("crm_record", "thresholds", "inheritance_tax_rate", "date_of_death")
+def gift_impact(crm_record, thresholds, inheritance_tax_rate, date_of_death):
+    if date_of_death is None:
+        raise ValueError("gift_impact needs a date_of_death")
+
+    return GiftLedger.from_crm_record(crm_record).get_gift_impact(
+        date_of_death, thresholds["nil_rate_band"], inheritance_tax_rate
     )
 
-    #! constant tax band? or apply applicable tax band
-    inheritance_tax = taxable_estate * inheritance_tax_rate // 100
 
-    estate_after_tax = taxable_estate - inheritance_tax
+# the full calculation, called positionally with INPUTS
+evaluate_outputs = GRAPH.compile(OUTPUTS, INPUTS)
 
-    plus_assets_outside_estate = estate_value["assets_outside_of_estate"]["total"]
 
-    plus_life_cover_policies_outside_estate = estate_value[
-        "life_cover_policies_outside_of_estate"
-    ]["total"]
+def potential_inheritance_tax_liability(
+    crm_record,
+    inheritance_tax_rate=0,
+    charity_donation=0,
+    cache=None,
+    date_of_death=None,
+    exact_pence=False,
+    outputs=None,
+):
+    # outputs picks a subset of the fields; only the nodes they need run
 
-    plus_pets_when_estate_plus_pets_is_less_than_exemptions = (
-        get_plus_pets_when_estate_plus_pets_is_less_than_exemptions(
-            base_estate_for_rnrb_purposes,
-            less_available_nil_rate_bands_less_clts,
-            less_residential_nil_rate_bands,
-            plus_gifts_made_less_pets,
-            taxable_estate,
+    # opt-in memoisation, see utils.result_cache.ResultCache
+    if cache is not None:
+        return cache.get_or_compute(
+            potential_inheritance_tax_liability,
+            crm_record,
+            inheritance_tax_rate,
+            charity_donation,
+            date_of_death=date_of_death,
+            exact_pence=exact_pence,
+            outputs=None if outputs is None else tuple(outputs),
         )
-    )
 
-    plus_gifts_made_less_clts = estate_value["gifts_made_still_in_estate_clts"]["total"]
-
-    plus_available_nil_rate_bands_less_clts = less_available_nil_rate_bands_less_clts
-
-    plus_residential_nil_rate_bands = less_residential_nil_rate_bands
-
-    total_estate_passing_to_beneficiaries_ex_pensions = (
-        get_total_estate_passing_to_beneficiaries(
-            estate_value,
-            less_available_nil_rate_bands_less_clts,
-            less_residential_nil_rate_bands,
-            base_estate_for_rnrb_purposes,
-            estate_after_tax,
-            plus_assets_outside_estate,
-            plus_life_cover_policies_outside_estate,
-            plus_pets_when_estate_plus_pets_is_less_than_exemptions,
-            plus_gifts_made_less_clts,
-            plus_available_nil_rate_bands_less_clts,
-            plus_residential_nil_rate_bands,
+    recorder = instrumentation.recorder
+    if recorder is not None:
+        recorder.increment("calculations")
+
+    if outputs is None:
+        return evaluate_outputs(
+            crm_record,
+            inheritance_tax_rate,
+            charity_donation,
+            date_of_death,
+            exact_pence,
         )
+
+    return GRAPH.evaluate(
+        {
+            "crm_record": crm_record,
+            "inheritance_tax_rate": inheritance_tax_rate,
+            "charity_donation": charity_donation,
+            "date_of_death": date_of_death,
+            "exact_pence": exact_pence,
+        },
+        outputs,
     )
 
-    plus_pension_assets = estate_value["pension_assets"]["total"]
 
-    total_estate_passing_to_beneficiaries_inc_pensions = (
-        total_estate_passing_to_beneficiaries_ex_pensions + plus_pension_assets
+def get_potential_inheritance_tax_liability(
+    estate_value,
+    record_type,
+    inheritance_tax_rate=0,
+    charity_donation=0,
+    date_of_death=None,
+    exact_pence=False,
+    outputs=None,
+    quick_succession_relief_claims=(),
+):
+    # everything downstream of the estate aggregation; only reads totals
+    # and the record's quick succession relief claims
+    return GRAPH.evaluate(
+        {
+            "estate_value": estate_value,
+            "record_type": record_type,
+            "quick_succession_relief_claims": quick_succession_relief_claims,
+            "inheritance_tax_rate": inheritance_tax_rate,
+            "charity_donation": charity_donation,
+            "date_of_death": date_of_death,
+            "exact_pence": exact_pence,
+        },
+        OUTPUTS if outputs is None else outputs,
     )
 
-    return {
-        "base_estate_for_rnrb_purposes": base_estate_for_rnrb_purposes,
-        "less_money_going_to_charity": less_money_going_to_charity,
-        "less_available_nil_rate_bands_less_clts": less_available_nil_rate_bands_less_clts,
-        "less_residential_nil_rate_bands": less_residential_nil_rate_bands,
-        "plus_gifts_made_less_pets": plus_gifts_made_less_pets,
-        "taxable_estate": taxable_estate,
-        "inheritance_tax": inheritance_tax,
-        "estate_after_tax": estate_after_tax,
-        "plus_assets_outside_estate": plus_assets_outside_estate,
-        "plus_life_cover_policies_outside_estate": plus_life_cover_policies_outside_estate,
-        "plus_pets_when_estate_plus_pets_is_less_than_exemptions": plus_pets_when_estate_plus_pets_is_less_than_exemptions,
-        "plus_gifts_made_less_clts": plus_gifts_made_less_clts,
-        "plus_available_nil_rate_bands_less_clts": plus_available_nil_rate_bands_less_clts,
-        "plus_residential_nil_rate_bands": plus_residential_nil_rate_bands,
-        "total_estate_passing_to_beneficiaries_ex_pensions": total_estate_passing_to_beneficiaries_ex_pensions,
-        "plus_pension_assets": plus_pension_assets,
-        "total_estate_passing_to_beneficiaries_inc_pensions": total_estate_passing_to_beneficiaries_inc_pensions,
-    }
+
+if __name__ == "__main__":
+    # fixtures are only loaded when run as a script, never on import
+    from pprint import pprint
+
+    from utils._helpers import get_testcase
+    from tests.cases import test_cases
+
+    test_case = get_testcase(test_cases, "Ravi Sumoreeah")
+
+    pprint(
+        potential_inheritance_tax_liability(
+            test_case["crm_record"],
+            test_case["inheritance_tax_rate"],
+            test_case["charity_donation"],
+        ),
+        sort_dicts=False,
+    )
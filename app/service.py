@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter_ns
+
+from utils.instrumentation import Recorder
+from utils.logger import get_logger
+from utils.parallel import calculate_chunk
+
+logger = get_logger(__name__)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    503: "Service Unavailable",
+}
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Stopped(Exception):
+    pass
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class MicroBatcher:
+    # coalesces requests that arrive within `window` seconds (up to
+    # `max_batch_size`) into one call to calculate_chunk in the executor
+    def __init__(
+        self,
+        executor,
+        recorder,
+        window=0.005,
+        max_batch_size=64,
+        max_queue=1024,
+        max_in_flight=4,
+    ):
+        self.executor = executor
+        self.recorder = recorder
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue(max_queue)
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.task = None
+        self.dispatches = set()
+        self.stopped = False
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        # every request already accepted gets an answer: batches in the
+        # executor finish, anything still queued fails with Stopped
+        self.stopped = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        while not self.queue.empty():
+            self.fail([self.queue.get_nowait()])
+
+        if self.dispatches:
+            await asyncio.gather(*self.dispatches, return_exceptions=True)
+
+    def fail(self, batch):
+        for future, *_ in batch:
+            if not future.done():
+                future.set_exception(Stopped())
+
+    def submit(self, crm_record, inheritance_tax_rate, charity_donation):
+        if self.stopped:
+            raise Stopped()
+
+        # backpressure: refuse rather than queue without bound
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(
+                (future, crm_record, inheritance_tax_rate, charity_donation)
+            )
+        except asyncio.QueueFull:
+            raise Overloaded() from None
+
+        return future
+
+    async def get_batch(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                # already off the queue, so stop() cannot fail them
+                self.fail(batch)
+                raise
+
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self.get_batch()
+            try:
+                await self.in_flight.acquire()
+            except asyncio.CancelledError:
+                self.fail(batch)
+                raise
+
+            # hold a reference until the batch is done
+            dispatch = asyncio.create_task(self.dispatch(batch))
+            self.dispatches.add(dispatch)
+            dispatch.add_done_callback(self.dispatches.discard)
+
+    async def dispatch(self, batch):
+        try:
+            self.recorder.increment("batches")
+            self.recorder.increment("batched_requests", len(batch))
+
+            chunk = [
+                (i, crm_record, rate, donation)
+                for i, (_, crm_record, rate, donation) in enumerate(batch)
+            ]
+            try:
+                results = await self.calculate(chunk)
+            except Exception:
+                # calculate_chunk returns per-household errors, so this is the
+                # chunk as a whole failing (a record that cannot be pickled, a
+                # dead worker); retry each request alone so only its own fails
+                results = await asyncio.gather(
+                    *(self.calculate_alone(row) for row in chunk)
+                )
+
+            for (future, *_), (_, result, error) in zip(batch, results):
+                if not future.done():
+                    future.set_result((result, error))
+        finally:
+            self.in_flight.release()
+
+    async def calculate(self, chunk):
+        _, _, results = await asyncio.get_running_loop().run_in_executor(
+            self.executor, calculate_chunk, chunk
+        )
+        return results
+
+    async def calculate_alone(self, row):
+        try:
+            return (await self.calculate([row]))[0]
+        except Exception as error:
+            return row[0], None, f"{type(error).__name__}: {error}"
+
+
+class CalculationService:
+    def __init__(self, executor, **batcher_options):
+        self.recorder = Recorder(prefix="iht_service")
+        self.batcher = MicroBatcher(executor, self.recorder, **batcher_options)
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                status, content_type, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                write_response(writer, status, content_type, payload, keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except BodyTooLarge:
+            write_response(writer, 413, "text/plain", "request body too large", False)
+        except ValueError as error:
+            write_response(writer, 400, "text/plain", str(error), False)
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == "/calculate":
+            if method != "POST":
+                return 405, "text/plain", "use POST"
+            return await self.calculate(body)
+
+        if path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", self.recorder.to_prometheus()
+
+        if path == "/health" and method == "GET":
+            return 200, "application/json", json.dumps({"status": "ok"})
+
+        return 404, "text/plain", "not found"
+
+    async def calculate(self, body):
+        started = perf_counter_ns()
+        self.recorder.increment("requests")
+
+        try:
+            payload = json.loads(body)
+        except ValueError as error:
+            self.recorder.increment("bad_requests")
+            return 400, "application/json", json.dumps({"error": str(error)})
+        except RecursionError:
+            self.recorder.increment("bad_requests")
+            return (
+                400,
+                "application/json",
+                json.dumps({"error": "invalid json: nested too deeply"}),
+            )
+
+        # same payload shapes as the JSONL runner
+        if not isinstance(payload, dict):
+            self.recorder.increment("bad_requests")
+            return 400, "application/json", json.dumps({"error": "expected object"})
+        crm_record = payload.get("crm_record", payload)
+
+        try:
+            future = self.batcher.submit(
+                crm_record,
+                payload.get("inheritance_tax_rate", 0),
+                payload.get("charity_donation", 0),
+            )
+            result, error = await future
+        except Overloaded:
+            self.recorder.increment("rejected")
+            return 503, "application/json", json.dumps({"error": "queue full"})
+        except Stopped:
+            self.recorder.increment("rejected")
+            return 503, "application/json", json.dumps({"error": "shutting down"})
+        self.recorder.observe("request", perf_counter_ns() - started)
+
+        if error is not None:
+            self.recorder.increment("errors")
+            return 422, "application/json", json.dumps({"error": error})
+
+        # NaN and Infinity are not json, as in utils.stream.write_results
+        try:
+            return 200, "application/json", json.dumps(result, allow_nan=False)
+        except ValueError as error:
+            self.recorder.increment("errors")
+            return (
+                422,
+                "application/json",
+                json.dumps({"error": f"result is not valid json: {error}"}),
+            )
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, path, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ValueError("malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise BodyTooLarge()
+    body = await reader.readexactly(length) if length else b""
+
+    return method, path, headers, body
+
+
+def write_response(writer, status, content_type, payload, keep_alive=True):
+    body = payload.encode("utf-8")
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            + ("Retry-After: 1\r\n" if status == 503 else "")
+            + "\r\n"
+        ).encode("latin-1")
+        + body
+    )
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="Local HTTP service for the inheritance tax calculator."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-window-ms", type=float, default=5)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=1024)
+
+    return parser
+
+
+async def serve(args):
+    workers = args.workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        service = CalculationService(
+            executor,
+            window=args.batch_window_ms / 1000,
+            max_batch_size=args.max_batch_size,
+            max_queue=args.max_queue,
+            max_in_flight=workers,
+        )
+        host, port = await service.start(args.host, args.port)
+        logger.info("listening on http://%s:%s", host, port)
+
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.stop()
+
+
+def main(argv=None):
+    try:
+        asyncio.run(serve(get_parser().parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.batch import (
+    get_batch_columns,
+    get_batch_results,
+    potential_inheritance_tax_liability_batch,
+)
+from tests.cases import test_cases
+
+
+class TestPotentialInheritanceTaxLiabilityBatch(unittest.TestCase):
+    def test_batch_matches_scalar_path(self):
+        columns = get_batch_columns(
+            [test_case["crm_record"] for test_case in test_cases],
+            [test_case["inheritance_tax_rate"] for test_case in test_cases],
+            [test_case["charity_donation"] for test_case in test_cases],
+        )
+        results = get_batch_results(
+            potential_inheritance_tax_liability_batch(**columns)
+        )
+
+        for test_case, result in zip(test_cases, results):
+            expected = potential_inheritance_tax_liability(
+                test_case["crm_record"],
+                test_case["inheritance_tax_rate"],
+                test_case["charity_donation"],
+            )
+            self.assertEqual(result, expected)
+
+    def test_results_are_int_pence_like_the_scalar_path(self):
+        test_case = test_cases[0]
+        columns = get_batch_columns(
+            [test_case["crm_record"]], [40], [test_case["charity_donation"]]
+        )
+        (result,) = get_batch_results(
+            potential_inheritance_tax_liability_batch(**columns)
+        )
+        expected = potential_inheritance_tax_liability(
+            test_case["crm_record"], 40, test_case["charity_donation"]
+        )
+
+        self.assertEqual(json.dumps(result), json.dumps(expected))
+        self.assertTrue(all(type(value) is int for value in result.values()))
+
+    def test_rnrb_taper_and_exempt_branches(self):
+        total_assets = [0, 1000000, 2000000, 2000001, 2350000, 2700000, 2700001]
+        rows = len(total_assets)
+        columns = {
+            "total_assets": total_assets,
+            "gifts_made_still_in_estate_clts": [0] * rows,
+            "gifts_made_still_in_estate_pets": [500000] * rows,
+            "assets_outside_of_estate": [0] * rows,
+            "life_cover_policies_outside_of_estate": [0] * rows,
+            "pension_assets": [0] * rows,
+            "joint": [False] * rows,
+        }
+        results = get_batch_results(
+            potential_inheritance_tax_liability_batch(
+                **columns, inheritance_tax_rate=40
+            )
+        )
+
+        for i, result in enumerate(results):
+            crm_record = {
+                "client1": {"name": "Test"},
+                "client1_assets_and_investments": [
+                    {"asset": "Test", "value": total_assets[i]}
+                ],
+                "gifts_made_still_in_estate_pets": [{"gift": "Test", "value": 500000}],
+            }
+            self.assertEqual(
+                result, potential_inheritance_tax_liability(crm_record, 40)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
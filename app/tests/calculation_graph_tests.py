@@ -0,0 +1,124 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import GRAPH, OUTPUTS, potential_inheritance_tax_liability
+from utils.calculation_graph import CalculationGraph
+from tests.cases import test_cases
+
+
+class TestCalculationGraph(unittest.TestCase):
+    def test_subset_matches_full_calculation(self):
+        for test_case in test_cases:
+            arguments = (
+                test_case["crm_record"],
+                test_case["inheritance_tax_rate"],
+                test_case["charity_donation"],
+            )
+            full = potential_inheritance_tax_liability(*arguments)
+            subset = potential_inheritance_tax_liability(
+                *arguments, outputs=["inheritance_tax", "taxable_estate"]
+            )
+
+            self.assertEqual(list(full), list(OUTPUTS))
+            self.assertEqual(
+                subset,
+                {
+                    "inheritance_tax": full["inheritance_tax"],
+                    "taxable_estate": full["taxable_estate"],
+                },
+            )
+
+    def test_only_needed_nodes_run_once(self):
+        calls = []
+        graph = CalculationGraph()
+
+        @graph.node("value")
+        def doubled(value):
+            calls.append("doubled")
+            return value * 2
+
+        @graph.node("doubled")
+        def plus_one(doubled):
+            calls.append("plus_one")
+            return doubled + 1
+
+        @graph.node("doubled", "plus_one")
+        def total(doubled, plus_one):
+            calls.append("total")
+            return doubled + plus_one
+
+        @graph.node("value")
+        def unused(value):
+            calls.append("unused")
+
+        self.assertEqual(graph.evaluate({"value": 3}, ["total"]), {"total": 13})
+        self.assertEqual(calls, ["doubled", "plus_one", "total"])
+
+        # a supplied value is used in place of its node
+        calls.clear()
+        self.assertEqual(
+            graph.evaluate({"doubled": 10}, ["plus_one"]), {"plus_one": 11}
+        )
+        self.assertEqual(calls, ["plus_one"])
+
+        with self.assertRaises(ValueError):
+            graph.evaluate({}, ["total"])
+
+    def test_any_callable_is_a_node(self):
+        graph = CalculationGraph()
+        offset = 1000
+
+        # arguments are bound by position, whatever their names
+        @graph.node("a", "b")
+        def difference(b, a):
+            return b - a
+
+        graph.add("shifted", lambda difference: difference + offset, ["difference"])
+        graph.add("digits", len, ["text"])
+        graph.add("text", str, ["shifted"])
+        graph.add("constant", lambda: 7)
+
+        outputs = ["difference", "shifted", "digits", "constant"]
+        expected = {"difference": 125, "shifted": 1125, "digits": 4, "constant": 7}
+        evaluate = graph.compile(outputs, ["a", "b"])
+        self.assertEqual(evaluate(150, 25), expected)
+        self.assertEqual(graph.evaluate({"a": 150, "b": 25}, outputs), expected)
+
+        # adding a node plans again rather than reusing stale steps
+        graph.add("unused", lambda a: a, ["a"])
+        self.assertEqual(evaluate(150, 25), expected)
+
+    def test_cycles_are_rejected(self):
+        graph = CalculationGraph()
+        graph.add("a", lambda b: b, ["b"])
+        graph.add("b", lambda a: a, ["a"])
+
+        with self.assertRaises(ValueError):
+            graph.get_plan(["a"])
+
+    def test_export(self):
+        exported = GRAPH.to_dict()
+        names = [node["name"] for node in exported["nodes"]]
+
+        self.assertTrue(set(OUTPUTS) <= set(names))
+        self.assertEqual(
+            exported["inputs"],
+            [
+                "charity_donation",
+                "crm_record",
+                "date_of_death",
+                "exact_pence",
+                "inheritance_tax_rate",
+            ],
+        )
+
+        dot = GRAPH.to_dot(["inheritance_tax"])
+        self.assertIn('"quick_succession_relief" -> "inheritance_tax";', dot)
+        self.assertNotIn("pension", dot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from benchmarks.synthetic import generate_households
+from utils.batch import get_batch_columns
+from utils.columnar_store import ColumnarStore, write_columnar_store
+from tests.cases import test_cases
+
+
+class TestColumnarStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def assertSameColumns(self, columns, expected):
+        self.assertEqual(set(columns), set(expected))
+        for name in expected:
+            np.testing.assert_array_equal(columns[name], expected[name], name)
+
+    def test_columns_match_crm_records(self):
+        crm_records = [test_case["crm_record"] for test_case in test_cases]
+        crm_records += list(generate_households(200, seed=3))
+        write_columnar_store(self.path, crm_records)
+
+        store = ColumnarStore(self.path)
+        self.assertEqual(len(store), len(crm_records))
+        self.assertIsInstance(store.categories["pension_assets"][0], np.memmap)
+
+        self.assertSameColumns(
+            store.get_batch_columns(40, 10, "2024-06-01"),
+            get_batch_columns(crm_records, 40, 10, "2024-06-01"),
+        )
+        self.assertSameColumns(
+            store.get_batch_columns(start=3, stop=150),
+            get_batch_columns(crm_records[3:150]),
+        )
+
+    def test_names_and_household_ids(self):
+        crm_record = dict(test_cases[1]["crm_record"], household_id="H1")
+        write_columnar_store(self.path, [{}, crm_record])
+
+        store = ColumnarStore(self.path)
+        self.assertIsNone(store.get_household_id(0))
+        self.assertEqual(store.get_household_id(1), "H1")
+        self.assertEqual(store.get_items(0, "pension_assets"), [])
+        self.assertEqual(
+            store.get_items(1, "client1_debts_and_mortgages"),
+            [
+                (item["debts_and_mortgages"], item["value"])
+                for item in crm_record["client1_debts_and_mortgages"]
+            ],
+        )
+
+    def test_item_values_are_whole_pence(self):
+        crm_record = {"client1": {}, "pension_assets": [{"value": 2500000.0}]}
+        write_columnar_store(self.path, [crm_record])
+        self.assertEqual(
+            ColumnarStore(self.path).get_items(0, "pension_assets"), [("", 2500000)]
+        )
+
+        for value in (2500000.5, "2500000", 2**63, None):
+            bad_record = {"client1": {}, "pension_assets": [{"value": value}]}
+            with self.assertRaisesRegex(ValueError, "pension_assets"):
+                write_columnar_store(self.path, [crm_record, bad_record])
+            # nothing is left behind that opens as a store
+            with self.assertRaises(OSError):
+                ColumnarStore(self.path)
+            self.assertEqual(os.listdir(self.path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
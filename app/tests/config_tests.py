@@ -0,0 +1,65 @@
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from config import get_tax_year_config, get_tax_year_for_date
+from index import potential_inheritance_tax_liability
+from utils.batch import (
+    get_batch_columns,
+    get_batch_results,
+    potential_inheritance_tax_liability_batch,
+)
+from tests.cases import test_cases
+
+
+class TestTaxYearConfig(unittest.TestCase):
+    def test_tax_year_boundaries(self):
+        self.assertEqual(get_tax_year_for_date(date(2024, 4, 5)), "2023-24")
+        self.assertEqual(get_tax_year_for_date(date(2024, 4, 6)), "2024-25")
+        self.assertEqual(get_tax_year_for_date("2018-01-01"), "2017-18")
+        self.assertEqual(get_tax_year_for_date(date(2040, 1, 1)), "2029-30")
+
+        with self.assertRaises(ValueError):
+            get_tax_year_for_date(date(2000, 1, 1))
+        with self.assertRaises(ValueError):
+            get_tax_year_config("1999-00")
+
+    def test_thresholds_are_in_pence(self):
+        tax_year = get_tax_year_config("2025-26")
+
+        self.assertEqual(tax_year["nil_rate_band"], 32500000)
+        self.assertEqual(tax_year["residence_nil_rate_band"], 17500000)
+        self.assertEqual(tax_year["rnrb_taper_threshold"], 200000000)
+
+    def test_batch_thresholds_match_scalar_path(self):
+        dates_of_death = [
+            date(2016, 6, 1),
+            date(2018, 4, 6),
+            date(2019, 4, 5),
+            date(2025, 1, 1),
+            date(2030, 5, 1),
+            date(2021, 4, 6),
+        ]
+        crm_records = [test_case["crm_record"] for test_case in test_cases]
+
+        columns = get_batch_columns(crm_records, 40, 0, dates_of_death)
+        results = get_batch_results(
+            potential_inheritance_tax_liability_batch(**columns)
+        )
+
+        for crm_record, date_of_death, result in zip(
+            crm_records, dates_of_death, results
+        ):
+            self.assertEqual(
+                result,
+                potential_inheritance_tax_liability(
+                    crm_record, 40, date_of_death=date_of_death
+                ),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
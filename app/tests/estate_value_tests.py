@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from utils._helpers import get_record_type
+from utils.get_estate_value import get_estate_value
+from tests.cases import test_cases
+
+
+class TestGetEstateValue(unittest.TestCase):
+    def test_single_pass_matches_helpers(self):
+        for test_case in test_cases:
+            crm_record = test_case["crm_record"]
+            record_type = get_record_type(crm_record)
+            expected = get_estate_value(crm_record, record_type)
+
+            self.assertEqual(
+                get_estate_value(crm_record, record_type, single_pass=True),
+                expected,
+            )
+
+            totals_only = get_estate_value(
+                crm_record, record_type, single_pass=True, include_items=False
+            )
+            for key, value in expected.items():
+                if isinstance(value, dict):
+                    self.assertEqual(totals_only[key], {"total": value["total"]})
+                else:
+                    self.assertEqual(totals_only[key], value)
+
+
+if __name__ == "__main__":
+    unittest.main()
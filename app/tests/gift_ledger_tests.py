@@ -0,0 +1,116 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import unittest
+from datetime import date, timedelta
+
+from index import potential_inheritance_tax_liability
+from utils._helpers import add_years, get_age
+from utils.gift_ledger import GiftLedger, get_gift_date
+
+
+def get_random_ledger(count, seed=0):
+    rng = random.Random(seed)
+    ledger = GiftLedger()
+    for _ in range(count):
+        ledger.add(
+            date(2010, 1, 1) + timedelta(days=rng.randrange(15 * 365)),
+            rng.choice(("pet", "clt")),
+            rng.randrange(1, 5000000),
+        )
+    return ledger
+
+
+class TestGiftLedger(unittest.TestCase):
+    def test_windows_match_a_scan(self):
+        ledger = get_random_ledger(500)
+        days = [date.fromordinal(ordinal) for ordinal in ledger.ordinals]
+        self.assertEqual(days, sorted(days))
+
+        day = date(2021, 6, 30)
+        self.assertEqual(
+            ledger.get_total(add_years(day, -7), day),
+            sum(
+                value
+                for gift_day, value in zip(days, ledger.values)
+                if add_years(day, -7) < gift_day <= day
+            ),
+        )
+
+        for index, prior_clts in ledger.get_prior_clt_totals():
+            self.assertEqual(
+                prior_clts,
+                sum(
+                    value
+                    for gift_day, value, gift_type in zip(
+                        days, ledger.values, ledger.types
+                    )
+                    if gift_type == "clt"
+                    and add_years(days[index], -7) < gift_day < days[index]
+                ),
+            )
+
+    def test_taper_bands_cover_the_seven_years(self):
+        ledger = get_random_ledger(300, seed=1)
+        death = date(2024, 3, 1)
+        bands = ledger.get_taper_bands(death)
+
+        self.assertEqual([band["rate_share"] for band in bands], [100, 80, 60, 40, 20])
+        self.assertEqual(
+            sum(band["total"] for band in bands),
+            ledger.get_total(add_years(death, -7), death),
+        )
+        for band in bands[1:]:
+            gifts = [
+                date.fromordinal(ordinal)
+                for ordinal in ledger.ordinals
+                if add_years(death, -band["years_to"])
+                < date.fromordinal(ordinal)
+                <= add_years(death, -band["years_from"])
+            ]
+            for gift_day in gifts:
+                self.assertEqual(get_age(gift_day, death), band["years_from"])
+
+    def test_gift_impact(self):
+        ledger = GiftLedger()
+        ledger.add("2015-01-01", "pet", 10000000)  # more than 7 years out
+        ledger.add("2018-05-01", "clt", 20000000)
+        ledger.add("2019-05-01", "pet", 30000000)  # 4 years before death
+
+        impact = ledger.get_gift_impact("2023-06-01", 32500000, 40)
+
+        self.assertEqual(impact["total_gifts_in_7_years"], 50000000)
+        self.assertEqual(impact["nil_rate_band_remaining_for_estate"], 2500000)
+        pet = impact["chargeable_gifts"][1]
+        # band of 325k less 200k of earlier CLTs leaves 175k against the PET
+        self.assertEqual(pet["taxable"], 17500000)
+        self.assertEqual(pet["rate_share"], 60)
+        self.assertEqual(pet["tax"], 17500000 * 40 * 60 // 10000)
+        self.assertEqual(impact["gift_tax"], pet["tax"])
+
+    def test_crm_record_gift_dates(self):
+        self.assertEqual(get_gift_date({"date_outside": "Nov-27"}), date(2020, 11, 1))
+        self.assertEqual(
+            get_gift_date({"date_outside": "11/13/2026"}), date(2019, 11, 13)
+        )
+        self.assertEqual(get_gift_date({"date": "2022-02-03"}), date(2022, 2, 3))
+
+        crm_record = {
+            "client1": {"name": "Test"},
+            "gifts_made_still_in_estate_pets": [
+                {"gift": "Cash", "date_outside": "2027/28", "value": 100},
+                {"gift": "Undated", "value": 200},
+            ],
+        }
+        impact = potential_inheritance_tax_liability(
+            crm_record, 40, date_of_death="2024-06-01", outputs=["gift_impact"]
+        )["gift_impact"]
+        self.assertEqual(impact["total_gifts_in_7_years"], 100)
+        self.assertEqual(impact["undated_gifts"], [{"gift": "Undated", "value": 200}])
+
+
+if __name__ == "__main__":
+    unittest.main()
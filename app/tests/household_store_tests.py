@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from utils._helpers import get_testcase
+from utils.household_store import HouseholdStore
+from tests.cases import test_cases
+
+
+class TestHouseholdStore(unittest.TestCase):
+    def test_lookup_by_either_client_name(self):
+        store = HouseholdStore(test_cases)
+
+        self.assertIs(store.get_by_name("Kerri Sumoreeah"), test_cases[0])
+        self.assertIs(store.get_by_name("ravi  sumoreeah"), test_cases[0])
+        self.assertIs(store.get_by_name("Elizabeth Bunce"), test_cases[5])
+        self.assertIs(store.get_by_name("Rachel Long"), test_cases[1])
+        self.assertIsNone(store.get_by_name("Nobody"))
+
+    def test_lookup_by_household_id(self):
+        crm_record = {"client1": {"name": "Test"}, "household_id": "0013z00002AbCdE"}
+        store = HouseholdStore([crm_record])
+
+        self.assertIs(store.get_by_household_id(" 0013z00002AbCdE"), crm_record)
+        self.assertIsNone(store.get_by_household_id("0013z00002abcde"))
+
+    def test_get_testcase_handles_single_records(self):
+        self.assertIs(get_testcase(test_cases, "Elizabeth Bunce "), test_cases[5])
+        self.assertIsNone(get_testcase(test_cases, "Nobody"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+
+import unittest
+
+# cumulative import time budget for the calculation entry point, in
+# microseconds; override with IMPORT_TIME_BUDGET_US on slow machines
+IMPORT_TIME_BUDGET_US = int(os.environ.get("IMPORT_TIME_BUDGET_US", 60000))
+
+# modules that must not be pulled in by importing index
+LAZY_MODULES = ("tests.cases", "colorlog", "numpy", "pprint")
+
+
+def get_import_times(module):
+    # -X importtime writes "import time: self | cumulative | name" to stderr
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    import_times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        import_times[name.strip()] = int(cumulative)
+
+    return import_times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_index_import_has_no_fixture_or_optional_imports(self):
+        import_times = get_import_times("index")
+
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, import_times)
+
+    def test_index_import_within_budget(self):
+        # best of three to keep scheduler noise out of the measurement
+        best = min(get_import_times("index")["index"] for _ in range(3))
+
+        self.assertLess(
+            best,
+            IMPORT_TIME_BUDGET_US,
+            f"importing index took {best}us, budget is {IMPORT_TIME_BUDGET_US}us",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import copy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from datetime import date
+from unittest import mock
+from index import potential_inheritance_tax_liability
+from utils.incremental_estate import IncrementalEstate
+from tests.cases import test_cases
+
+
+class TestIncrementalEstate(unittest.TestCase):
+    def test_deltas_match_full_recalculation(self):
+        crm_record = copy.deepcopy(test_cases[0]["crm_record"])
+        estate = IncrementalEstate(crm_record)
+        self.assertEqual(
+            estate.get_result(40), potential_inheritance_tax_liability(crm_record, 40)
+        )
+
+        # edit a joint asset, add a debt, then remove the asset again
+        asset_id = list(estate.items["joint_assets_and_investments"])[0]
+        edited = {"asset": "Main Residence", "value": 90000000}
+        estate.update("joint_assets_and_investments", asset_id, edited)
+        crm_record["joint_assets_and_investments"][0] = edited
+        self.assertEqual(
+            estate.get_result(40), potential_inheritance_tax_liability(crm_record, 40)
+        )
+
+        debt = {"debts_and_mortgages": "Mortgage", "value": 25000000}
+        estate.add("client1_debts_and_mortgages", debt)
+        crm_record["client1_debts_and_mortgages"].append(debt)
+        self.assertEqual(
+            estate.get_result(40), potential_inheritance_tax_liability(crm_record, 40)
+        )
+
+        estate.remove("joint_assets_and_investments", asset_id)
+        del crm_record["joint_assets_and_investments"][0]
+        self.assertEqual(
+            estate.get_result(40, 10),
+            potential_inheritance_tax_liability(crm_record, 40, 10),
+        )
+
+    def test_quick_succession_relief(self):
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"years_before_death": 1.5, "tax_paid_on_inheritance": 10000000}
+            ],
+        }
+        estate = IncrementalEstate(crm_record)
+
+        self.assertEqual(
+            estate.get_result(40, date_of_death="2024-06-01"),
+            potential_inheritance_tax_liability(
+                crm_record, 40, date_of_death="2024-06-01"
+            ),
+        )
+        self.assertLess(
+            estate.get_result(40)["inheritance_tax"],
+            potential_inheritance_tax_liability(test_cases[0]["crm_record"], 40)[
+                "inheritance_tax"
+            ],
+        )
+
+    def test_claims_without_date_of_death_expire_daily(self):
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"previous_death": "2027-01-01", "tax_paid_on_inheritance": 10000000}
+            ],
+        }
+        estate = IncrementalEstate(crm_record)
+
+        for today in (date(2028, 6, 1), date(2029, 6, 1)):
+            with mock.patch(
+                "utils.quick_succession_relief.get_default_date_of_death",
+                return_value=today,
+            ):
+                self.assertEqual(
+                    estate.get_result(40),
+                    potential_inheritance_tax_liability(crm_record, 40),
+                )
+
+    def test_single_estate_rejects_joint_items(self):
+        estate = IncrementalEstate(test_cases[1]["crm_record"])
+
+        with self.assertRaises(ValueError):
+            estate.add("joint_assets_and_investments", {"asset": "Test", "value": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils import instrumentation
+from utils._helpers import get_record_type
+from utils.get_estate_value import get_estate_value
+from tests.cases import test_cases
+
+
+class TestInstrumentation(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_stages_are_recorded_when_enabled(self):
+        recorder = instrumentation.enable()
+        for test_case in test_cases:
+            crm_record = test_case["crm_record"]
+            potential_inheritance_tax_liability(crm_record, 40)
+            get_estate_value(crm_record, get_record_type(crm_record))
+
+        stages = json.loads(recorder.to_json())["stages"]
+        self.assertEqual(recorder.counters["calculations"], len(test_cases))
+        for stage in (
+            "record_type",
+            "estate_totals",
+            "estate_value",
+            "residential_nil_rate_bands",
+            "taxable_estate",
+            "total_estate_passing_to_beneficiaries",
+            "assets_and_investments",
+            "debts_and_mortgages",
+        ):
+            self.assertEqual(stages[stage]["count"], len(test_cases))
+
+        prometheus = recorder.to_prometheus()
+        self.assertIn("iht_calculations_total 6\n", prometheus)
+        self.assertIn(
+            'iht_stage_duration_seconds_count{stage="record_type"} 6', prometheus
+        )
+        self.assertIn(
+            'iht_stage_duration_seconds_bucket{stage="record_type",le="+Inf"} 6',
+            prometheus,
+        )
+
+    def test_nothing_recorded_when_disabled(self):
+        recorder = instrumentation.enable()
+        instrumentation.disable()
+
+        potential_inheritance_tax_liability(test_cases[0]["crm_record"], 40)
+
+        self.assertEqual(recorder.to_dict(), {"counters": {}, "stages": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import os
+import sys
+import json
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from utils import logger as logger_module
+from utils.logger import (
+    JsonFormatter,
+    RateLimitFilter,
+    disable_queue_logging,
+    enable_queue_logging,
+    get_logger,
+)
+
+
+def make_record(msg, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestLogger(unittest.TestCase):
+    def tearDown(self):
+        disable_queue_logging()
+
+    def test_rate_limit_keys_on_message_template(self):
+        rate_limit = RateLimitFilter(rate=2, per=60, sample_every=3)
+
+        allowed = [
+            rate_limit.filter(make_record("record_type: %s", i)) for i in range(8)
+        ]
+
+        # two within the rate, then every third one over it
+        self.assertEqual(allowed, [True, True, False, False, True, False, False, True])
+        self.assertEqual(rate_limit.suppressed, 4)
+        self.assertTrue(rate_limit.filter(make_record("other: %s", 1)))
+
+    def test_json_formatter(self):
+        entry = json.loads(JsonFormatter().format(make_record("total: %s", 5)))
+
+        self.assertEqual(entry["message"], "total: 5")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "test")
+
+    def test_queue_logging_formats_on_listener(self):
+        logger = get_logger("tests.logger_tests")
+        # the test runner may already have root handlers, which get_logger
+        # leaves alone, so pin the level here
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        queue_handler = enable_queue_logging(json_format=True, rate=1, per=60)
+
+        stream = io.StringIO()
+        listener = logger_module._queue_logging[0]
+        listener.handlers[0].setStream(stream)
+
+        for i in range(5):
+            logger.info("household %s done", i)
+        disable_queue_logging()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(
+            [json.loads(line)["message"] for line in lines], ["household 0 done"]
+        )
+        self.assertEqual(queue_handler.filters[0].suppressed, 4)
+        self.assertIsInstance(logger.handlers[0], logging.StreamHandler)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+
+import numpy as np
+
+from index import potential_inheritance_tax_liability
+from utils import money
+from utils.batch import (
+    apply_exact_rate_batch,
+    get_batch_columns,
+    get_batch_results,
+    potential_inheritance_tax_liability_batch,
+)
+from tests.cases import test_cases
+
+
+def get_crm_record(total_assets):
+    return {
+        "client1": {"name": "Test"},
+        "client1_assets_and_investments": [{"asset": "Test", "value": total_assets}],
+    }
+
+
+class TestExactPence(unittest.TestCase):
+    def test_every_field_is_int_pence(self):
+        for test_case in test_cases:
+            arguments = (
+                test_case["crm_record"],
+                test_case["inheritance_tax_rate"],
+                test_case["charity_donation"],
+            )
+            exact = potential_inheritance_tax_liability(*arguments, exact_pence=True)
+            legacy = potential_inheritance_tax_liability(*arguments)
+
+            for field, value in exact.items():
+                self.assertIs(type(value), int, field)
+                # the two modes only differ by the legacy half penny
+                self.assertLessEqual(abs(value - legacy[field]), 0.5, field)
+
+    def test_rounding_points(self):
+        # excess of 3p over the taper threshold loses 1p of band, not 1.5p
+        result = potential_inheritance_tax_liability(
+            get_crm_record(2000003), exact_pence=True
+        )
+        self.assertEqual(result["less_residential_nil_rate_bands"], 349999)
+
+        # 40.1% is exact, then rounded down to the penny
+        self.assertEqual(money.apply_rate(1000, 40.1), 401)
+        self.assertEqual(money.apply_rate(999, 40.1), 400)
+        self.assertEqual(money.apply_rate(10**17 + 1, 40.1), 401 * 10**14)
+
+        with self.assertRaises(ValueError):
+            potential_inheritance_tax_liability(get_crm_record(100.5), exact_pence=True)
+
+    def test_int64_batch_matches_scalar_path(self):
+        crm_records = [test_case["crm_record"] for test_case in test_cases]
+        crm_records += [get_crm_record(value) for value in (2000003, 2700001)]
+        rates = [40.1] * len(crm_records)
+
+        batch_result = potential_inheritance_tax_liability_batch(
+            **get_batch_columns(crm_records, rates, 7.5, "2024-06-01"),
+            exact_pence=True,
+        )
+        for field in batch_result:
+            self.assertEqual(batch_result[field].dtype, np.int64, field)
+
+        for crm_record, result in zip(crm_records, get_batch_results(batch_result)):
+            expected = potential_inheritance_tax_liability(
+                crm_record, 40.1, 7.5, date_of_death="2024-06-01", exact_pence=True
+            )
+            self.assertEqual(result, expected)
+
+    def test_int64_batch_rate_does_not_wrap(self):
+        # 10**17 + 1 pence at 40.1% is 401 * (10**17 + 1) before dividing,
+        # past int64; the scalar path gets this from Python ints
+        amounts = np.array([10**17 + 1, 10**18, 1000], dtype=np.int64)
+
+        result = apply_exact_rate_batch(amounts, [40.1, 40.1, 40.1])
+        self.assertEqual(result.dtype, np.int64)
+        self.assertEqual(
+            result.tolist(),
+            [money.apply_rate(int(amount), 40.1) for amount in amounts],
+        )
+        self.assertEqual(result[0], 401 * 10**14)
+
+        result = apply_exact_rate_batch(amounts, [40, 40, 40])
+        self.assertEqual(result.tolist(), [4 * 10**16, 4 * 10**17, 400])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.monte_carlo import classify_asset, simulate_inheritance_tax
+from tests.cases import test_cases
+
+
+class TestMonteCarloSimulation(unittest.TestCase):
+    def test_seeded_runs_are_reproducible(self):
+        crm_record = test_cases[2]["crm_record"]
+
+        first = simulate_inheritance_tax(crm_record, 40, paths=1000, seed=7)
+        second = simulate_inheritance_tax(crm_record, 40, paths=1000, seed=7)
+
+        self.assertEqual(first, second)
+
+    def test_zero_volatility_matches_scalar_path(self):
+        assumptions = {
+            "expected_returns": (0.0, 0.0, 0.0),
+            "volatilities": (0.0, 0.0, 0.0),
+            "correlations": ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+        }
+        claims = [{"years_before_death": 1.5, "tax_paid_on_inheritance": 5000000}]
+        for test_case in test_cases + [
+            {
+                "crm_record": {
+                    **test_cases[2]["crm_record"],
+                    "quick_succession_relief": claims,
+                }
+            }
+        ]:
+            crm_record = test_case["crm_record"]
+            expected = potential_inheritance_tax_liability(crm_record, 40)
+            result = simulate_inheritance_tax(
+                crm_record, 40, paths=10, seed=1, assumptions=assumptions
+            )
+
+            for field, value in result["mean"].items():
+                self.assertAlmostEqual(value, expected[field], places=3)
+
+    def test_classify_asset(self):
+        self.assertEqual(classify_asset({"asset": "Main Residence"}), "property")
+        self.assertEqual(classify_asset({"asset": "Premium Bonds"}), "cash")
+        self.assertEqual(
+            classify_asset({"asset": "SJP - ISA - ISA23986748"}), "equities"
+        )
+        self.assertEqual(
+            classify_asset({"asset": "Hodge Equity Release - Current Account"}), "cash"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.parallel import ParallelRunner, calculate_chunk
+from tests.cases import test_cases
+
+
+class TestParallelRunner(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        records = [
+            (i, test_case["crm_record"], test_case["inheritance_tax_rate"], 0)
+            for i, test_case in enumerate(test_cases * 5)
+        ]
+        records.insert(3, ("bad", {"client1": {}, "pension_assets": [{}]}, 40, 0))
+
+        runner = ParallelRunner(workers=2, chunk_size=4)
+        results = list(runner.run(records))
+
+        self.assertEqual([key for key, _, _ in results], [key for key, *_ in records])
+        for (key, crm_record, rate, donation), (_, result, error) in zip(
+            records, results
+        ):
+            if key == "bad":
+                self.assertIsNone(result)
+                self.assertIn("KeyError", error)
+            else:
+                self.assertEqual(
+                    result,
+                    potential_inheritance_tax_liability(crm_record, rate, donation),
+                )
+
+        throughput = runner.get_throughput()
+        self.assertEqual(
+            sum(stats["households"] for stats in throughput.values()), len(records)
+        )
+
+    def test_overflow_fails_only_its_row(self):
+        huge = {
+            "client1": {},
+            "client1_assets_and_investments": [{"asset": "x", "value": 10**400}],
+        }
+        _, _, results = calculate_chunk(
+            [(0, huge, 40.5, 0), (1, test_cases[1]["crm_record"], 40, 0)]
+        )
+
+        self.assertIn("OverflowError", results[0][2])
+        self.assertEqual(
+            results[1],
+            (
+                1,
+                potential_inheritance_tax_liability(test_cases[1]["crm_record"], 40),
+                None,
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
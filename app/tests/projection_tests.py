@@ -0,0 +1,135 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.projection import DEFAULT_ASSUMPTIONS, project_inheritance_tax
+from utils.quick_succession_relief import get_quick_succession_relief
+from tests.cases import test_cases
+
+FLAT_ASSUMPTIONS = {
+    "growth_rates": dict.fromkeys(DEFAULT_ASSUMPTIONS["growth_rates"], 0.0),
+    "pension_growth_rate": 0.0,
+    "debt_repayment_rate": 0.25,
+}
+
+
+class TestProjection(unittest.TestCase):
+    def test_first_year_matches_point_in_time(self):
+        crm_records = [test_case["crm_record"] for test_case in test_cases]
+        projection = project_inheritance_tax(
+            crm_records, years=3, inheritance_tax_rate=40, start_date="2018-01-01"
+        )
+
+        self.assertEqual(projection.table.shape, (len(crm_records), 4))
+        for i, crm_record in enumerate(crm_records):
+            expected = potential_inheritance_tax_liability(crm_record, 40)
+            for field, value in projection.get_result(i, 0).items():
+                self.assertAlmostEqual(value, expected[field], places=2, msg=field)
+
+    def test_quick_succession_relief_by_year(self):
+        # the relief band drops as each projected death moves further from
+        # the earlier one
+        crm_record = test_cases[2]["crm_record"]
+        claims = [{"previous_death": "2016-06-01", "tax_paid_on_inheritance": 5000000}]
+
+        without = project_inheritance_tax(
+            [crm_record], years=4, inheritance_tax_rate=40, start_date="2018-01-01"
+        )
+        projection = project_inheritance_tax(
+            [{**crm_record, "quick_succession_relief": claims}],
+            years=4,
+            inheritance_tax_rate=40,
+            start_date="2018-01-01",
+        )
+
+        for year, day in enumerate(projection.dates):
+            tax = without.get_result(0, year)["inheritance_tax"]
+            relief = get_quick_succession_relief(claims, day, tax)["relief_applied"]
+            self.assertEqual(
+                projection.get_result(0, year)["inheritance_tax"], tax - relief
+            )
+
+    def test_timeline_events(self):
+        crm_record = {
+            "client1": {"name": "Test"},
+            "client1_assets_and_investments": [
+                {"asset": "Main Residence", "value": 300000000},
+                {"asset": "Octopus EIS", "value": 10000000},
+            ],
+            "client1_debts_and_mortgages": [
+                {"debts_and_mortgages": "Repayment mortgage", "value": 40000000},
+                {"debts_and_mortgages": "Interest only loan", "value": 1000000},
+            ],
+            "gifts_made_still_in_estate_pets": [
+                {"gift": "Cash", "date": "2020-03-01", "value": 5000000}
+            ],
+            "life_cover_policies_outside_of_estate": [
+                {
+                    "protection": {"policy": "Term", "end_date": "03/01/2026"},
+                    "value": 20000000,
+                }
+            ],
+        }
+        projection = project_inheritance_tax(
+            [crm_record],
+            years=5,
+            inheritance_tax_rate=40,
+            start_date="2024-01-01",
+            assumptions=FLAT_ASSUMPTIONS,
+            tax_year_thresholds=True,
+        )
+
+        self.assertEqual(
+            projection["base_estate_for_rnrb_purposes"][0].tolist(),
+            [
+                310000000 - 41000000,
+                310000000 - 31000000,
+                300000000 - 21000000,  # EIS outside after 2 years
+                300000000 - 11000000,
+                300000000 - 1000000,
+                300000000 - 1000000,
+            ],
+        )
+        self.assertEqual(
+            projection["plus_gifts_made_less_pets"][0].tolist(),
+            [5000000] * 4 + [0] * 2,  # made March 2020
+        )
+        self.assertEqual(
+            projection["plus_assets_outside_estate"][0].tolist(),
+            [0, 0, 10000000, 10000000, 15000000, 15000000],
+        )
+        self.assertEqual(
+            projection["plus_life_cover_policies_outside_estate"][0].tolist(),
+            [20000000] * 3 + [0] * 3,
+        )
+
+        # each year agrees with a full recalculation at that date of death
+        for year, day in enumerate(projection.dates):
+            result = projection.get_result(0, year)
+            expected = potential_inheritance_tax_liability(
+                {
+                    "client1": {"name": "Test"},
+                    "client1_assets_and_investments": [
+                        {"value": result["base_estate_for_rnrb_purposes"]}
+                    ],
+                    "gifts_made_still_in_estate_pets": [
+                        {"value": result["plus_gifts_made_less_pets"]}
+                    ],
+                    "assets_outside_of_estate": [
+                        {"value": result["plus_assets_outside_estate"]}
+                    ],
+                    "life_cover_policies_outside_of_estate": [
+                        {"value": result["plus_life_cover_policies_outside_estate"]}
+                    ],
+                },
+                40,
+                date_of_death=day,
+            )
+            self.assertEqual(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
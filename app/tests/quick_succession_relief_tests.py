@@ -0,0 +1,141 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.batch import get_batch_columns, potential_inheritance_tax_liability_batch
+from utils.quick_succession_relief import ClaimColumns, get_quick_succession_relief
+from utils.stream import calculate_records
+from tests.cases import test_cases
+
+
+class TestQuickSuccessionRelief(unittest.TestCase):
+    def test_relief_percentage_bands(self):
+        claims = [
+            {"years_before_death": years, "tax_paid_on_inheritance": 100}
+            for years in (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+        ]
+        columns = ClaimColumns([claims])
+
+        self.assertEqual(
+            columns.get_relief_percentages().tolist(), [100, 80, 60, 40, 20, 0]
+        )
+
+    def test_capped_claim(self):
+        # the Charles case in tests/unit/calculator/qsr-calculator.test.ts
+        claims = [
+            {
+                "previous_death": "2008-03-01",
+                "tax_paid_on_inheritance": 4000000,
+                "qsr_amount": 3200000,
+            }
+        ]
+        result = get_quick_succession_relief(claims, "2010-06-15", 3000000)
+
+        self.assertEqual(result["claims"][0]["relief_percentage"], 60)
+        self.assertEqual(result["relief_applied"], 2400000)
+
+    def test_earliest_claim_used_first(self):
+        claims = [
+            {"years_before_death": 0.5, "tax_paid_on_inheritance": 500},
+            {"years_before_death": 3.5, "tax_paid_on_inheritance": 1000},
+            {"years_before_death": 1.5, "tax_paid_on_inheritance": 1000},
+        ]
+        result = get_quick_succession_relief(claims, None, 1000)
+
+        self.assertEqual(
+            [claim["relief_applied"] for claim in result["claims"]], [0, 400, 600]
+        )
+        self.assertEqual(result["relief_applied"], 1000)
+
+    def test_calculation_and_batch(self):
+        crm_records = [test_case["crm_record"] for test_case in test_cases]
+        crm_records = [
+            {
+                **crm_record,
+                "quick_succession_relief": [
+                    {
+                        "previous_death": "2022-09-01",
+                        "tax_paid_on_inheritance": 1000000 * (i + 1),
+                    },
+                    {"years_before_death": 4, "tax_paid_on_inheritance": 3000000},
+                ],
+            }
+            for i, crm_record in enumerate(crm_records)
+        ]
+
+        batch = potential_inheritance_tax_liability_batch(
+            **get_batch_columns(crm_records, 40, 0, "2024-06-01")
+        )
+
+        for i, crm_record in enumerate(crm_records):
+            without = potential_inheritance_tax_liability(
+                test_cases[i]["crm_record"], 40, date_of_death="2024-06-01"
+            )
+            result = potential_inheritance_tax_liability(
+                crm_record,
+                40,
+                date_of_death="2024-06-01",
+                outputs=["inheritance_tax", "quick_succession_relief"],
+            )
+
+            # 1 year 9 months: 80% of the first claim, 20% of the second
+            relief = min(800000 * (i + 1) + 600000, without["inheritance_tax"])
+            self.assertEqual(
+                result["quick_succession_relief"]["relief_applied"], relief
+            )
+            self.assertEqual(
+                result["inheritance_tax"], without["inheritance_tax"] - relief
+            )
+            self.assertAlmostEqual(
+                batch["inheritance_tax"][i], result["inheritance_tax"]
+            )
+
+    def test_bad_claims_rejected(self):
+        for claim, field in (
+            ({"years_before_death": 1, "tax_paid_on_inheritance": 10**30}, "tax_paid"),
+            (
+                {
+                    "years_before_death": 1,
+                    "tax_paid_on_inheritance": 100,
+                    "qsr_amount": "lots",
+                },
+                "qsr_amount",
+            ),
+            ({"years_before_death": 1}, "tax_paid"),
+            ({"tax_paid_on_inheritance": 100}, "previous_death"),
+            ({"years_before_death": "1", "tax_paid_on_inheritance": 100}, "years"),
+        ):
+            with self.assertRaisesRegex(ValueError, field):
+                ClaimColumns([[claim]])
+
+        # a null cap is no cap
+        claim = {"years_before_death": 1, "tax_paid_on_inheritance": 100}
+        columns = ClaimColumns([[{**claim, "qsr_amount": None}]])
+        self.assertEqual(columns.get_relief_available().tolist(), [80])
+
+    def test_bad_claim_goes_to_rejects(self):
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"years_before_death": 1, "tax_paid_on_inheritance": 10**30}
+            ],
+        }
+        rejects = io.StringIO()
+        records = [
+            (1, crm_record, 40, 0),
+            (2, test_cases[0]["crm_record"], 40, 0),
+        ]
+        results = list(
+            calculate_records(records, rejects, potential_inheritance_tax_liability)
+        )
+
+        self.assertEqual([line for line, _ in results], [2])
+        self.assertIn("tax_paid_on_inheritance", rejects.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from datetime import date
+from unittest import mock
+from index import potential_inheritance_tax_liability
+from utils.result_cache import ResultCache, get_record_hash
+from tests.cases import test_cases
+
+
+class TestResultCache(unittest.TestCase):
+    def test_hits_return_independent_copies(self):
+        cache = ResultCache()
+        crm_record = test_cases[0]["crm_record"]
+
+        first = potential_inheritance_tax_liability(crm_record, 40, cache=cache)
+        first["inheritance_tax"] = -1
+        second = potential_inheritance_tax_liability(crm_record, 40, cache=cache)
+
+        self.assertEqual(second, potential_inheritance_tax_liability(crm_record, 40))
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["misses"], 1)
+
+    def test_nested_results_are_not_shared(self):
+        cache = ResultCache()
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"years_before_death": 1, "tax_paid_on_inheritance": 1000}
+            ],
+        }
+        outputs = ["quick_succession_relief"]
+
+        first = potential_inheritance_tax_liability(
+            crm_record, 40, cache=cache, outputs=outputs
+        )
+        first["quick_succession_relief"]["claims"].clear()
+        second = potential_inheritance_tax_liability(
+            crm_record, 40, cache=cache, outputs=outputs
+        )
+        second["quick_succession_relief"]["relief_applied"] = 0
+        third = potential_inheritance_tax_liability(
+            crm_record, 40, cache=cache, outputs=outputs
+        )
+
+        self.assertEqual(len(third["quick_succession_relief"]["claims"]), 1)
+        self.assertEqual(third["quick_succession_relief"]["relief_applied"], 800)
+        self.assertEqual(cache.get_stats()["hits"], 2)
+
+    def test_key_covers_record_and_parameters(self):
+        crm_record = test_cases[1]["crm_record"]
+        reordered = dict(reversed(list(crm_record.items())))
+
+        self.assertEqual(
+            get_record_hash(crm_record, 40), get_record_hash(reordered, 40)
+        )
+        self.assertNotEqual(
+            get_record_hash(crm_record, 40), get_record_hash(crm_record, 36)
+        )
+        self.assertNotEqual(
+            get_record_hash(crm_record, 40, 0), get_record_hash(crm_record, 40, 10)
+        )
+
+    def test_claims_without_date_of_death_expire_daily(self):
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"previous_death": "2027-01-01", "tax_paid_on_inheritance": 10000000}
+            ],
+        }
+        cache = ResultCache()
+
+        results = []
+        for today in (date(2028, 6, 1), date(2028, 6, 1), date(2029, 6, 1)):
+            with mock.patch(
+                "utils.quick_succession_relief.get_default_date_of_death",
+                return_value=today,
+            ):
+                results.append(
+                    potential_inheritance_tax_liability(crm_record, 40, cache=cache)
+                )
+
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertGreater(results[2]["inheritance_tax"], results[0]["inheritance_tax"])
+
+    def test_lru_eviction_by_entries_and_size(self):
+        cache = ResultCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, {"value": 1})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), {"value": 1})
+        self.assertEqual(cache.evictions, 1)
+
+        cache = ResultCache(max_bytes=1)
+        cache.put("a", {"value": 1})
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_stats()["bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import copy
+from datetime import date
+import unittest
+from unittest import mock
+from index import potential_inheritance_tax_liability
+from utils.result_store import ResultStore
+from tests.cases import test_cases
+
+
+def get_households():
+    return [
+        {**copy.deepcopy(test_case["crm_record"]), "household_id": f"H{i}"}
+        for i, test_case in enumerate(test_cases)
+    ]
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ResultStore(":memory:", batch_size=2)
+        self.households = get_households()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_only_changed_households_recomputed(self):
+        self.assertEqual(
+            self.store.refresh(self.households, 40),
+            {"computed": len(self.households), "unchanged": 0, "deleted": 0},
+        )
+        self.assertEqual(len(self.store), len(self.households))
+        self.assertEqual(
+            self.store.refresh(self.households, 40),
+            {"computed": 0, "unchanged": len(self.households), "deleted": 0},
+        )
+
+        self.households[1]["client1_assets_and_investments"][0]["value"] += 100
+        self.assertEqual(
+            self.store.refresh(self.households, 40),
+            {"computed": 1, "unchanged": len(self.households) - 1, "deleted": 0},
+        )
+
+        # a new rate changes every household's parameters
+        self.assertEqual(self.store.refresh(self.households, 36)["unchanged"], 0)
+
+        for household in self.households:
+            self.assertEqual(
+                self.store.get(household["household_id"]),
+                potential_inheritance_tax_liability(household, 36),
+            )
+
+    def test_claims_without_date_of_death_go_stale(self):
+        household = {
+            **self.households[0],
+            "quick_succession_relief": [
+                {"previous_death": "2027-01-01", "tax_paid_on_inheritance": 10000000}
+            ],
+        }
+        patch = mock.patch(
+            "utils.quick_succession_relief.get_default_date_of_death",
+            return_value=date(2028, 6, 1),
+        )
+        with patch:
+            self.store.refresh([household], 40)
+
+        with mock.patch(
+            "utils.quick_succession_relief.get_default_date_of_death",
+            return_value=date(2029, 6, 1),
+        ):
+            self.assertEqual(self.store.refresh([household], 40)["computed"], 1)
+            self.assertEqual(
+                self.store.get("H0"), potential_inheritance_tax_liability(household, 40)
+            )
+
+        # a record without claims does not depend on today
+        with patch:
+            self.store.refresh(self.households[:1], 40)
+        self.assertEqual(self.store.refresh(self.households[:1], 40)["computed"], 0)
+
+    def test_missing_households_pruned(self):
+        self.store.refresh(self.households, 40)
+
+        result = self.store.refresh(self.households[1:], 40, prune=False)
+        self.assertEqual(result["deleted"], 0)
+        self.assertIsNotNone(self.store.get("H0"))
+
+        result = self.store.refresh(self.households[1:], 40)
+        self.assertEqual(
+            result, {"computed": 0, "unchanged": len(self.households) - 1, "deleted": 1}
+        )
+        self.assertIsNone(self.store.get("H0"))
+        self.assertNotIn("H0", [row[0] for row in self.store.get_households_above(-1)])
+
+    def test_config_change_recomputes(self):
+        self.store.refresh(self.households, 40)
+
+        with mock.patch("config.NIL_RATE_BAND", 30000000):
+            self.assertEqual(self.store.refresh(self.households, 40)["unchanged"], 0)
+
+    def test_households_above(self):
+        self.store.refresh(self.households, 40)
+        expected = sorted(
+            (
+                (household["household_id"], tax)
+                for household in self.households
+                if (
+                    tax := potential_inheritance_tax_liability(household, 40)[
+                        "inheritance_tax"
+                    ]
+                )
+                > 100000000
+            ),
+            key=lambda row: -row[1],
+        )
+
+        self.assertEqual(self.store.get_households_above(100000000), expected)
+        plan = self.store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT household_id FROM results "
+            "WHERE inheritance_tax > 1"
+        ).fetchall()
+        self.assertIn("results_inheritance_tax", str(plan))
+
+        with self.assertRaises(ValueError):
+            self.store.get_households_above(0, "household_id; DROP TABLE results")
+
+    def test_household_id_required(self):
+        with self.assertRaises(ValueError):
+            self.store.refresh([test_cases[0]["crm_record"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.salesforce_rules import classify_rows
+
+
+def get_row(**fields):
+    row = {"household_id": "H1", "client1_name": "Test", "value": 1000000}
+    row.update(fields)
+    return row
+
+
+class TestSalesforceRules(unittest.TestCase):
+    def classify(self, *rows):
+        crm_records, rejects = classify_rows(rows, as_of="2026-10-16")
+        self.assertEqual(rejects, [])
+        return crm_records["H1"]
+
+    def test_eis_leaves_the_estate_after_two_years(self):
+        crm_record = self.classify(
+            get_row(
+                section="Investment Accounts",
+                product="EIS",
+                name="New EIS",
+                start_date="2025-06-01",
+            ),
+            get_row(
+                section="Investment Accounts",
+                product="EIS",
+                name="Old EIS",
+                start_date="2022-06-01",
+            ),
+        )
+
+        self.assertEqual(
+            crm_record["client1_assets_and_investments"],
+            [{"asset": "New EIS", "value": 1000000, "date_outside": "2027-06-01"}],
+        )
+        self.assertEqual(
+            crm_record["assets_outside_of_estate"],
+            [{"asset": "Old EIS", "value": 1000000}],
+        )
+
+    def test_trust_gift_plan_splits_invested_and_growth(self):
+        gift_plan = get_row(
+            section="Investment Accounts",
+            product="Investment Bond",
+            sub_product="",
+            record_type="Corporate/Trust",
+            name="Gift Plan",
+            invested=800000,
+            start_date="2022-03-01",
+        )
+        crm_record = self.classify(gift_plan)
+
+        self.assertEqual(
+            crm_record["gifts_made_still_in_estate_clts"],
+            [{"gift": "Gift Plan", "value": 800000, "date_outside": "2029-03-01"}],
+        )
+        self.assertEqual(
+            crm_record["assets_outside_of_estate"],
+            [{"asset": "Gift Plan", "value": 200000}],
+        )
+
+        # the same bond held personally is just an asset
+        del gift_plan["record_type"]
+        crm_record = self.classify(gift_plan)
+        self.assertEqual(
+            crm_record["client1_assets_and_investments"],
+            [{"asset": "Gift Plan", "value": 1000000}],
+        )
+
+    def test_designated_unit_trust_is_a_pet_for_seven_years(self):
+        crm_record = self.classify(
+            get_row(
+                section="Investment Accounts",
+                product="Unit Trust",
+                designation="Child",
+                name="UT",
+                start_date="2020-01-01",
+            ),
+        )
+
+        self.assertEqual(
+            crm_record["gifts_made_still_in_estate_pets"],
+            [{"gift": "UT", "value": 1000000, "date_outside": "2027-01-01"}],
+        )
+        self.assertEqual(crm_record["client1_assets_and_investments"], [])
+
+    def test_joint_rows_make_a_joint_record(self):
+        crm_record = self.classify(
+            get_row(
+                section="Assets",
+                product="Property - residential",
+                owner="joint",
+                client2_name="Partner",
+                name="Home",
+            ),
+            get_row(
+                section="Mortgage and Loan Accounts",
+                product="Mortgage",
+                owner="joint",
+                name="Mortgage",
+                value=200000,
+            ),
+        )
+
+        self.assertEqual(crm_record["client2"], {"name": "Partner"})
+        self.assertEqual(
+            potential_inheritance_tax_liability(crm_record)[
+                "base_estate_for_rnrb_purposes"
+            ],
+            800000,
+        )
+
+    def test_unknown_products_are_rejected(self):
+        row = get_row(section="Investment Accounts", product="Crypto")
+        crm_records, rejects = classify_rows([row])
+
+        self.assertEqual(crm_records, {})
+        self.assertEqual(rejects, [(row, "no matching rule")])
+
+    def test_bad_values_and_dates_are_rejected(self):
+        plan = {"section": "Investment Accounts", "product": "EIS"}
+        good = get_row(**plan)
+        bad_rows = [
+            get_row(**plan, value=None),
+            get_row(**plan, value="1000000"),
+            get_row(**plan, start_date=20200101),
+        ]
+        crm_records, rejects = classify_rows([*bad_rows, good], as_of="2026-10-16")
+
+        self.assertEqual([row for row, _ in rejects], bad_rows)
+        self.assertIn("value", rejects[0][1])
+        self.assertIn("start_date", rejects[2][1])
+        self.assertEqual(len(crm_records["H1"]["client1_assets_and_investments"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.scenario_sweep import sweep_scenarios
+from tests.cases import test_cases
+
+
+class TestScenarioSweep(unittest.TestCase):
+    def test_grid_matches_scalar_path(self):
+        rates = [0, 0.4, 36, 40]
+        donations = [0, 10, 25]
+
+        for test_case in test_cases:
+            crm_record = test_case["crm_record"]
+            grid = sweep_scenarios(crm_record, rates, donations)
+
+            self.assertEqual(grid.table.shape, (len(rates), len(donations)))
+            for i, rate in enumerate(rates):
+                for j, donation in enumerate(donations):
+                    self.assertEqual(
+                        grid.get_result(i, j),
+                        potential_inheritance_tax_liability(crm_record, rate, donation),
+                    )
+
+    def test_quick_succession_relief(self):
+        crm_record = {
+            **test_cases[0]["crm_record"],
+            "quick_succession_relief": [
+                {"years_before_death": 1.5, "tax_paid_on_inheritance": 5000000}
+            ],
+        }
+        grid = sweep_scenarios(crm_record, [0, 40], [0, 10])
+
+        for i, rate in enumerate([0, 40]):
+            for j, donation in enumerate([0, 10]):
+                self.assertEqual(
+                    grid.get_result(i, j),
+                    potential_inheritance_tax_liability(crm_record, rate, donation),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from utils.batch import (
+    get_batch_columns,
+    potential_inheritance_tax_liability_batch,
+)
+from utils.second_death import get_second_death_results, model_second_deaths
+
+DATE_OF_DEATH = "2025-01-01"
+
+
+def get_joint_record(client1, client2, joint=0):
+    return {
+        "client1": {"name": "One"},
+        "client2": {"name": "Two"},
+        "client1_assets_and_investments": [{"asset": "Shares", "value": client1}],
+        "client2_assets_and_investments": [{"asset": "Shares", "value": client2}],
+        "joint_assets_and_investments": [{"asset": "Main Residence", "value": joint}],
+    }
+
+
+class TestSecondDeath(unittest.TestCase):
+    def test_everything_to_spouse_matches_joint_calculation(self):
+        # with no chargeable legacy and no taper on first death, both bands
+        # transfer in full and the second death is the doubled joint pot
+        crm_records = [
+            get_joint_record(20000000, 10000000, 50000000),
+            get_joint_record(90000000, 0, 30000000),
+        ]
+        result = model_second_deaths(crm_records, 40, DATE_OF_DEATH)
+
+        columns = get_batch_columns(crm_records, 40, 0, [DATE_OF_DEATH] * 2)
+        expected = potential_inheritance_tax_liability_batch(**columns)
+
+        for order in ("client1_first", "client2_first"):
+            self.assertEqual(result[order]["first_death_tax"].tolist(), [0, 0])
+            self.assertEqual(
+                result[order]["transferred_nil_rate_band_percentage"].tolist(),
+                [100, 100],
+            )
+            self.assertEqual(
+                result[order]["total_tax"].tolist(),
+                expected["inheritance_tax"].tolist(),
+            )
+
+    def test_partial_legacy_and_taper(self):
+        # client1 leaves half of 3,000,000 to children: 1,500,000 chargeable
+        # against a tapered RNRB of 0 and a 325,000 NRB, nothing transfers
+        crm_records = [get_joint_record(300000000, 10000000)]
+        result = get_second_death_results(
+            model_second_deaths(crm_records, 40, DATE_OF_DEATH, spouse_share=0.5)
+        )[0]
+
+        client1_first = result["client1_first"]
+        self.assertEqual(client1_first["first_death_chargeable"], 150000000)
+        self.assertEqual(
+            client1_first["first_death_tax"], (150000000 - 32500000) * 40 // 100
+        )
+        self.assertEqual(client1_first["transferred_nil_rate_band_percentage"], 0)
+        self.assertEqual(
+            client1_first["transferred_residence_nil_rate_band_percentage"], 0
+        )
+        self.assertEqual(client1_first["second_death_estate"], 160000000)
+        self.assertEqual(client1_first["second_death_nil_rate_band"], 32500000)
+
+        # client2 dying first leaves 50,000 chargeable, all of it against the
+        # RNRB, so the NRB transfers in full
+        client2_first = result["client2_first"]
+        self.assertEqual(client2_first["first_death_tax"], 0)
+        self.assertAlmostEqual(
+            client2_first["transferred_residence_nil_rate_band_percentage"],
+            (17500000 - 5000000) / 17500000 * 100,
+        )
+        self.assertEqual(client2_first["transferred_nil_rate_band_percentage"], 100)
+
+        cheaper = min(client1_first["total_tax"], client2_first["total_tax"])
+        self.assertEqual(result["cheaper_total_tax"], cheaper)
+        self.assertEqual(
+            result["expected_total_tax"],
+            (client1_first["total_tax"] + client2_first["total_tax"]) / 2,
+        )
+
+    def test_tapered_rnrb_left_to_spouse_transfers_in_full(self):
+        # a 2,100,000 estate tapers the 175,000 RNRB to 125,000; left wholly
+        # to the spouse none of it is used, so all of it transfers
+        crm_records = [get_joint_record(210000000, 10000000)]
+        client1_first = get_second_death_results(
+            model_second_deaths(crm_records, 40, DATE_OF_DEATH)
+        )[0]["client1_first"]
+
+        self.assertEqual(
+            client1_first["transferred_residence_nil_rate_band_percentage"], 100
+        )
+        self.assertEqual(
+            client1_first["second_death_residence_nil_rate_band"], 35000000
+        )
+
+    def test_probability_weighting(self):
+        crm_records = [get_joint_record(300000000, 10000000)]
+        result = model_second_deaths(
+            crm_records,
+            40,
+            DATE_OF_DEATH,
+            spouse_share=0.5,
+            client1_first_probability=1,
+        )
+        self.assertEqual(
+            result["expected_total_tax"][0], result["client1_first"]["total_tax"][0]
+        )
+
+    def test_single_record_rejected(self):
+        with self.assertRaises(ValueError):
+            model_second_deaths([{"client1": {"name": "One"}}])
+
+    def test_quick_succession_relief_rejected(self):
+        crm_record = {
+            "client1": {"name": "One"},
+            "client2": {"name": "Two"},
+            "quick_succession_relief": [
+                {"years_before_death": 1.5, "tax_paid_on_inheritance": 5000000}
+            ],
+        }
+        with self.assertRaisesRegex(ValueError, "quick succession relief"):
+            model_second_deaths([crm_record])
+
+
+if __name__ == "__main__":
+    unittest.main()
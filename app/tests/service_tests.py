@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from index import potential_inheritance_tax_liability
+from service import (
+    MAX_BODY_BYTES,
+    CalculationService,
+    MicroBatcher,
+    Overloaded,
+    Stopped,
+)
+from utils.instrumentation import Recorder
+from tests.cases import test_cases
+
+
+class PoisonExecutor(ThreadPoolExecutor):
+    # fails any chunk containing a "poison" record as a whole
+    def submit(self, function, chunk):
+        if any(crm_record == "poison" for _, crm_record, *_ in chunk):
+            raise RuntimeError("chunk failed")
+        return super().submit(function, chunk)
+
+
+async def post(host, port, path, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body.decode("utf-8")
+
+
+class TestCalculationService(unittest.TestCase):
+    def test_concurrent_requests_are_batched(self):
+        async def run():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                service = CalculationService(executor, window=0.05)
+                host, port = await service.start("127.0.0.1", 0)
+                try:
+                    responses = await asyncio.gather(
+                        *(
+                            post(
+                                host,
+                                port,
+                                "/calculate",
+                                {
+                                    "crm_record": test_case["crm_record"],
+                                    "inheritance_tax_rate": 40,
+                                },
+                            )
+                            for test_case in test_cases
+                        ),
+                        post(
+                            host,
+                            port,
+                            "/calculate",
+                            {"client1": {}, "pension_assets": [{}]},
+                        ),
+                    )
+                    metrics = service.recorder.to_prometheus()
+                finally:
+                    await service.stop()
+            return responses, service.recorder, metrics
+
+        responses, recorder, metrics = asyncio.run(run())
+
+        for test_case, (status, body) in zip(test_cases, responses):
+            self.assertEqual(status, 200)
+            self.assertEqual(
+                json.loads(body),
+                potential_inheritance_tax_liability(test_case["crm_record"], 40),
+            )
+        self.assertEqual(responses[-1][0], 422)
+        self.assertLess(recorder.counters["batches"], len(responses))
+        self.assertIn(
+            'iht_service_stage_duration_seconds_count{stage="request"} 7', metrics
+        )
+
+    def test_failed_chunk_only_fails_its_own_request(self):
+        async def run():
+            with PoisonExecutor(max_workers=1) as executor:
+                batcher = MicroBatcher(executor, Recorder(), window=0.05)
+                batcher.start()
+                futures = [
+                    batcher.submit(test_cases[1]["crm_record"], 40, 0),
+                    batcher.submit("poison", 40, 0),
+                ]
+                results = await asyncio.gather(*futures)
+                await batcher.stop()
+            return results, batcher.recorder.counters["batches"]
+
+        (good, bad), batches = asyncio.run(run())
+
+        self.assertEqual(batches, 1)
+        self.assertEqual(
+            good,
+            (
+                potential_inheritance_tax_liability(test_cases[1]["crm_record"], 40),
+                None,
+            ),
+        )
+        self.assertIsNone(bad[0])
+        self.assertIn("chunk failed", bad[1])
+
+    def test_bad_bodies_and_results(self):
+        async def run():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                service = CalculationService(executor, window=0)
+                host, port = await service.start("127.0.0.1", 0)
+                try:
+                    nested = await post(
+                        host, port, "/calculate", b"[" * 100000 + b"]" * 100000
+                    )
+                    infinite = await post(
+                        host,
+                        port,
+                        "/calculate",
+                        {
+                            "client1": {},
+                            "client1_assets_and_investments": [
+                                {"asset": "x", "value": float("inf")}
+                            ],
+                        },
+                    )
+                finally:
+                    await service.stop()
+            return nested, infinite
+
+        nested, infinite = asyncio.run(run())
+
+        self.assertEqual(nested[0], 400)
+        self.assertIn("nested too deeply", nested[1])
+        self.assertEqual(infinite[0], 422)
+        self.assertIn("not valid json", infinite[1])
+
+    def test_full_queue_is_rejected(self):
+        async def run():
+            batcher = MicroBatcher(None, Recorder(), max_queue=2)
+            batcher.submit({}, 0, 0)
+            batcher.submit({}, 0, 0)
+            with self.assertRaises(Overloaded):
+                batcher.submit({}, 0, 0)
+
+        asyncio.run(run())
+
+    def test_stop_fails_pending_requests(self):
+        async def run():
+            # no dispatch slots, so the first batch waits in run() while the
+            # second request is still queued
+            batcher = MicroBatcher(None, Recorder(), window=0, max_in_flight=0)
+            batcher.start()
+            waiting = batcher.submit({}, 0, 0)
+            await asyncio.sleep(0.01)
+            queued = batcher.submit({}, 0, 0)
+
+            await batcher.stop()
+            for future in (waiting, queued):
+                with self.assertRaises(Stopped):
+                    future.result()
+            with self.assertRaises(Stopped):
+                batcher.submit({}, 0, 0)
+
+        asyncio.run(run())
+
+    def test_oversized_body_is_413(self):
+        async def run():
+            service = CalculationService(None)
+            host, port = await service.start("127.0.0.1", 0)
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(
+                    f"POST /calculate HTTP/1.1\r\n"
+                    f"Content-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode("latin-1")
+                )
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+            finally:
+                await service.stop()
+            return int(response.split()[1])
+
+        self.assertEqual(asyncio.run(run()), 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils.stream import calculate_records, parse_records, read_lines, write_results
+from tests.cases import test_cases
+
+
+class TestStreamPipeline(unittest.TestCase):
+    def test_rejects_do_not_abort_run(self):
+        test_case = test_cases[1]
+        source = io.StringIO(
+            "\n".join(
+                [
+                    json.dumps(test_case["crm_record"]),
+                    "not json",
+                    json.dumps({"client1": {}, "pension_assets": [{}]}),
+                    "",
+                    json.dumps(
+                        {"crm_record": test_case["crm_record"], "charity_donation": 10}
+                    ),
+                ]
+            )
+        )
+        output = io.StringIO()
+        rejects = io.StringIO()
+
+        records = parse_records(read_lines(source), rejects, 40)
+        count = write_results(
+            calculate_records(records, rejects, potential_inheritance_tax_liability),
+            output,
+        )
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 2)
+        self.assertEqual([result["line"] for result in results], [1, 5])
+        self.assertEqual(
+            results[1]["result"],
+            potential_inheritance_tax_liability(test_case["crm_record"], 40, 10),
+        )
+        self.assertEqual(
+            [json.loads(line)["line"] for line in rejects.getvalue().splitlines()],
+            [2, 3],
+        )
+
+    def test_bad_bytes_and_nesting_are_rejected(self):
+        record = json.dumps(test_cases[1]["crm_record"]).encode("utf-8")
+        source = io.BytesIO(
+            b"\n".join(
+                [
+                    record,
+                    b'{"client1": {"name": "\xff"}}',
+                    b"[" * 100000 + b"]" * 100000,
+                    record,
+                ]
+            )
+        )
+        output = io.StringIO()
+        rejects = io.StringIO()
+
+        records = parse_records(read_lines(source), rejects, 40)
+        count = write_results(
+            calculate_records(records, rejects, potential_inheritance_tax_liability),
+            output,
+            rejects,
+        )
+
+        self.assertEqual(count, 2)
+        errors = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        self.assertEqual([error["line"] for error in errors], [2, 3])
+        self.assertIn("utf-8", errors[0]["error"])
+
+    def test_overflow_is_rejected(self):
+        huge = {
+            "client1": {},
+            "client1_assets_and_investments": [{"asset": "x", "value": 10**400}],
+        }
+        records = [(1, huge, 40.5, 0), (2, test_cases[1]["crm_record"], 40, 0)]
+        rejects = io.StringIO()
+
+        results = list(
+            calculate_records(records, rejects, potential_inheritance_tax_liability)
+        )
+
+        self.assertEqual([line for line, _ in results], [2])
+        self.assertIn("OverflowError", json.loads(rejects.getvalue())["error"])
+
+    def test_non_finite_results_are_rejected(self):
+        output = io.StringIO()
+        rejects = io.StringIO()
+        results = [(1, {"inheritance_tax": float("inf")}), (2, {"inheritance_tax": 0})]
+
+        self.assertEqual(write_results(results, output, rejects), 1)
+        self.assertEqual(json.loads(output.getvalue())["line"], 2)
+        self.assertEqual(json.loads(rejects.getvalue())["line"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
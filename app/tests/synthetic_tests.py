@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+from index import potential_inheritance_tax_liability
+from utils._helpers import get_record_type
+from benchmarks.synthetic import generate_households
+from tests.cases import test_cases
+
+
+class TestSyntheticHouseholds(unittest.TestCase):
+    def test_seeded_and_shaped_like_cases(self):
+        households = list(generate_households(50, seed=3))
+
+        self.assertEqual(households, list(generate_households(50, seed=3)))
+        self.assertEqual(
+            {get_record_type(crm_record) for crm_record in households},
+            {"single", "joint"},
+        )
+
+        case_keys = set(test_cases[0]["crm_record"]) - {"income_and_expenditure"}
+        for crm_record in households:
+            self.assertLessEqual(set(crm_record) - {"client2"}, case_keys)
+            potential_inheritance_tax_liability(crm_record, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+from utils.trust_charges import (
+    get_exit_charge,
+    get_last_anniversaries_batch,
+    get_ten_year_charge,
+    trust_charges_batch,
+)
+
+
+# the cases in tests/unit/calculator/trust-calculator.test.ts, in pence
+class TestTenYearCharge(unittest.TestCase):
+    def test_periodic_charge(self):
+        result = get_ten_year_charge("discretionary", "2015-04-01", 45000000, 27500000)
+
+        self.assertEqual(result["notional_transfer"], 45000000)
+        self.assertEqual(result["excess_over_nil_rate_band"], 17500000)
+        self.assertEqual(result["hypothetical_tax"], 3500000)
+        self.assertAlmostEqual(result["effective_rate"], 7.777777, 5)
+        self.assertAlmostEqual(result["anniversary_rate"], 2.333333, 5)
+        self.assertAlmostEqual(result["capped_tax"], 1050000, 0)
+
+    def test_non_relevant_property_before_november_2015(self):
+        result = get_ten_year_charge(
+            "discretionary", "2015-01-10", 100000000, 7600000, 20000000, 15000000
+        )
+
+        self.assertEqual(result["notional_transfer"], 135000000)
+        self.assertAlmostEqual(result["capped_tax"], 5662222, 0)
+
+    def test_non_relevant_property_excluded_after_november_2015(self):
+        result = get_ten_year_charge(
+            "discretionary", "2015-12-01", 35000000, 27498000, 15000000, 12500000
+        )
+
+        self.assertEqual(result["notional_transfer"], 50000000)
+        self.assertAlmostEqual(result["capped_tax"], 945000, delta=100)
+
+    def test_six_percent_cap(self):
+        result = get_ten_year_charge(
+            "discretionary", "2015-04-01", 100000000, -50000000
+        )
+
+        self.assertGreater(result["anniversary_rate"], 6)
+        self.assertEqual(result["capped_tax"], 6000000)
+
+    def test_ipdi_not_chargeable(self):
+        result = get_ten_year_charge("ipdi", "2015-04-01", 45000000, 27500000)
+
+        self.assertFalse(result["chargeable"])
+        self.assertEqual(result["capped_tax"], 0)
+
+
+class TestExitCharge(unittest.TestCase):
+    def test_quarters_since_settlement(self):
+        result = get_exit_charge(
+            "discretionary", "2020-01-01", "2025-01-01", 10000000, 6
+        )
+
+        self.assertTrue(result["chargeable"])
+        self.assertEqual(result["quarters_elapsed"], 20)
+        self.assertEqual(result["effective_rate"], 3)
+        self.assertEqual(result["tax_payable"], 300000)
+
+    def test_quarters_since_last_ten_year_charge(self):
+        result = get_exit_charge(
+            "discretionary", "2020-01-01", "2025-01-01", 10000000, 6, "2024-01-01"
+        )
+
+        self.assertEqual(result["quarters_elapsed"], 4)
+        self.assertAlmostEqual(result["effective_rate"], 0.6)
+        self.assertAlmostEqual(result["tax_payable"], 60000)
+
+    def test_grace_periods(self):
+        for last_ten_year_charge_date, settlement_date in (
+            (None, "2020-01-01"),
+            ("2020-01-01", "2000-01-01"),
+        ):
+            result = get_exit_charge(
+                "discretionary",
+                settlement_date,
+                "2020-03-15",
+                10000000,
+                6,
+                last_ten_year_charge_date,
+            )
+            self.assertTrue(result["grace_period_applied"])
+            self.assertEqual(result["tax_payable"], 0)
+
+    def test_ipdi_not_chargeable(self):
+        result = get_exit_charge("ipdi", "2020-01-01", "2025-01-01", 10000000, 6)
+
+        self.assertFalse(result["chargeable"])
+        self.assertEqual(result["tax_payable"], 0)
+
+
+class TestTrustChargesBatch(unittest.TestCase):
+    def test_last_anniversaries(self):
+        anniversaries = get_last_anniversaries_batch(
+            np.array(
+                ["2005-04-01", "2004-02-29", "2020-06-01", "1994-04-01"],
+                dtype="datetime64[D]",
+            ),
+            np.datetime64("2025-03-01"),
+        )
+
+        self.assertEqual(
+            [str(day) for day in anniversaries],
+            ["2015-04-01", "2024-02-29", "NaT", "2024-04-01"],
+        )
+
+    def test_leap_day_anniversary_rolls_over(self):
+        # 29 Feb + 10 years is 1 Mar, the same Date.setMonth rollover the
+        # grace period uses, and the decade is complete on that day
+        anniversaries = get_last_anniversaries_batch(
+            np.array(["2000-02-29", "2000-02-29"], dtype="datetime64[D]"),
+            np.array(["2010-02-28", "2010-03-01"], dtype="datetime64[D]"),
+        )
+
+        self.assertEqual([str(day) for day in anniversaries], ["NaT", "2010-03-01"])
+
+    def test_exit_before_first_anniversary_needs_rate(self):
+        result = trust_charges_batch(
+            ["discretionary", "discretionary", "ipdi"],
+            ["2020-06-01", "2020-06-01", "2020-06-01"],
+            [30000000, 30000000, 30000000],
+            27500000,
+            "2024-01-01",
+            exit_dates="2023-06-01",
+            exit_values=10000000,
+            exit_rates=[np.nan, 1.5, np.nan],
+        )["exit_charge"]
+
+        self.assertEqual(result["chargeable"].tolist(), [True, True, False])
+        self.assertEqual(result["rate_missing"].tolist(), [True, False, False])
+        self.assertTrue(np.isnan(result["tax_payable"][0]))
+        self.assertAlmostEqual(result["tax_payable"][1], 10000000 * 1.5 * 12 / 40 / 100)
+        self.assertEqual(result["tax_payable"][2], 0)
+
+    def test_exit_before_as_of_anniversary(self):
+        # settled 2005, exit in 2020 between the 2015 and 2025 anniversaries
+        def get_exit_charge(as_of, exit_rates=None):
+            result = trust_charges_batch(
+                ["discretionary"],
+                ["2005-01-01"],
+                [45000000],
+                27500000,
+                as_of,
+                exit_dates="2020-06-01",
+                exit_values=10000000,
+                exit_rates=exit_rates,
+            )
+            self.assertEqual(str(result["exit_anniversary_date"][0]), "2015-01-01")
+            return {field: value[0] for field, value in result["exit_charge"].items()}
+
+        at_exit = get_exit_charge("2020-06-01")
+        self.assertTrue(at_exit["chargeable"])
+        self.assertEqual(at_exit["quarters_elapsed"], 21)
+        self.assertGreater(at_exit["tax_payable"], 0)
+
+        # as_of after the 2025 anniversary: the 2025 rate is not the one to
+        # use, so the same quarters are counted but the rate is missing
+        later = get_exit_charge("2030-06-01")
+        self.assertTrue(later["chargeable"])
+        self.assertFalse(later["grace_period_applied"])
+        self.assertEqual(later["quarters_elapsed"], 21)
+        self.assertTrue(later["rate_missing"])
+        self.assertTrue(np.isnan(later["tax_payable"]))
+
+        given = get_exit_charge("2030-06-01", [1.5])
+        self.assertAlmostEqual(given["tax_payable"], 10000000 * 1.5 * 21 / 40 / 100)
+
+    def test_matches_scalar(self):
+        trust_types = ["discretionary", "ipdi", "discretionary", "discretionary"]
+        settlement_dates = ["2005-04-01", "2005-04-01", "2020-06-01", "1995-01-10"]
+        relevant_property_values = [45000000, 45000000, 30000000, 100000000]
+        exit_dates = ["2020-04-01", "2020-04-01", "2023-06-01", "2016-01-01"]
+
+        result = trust_charges_batch(
+            trust_types,
+            settlement_dates,
+            relevant_property_values,
+            27500000,
+            "2020-01-01",
+            exit_dates=exit_dates,
+            exit_values=10000000,
+            exit_rates=[np.nan, np.nan, 1.5, np.nan],
+        )
+
+        anniversaries = ["2015-04-01", "2015-04-01", None, "2015-01-10"]
+        for i, anniversary in enumerate(anniversaries):
+            ten_year = result["ten_year_charge"]
+            if anniversary is None:
+                self.assertFalse(ten_year["chargeable"][i])
+                rate = 1.5
+            else:
+                expected = get_ten_year_charge(
+                    trust_types[i],
+                    anniversary,
+                    relevant_property_values[i],
+                    27500000,
+                )
+                self.assertAlmostEqual(
+                    ten_year["capped_tax"][i], expected["capped_tax"]
+                )
+                rate = min(expected["anniversary_rate"], 6)
+
+            expected = get_exit_charge(
+                trust_types[i],
+                settlement_dates[i],
+                exit_dates[i],
+                10000000,
+                rate,
+                anniversary,
+            )
+            self.assertAlmostEqual(
+                result["exit_charge"]["tax_payable"][i], expected["tax_payable"]
+            )
+            self.assertEqual(
+                result["exit_charge"]["quarters_elapsed"][i],
+                expected["quarters_elapsed"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
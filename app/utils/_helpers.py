@@ -1,3 +1,22 @@
+from config import LEGACY_RESIDENCE_NIL_RATE_BAND, LEGACY_RNRB_TAPER_THRESHOLD
+
+
+def add_years(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year + years, day=28)
+
+
+def get_age(start_date, as_of):
+    # whole years from start_date to as_of
+    years = as_of.year - start_date.year
+    if (as_of.month, as_of.day) < (start_date.month, start_date.day):
+        years -= 1
+    return years
+
+
 def get_record_type(crm_record):
     if "client2" in crm_record:
         return "joint"
@@ -154,16 +173,23 @@ def get_pension_assets(crm_record):
     }
 
 
-# TODO get source of these constants
-def get_residential_nil_rate_bands(total_assets):
+# defaults are the legacy spreadsheet constants, see config.py
+def get_residential_nil_rate_bands(
+    total_assets,
+    residence_nil_rate_band=LEGACY_RESIDENCE_NIL_RATE_BAND,
+    rnrb_taper_threshold=LEGACY_RNRB_TAPER_THRESHOLD,
+):
 
-    if total_assets > 2000000:
-        if total_assets > 2700000:
+    # £1 of band is lost for every £2 over the threshold
+    if total_assets > rnrb_taper_threshold:
+        if total_assets > rnrb_taper_threshold + 2 * residence_nil_rate_band:
             result = 0
         else:
-            result = 350000 - ((total_assets - 2000000) / 2)
+            result = residence_nil_rate_band - (
+                (total_assets - rnrb_taper_threshold) / 2
+            )
     else:
-        result = 350000
+        result = residence_nil_rate_band
 
     return round(result, 2)
 
@@ -270,6 +296,6 @@ def get_testcase(test_cases, client_name):
         crm_record = test_case["crm_record"]
         if (
             crm_record["client1"]["name"] == client_name
-            or crm_record["client2"]["name"] == client_name
+            or crm_record.get("client2", {}).get("name") == client_name
         ):
             return test_case
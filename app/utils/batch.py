@@ -0,0 +1,446 @@
+import numpy as np
+
+from config import (
+    LEGACY_RESIDENCE_NIL_RATE_BAND,
+    LEGACY_RNRB_TAPER_THRESHOLD,
+    NIL_RATE_BAND,
+    TAX_YEAR_NAMES,
+    TAX_YEARS,
+)
+from index import OUTPUTS
+from utils import money
+from utils._helpers import get_record_type
+from utils.get_estate_value import get_estate_totals
+from utils.quick_succession_relief import ClaimColumns
+
+# output fields, in the order potential_inheritance_tax_liability returns them
+OUTPUT_FIELDS = OUTPUTS
+
+INT64_MAX = np.iinfo(np.int64).max
+
+# one column per household attribute the calculation reads
+INPUT_COLUMNS = (
+    "total_assets",
+    "gifts_made_still_in_estate_clts",
+    "gifts_made_still_in_estate_pets",
+    "assets_outside_of_estate",
+    "life_cover_policies_outside_of_estate",
+    "pension_assets",
+    "joint",
+    "inheritance_tax_rate",
+    "charity_donation",
+)
+
+# the tax-year table as arrays, so a batch resolves thresholds with one
+# searchsorted (vectorised bisect) instead of a lookup per household
+TAX_YEAR_STARTS = np.array(
+    [TAX_YEARS[year]["start_date"] for year in TAX_YEAR_NAMES], dtype="datetime64[D]"
+)
+TAX_YEAR_THRESHOLDS = {
+    name: np.array([TAX_YEARS[year][name] for year in TAX_YEAR_NAMES], dtype=np.float64)
+    for name in ("nil_rate_band", "residence_nil_rate_band", "rnrb_taper_threshold")
+}
+
+
+def get_thresholds_batch(dates_of_death, joint):
+    dates_of_death = np.asarray(dates_of_death, dtype="datetime64[D]")
+
+    index = np.searchsorted(TAX_YEAR_STARTS, dates_of_death, side="right") - 1
+    if np.any(index < 0):
+        raise ValueError("No tax year configuration for some dates of death")
+
+    clients = np.where(joint, 2, 1)
+
+    return {
+        "nil_rate_band": TAX_YEAR_THRESHOLDS["nil_rate_band"][index] * clients,
+        "residence_nil_rate_band": (
+            TAX_YEAR_THRESHOLDS["residence_nil_rate_band"][index] * clients
+        ),
+        "rnrb_taper_threshold": TAX_YEAR_THRESHOLDS["rnrb_taper_threshold"][index],
+    }
+
+
+def get_batch_columns(
+    crm_records, inheritance_tax_rates=0, charity_donations=0, dates_of_death=None
+):
+    crm_records = list(crm_records)
+    rows = len(crm_records)
+
+    columns = {name: np.zeros(rows, dtype=np.float64) for name in INPUT_COLUMNS[:6]}
+    columns["joint"] = np.zeros(rows, dtype=bool)
+    claims = [None] * rows
+
+    for i, crm_record in enumerate(crm_records):
+        record_type = get_record_type(crm_record)
+        totals = get_estate_totals(crm_record, record_type)
+
+        columns["total_assets"][i] = totals.total_assets
+        for name in INPUT_COLUMNS[1:6]:
+            columns[name][i] = getattr(totals, name)
+        columns["joint"][i] = record_type == "joint"
+        claims[i] = crm_record.get("quick_succession_relief")
+
+    # relief available per household, only when some record has claims
+    if any(claims):
+        columns["quick_succession_relief"] = get_quick_succession_relief_batch(
+            claims, dates_of_death
+        )
+
+    return add_parameter_columns(
+        columns, inheritance_tax_rates, charity_donations, dates_of_death
+    )
+
+
+def get_quick_succession_relief_batch(claims_by_household, dates_of_death=None):
+    # relief available per household for the quick_succession_relief column;
+    # 0 when no household has claims, so ClaimColumns is only built if needed
+    if not any(claims_by_household):
+        return 0
+    return ClaimColumns(claims_by_household, dates_of_death).get_household_totals()
+
+
+def add_parameter_columns(
+    columns, inheritance_tax_rates=0, charity_donations=0, dates_of_death=None
+):
+    rows = len(columns["joint"])
+
+    # rates may be given per household or once for the whole batch
+    columns["inheritance_tax_rate"] = np.broadcast_to(
+        np.asarray(inheritance_tax_rates, dtype=np.float64), (rows,)
+    )
+    columns["charity_donation"] = np.broadcast_to(
+        np.asarray(charity_donations, dtype=np.float64), (rows,)
+    )
+
+    if dates_of_death is not None:
+        columns.update(
+            get_thresholds_batch(
+                np.broadcast_to(
+                    np.asarray(dates_of_death, dtype="datetime64[D]"), (rows,)
+                ),
+                columns["joint"],
+            )
+        )
+
+    return columns
+
+
+def get_residential_nil_rate_bands_batch(
+    total_assets,
+    residence_nil_rate_band=LEGACY_RESIDENCE_NIL_RATE_BAND,
+    rnrb_taper_threshold=LEGACY_RNRB_TAPER_THRESHOLD,
+):
+    # same taper as get_residential_nil_rate_bands, one branch per mask
+    result = np.where(
+        total_assets > rnrb_taper_threshold,
+        np.where(
+            total_assets > rnrb_taper_threshold + 2 * residence_nil_rate_band,
+            0.0,
+            residence_nil_rate_band - ((total_assets - rnrb_taper_threshold) / 2),
+        ),
+        np.asarray(residence_nil_rate_band, dtype=np.float64),
+    )
+
+    return np.round(result, 2)
+
+
+def apply_rate_batch(amounts, rates):
+    return amounts * rates // 100
+
+
+def to_pence_batch(amounts):
+    amounts = np.asarray(amounts)
+    if amounts.dtype.kind in "iub":
+        return amounts.astype(np.int64, copy=False)
+
+    pence = amounts.astype(np.int64)
+    if not np.array_equal(pence, amounts):
+        raise ValueError("Amounts are not whole numbers of pence")
+    return pence
+
+
+def multiply_pence_batch(amounts, numerators):
+    # amounts * numerators, which can pass int64 for large estates at
+    # fractional rates; those rows are multiplied as Python ints instead
+    amounts, numerators = np.broadcast_arrays(
+        np.asarray(amounts, dtype=np.int64), np.asarray(numerators, dtype=np.int64)
+    )
+    overflows = np.abs(amounts) > INT64_MAX // np.maximum(np.abs(numerators), 1)
+    if not overflows.any():
+        return amounts * numerators
+
+    products = amounts.astype(object) * numerators.astype(object)
+    products[~overflows] = (amounts * numerators)[~overflows]
+    return products
+
+
+def apply_exact_rate_batch(amounts, rates):
+    # utils/money.py rounding point 1; each distinct rate is converted once
+    rates = np.asarray(rates)
+    if rates.dtype.kind in "iub":
+        numerators = rates.astype(np.int64)
+        denominators = np.ones_like(numerators)
+    else:
+        unique, inverse = np.unique(rates, return_inverse=True)
+        parts = np.array(
+            [money.get_rate_fraction(float(rate)) for rate in unique], np.int64
+        )
+        numerators = parts[:, 0][inverse].reshape(rates.shape)
+        denominators = parts[:, 1][inverse].reshape(rates.shape)
+
+    result = multiply_pence_batch(amounts, numerators) // (100 * denominators)
+    if result.dtype == object:
+        if any(abs(value) > INT64_MAX for value in result.flat):
+            raise ValueError("Tax does not fit in int64 pence")
+        result = result.astype(np.int64)
+    return result
+
+
+def get_exact_residential_nil_rate_bands_batch(
+    total_assets, residence_nil_rate_band, rnrb_taper_threshold
+):
+    # utils/money.py rounding point 2
+    reduction = (total_assets - rnrb_taper_threshold) // 2
+
+    return np.where(
+        total_assets > rnrb_taper_threshold,
+        np.maximum(residence_nil_rate_band - reduction, 0),
+        residence_nil_rate_band,
+    ).astype(np.int64)
+
+
+def get_taxable_estate_batch(
+    base_estate_for_rnrb_purposes,
+    less_available_nil_rate_bands_less_clts,
+    less_residential_nil_rate_bands,
+    plus_gifts_made_less_pets,
+):
+    exemptions = (
+        less_available_nil_rate_bands_less_clts + less_residential_nil_rate_bands
+    )
+
+    # the scalar version only zeroes the estate when both tests fail
+    fully_exempt = (base_estate_for_rnrb_purposes - exemptions < 0) & (
+        (base_estate_for_rnrb_purposes + plus_gifts_made_less_pets) < exemptions
+    )
+
+    result = (
+        base_estate_for_rnrb_purposes
+        - less_available_nil_rate_bands_less_clts
+        - less_residential_nil_rate_bands
+        + plus_gifts_made_less_pets
+    )
+
+    # int 0 so an int64 batch stays int64
+    return np.where(fully_exempt, 0, result)
+
+
+def get_plus_pets_when_estate_plus_pets_is_less_than_exemptions_batch(
+    base_estate_for_rnrb_purposes,
+    less_available_nil_rate_bands_less_clts,
+    less_residential_nil_rate_bands,
+    plus_gifts_made_less_pets,
+    taxable_estate,
+):
+    exactly_exempt = (
+        base_estate_for_rnrb_purposes + plus_gifts_made_less_pets
+        == less_residential_nil_rate_bands + less_available_nil_rate_bands_less_clts
+    )
+
+    return np.where(
+        ~exactly_exempt & (taxable_estate == 0), plus_gifts_made_less_pets, 0
+    )
+
+
+def get_total_estate_passing_to_beneficiaries_batch(
+    total_assets,
+    gifts_made_still_in_estate_pets,
+    less_available_nil_rate_bands_less_clts,
+    less_residential_nil_rate_bands,
+    base_estate_for_rnrb_purposes,
+    estate_after_tax,
+    plus_assets_outside_estate,
+    plus_life_cover_policies_outside_estate,
+    plus_pets_when_estate_plus_pets_is_less_than_exemptions,
+    plus_gifts_made_less_clts,
+    plus_available_nil_rate_bands_less_clts,
+    plus_residential_nil_rate_bands,
+):
+    # summed in the same order as the scalar sum([...]) calls
+    passing = (
+        estate_after_tax
+        + plus_assets_outside_estate
+        + plus_life_cover_policies_outside_estate
+        + plus_pets_when_estate_plus_pets_is_less_than_exemptions
+        + plus_gifts_made_less_clts
+    )
+
+    below_exemptions = (
+        total_assets + gifts_made_still_in_estate_pets
+        < less_available_nil_rate_bands_less_clts + less_residential_nil_rate_bands
+    )
+
+    return np.where(
+        below_exemptions,
+        base_estate_for_rnrb_purposes + passing,
+        passing
+        + plus_available_nil_rate_bands_less_clts
+        + plus_residential_nil_rate_bands,
+    )
+
+
+def potential_inheritance_tax_liability_batch(
+    total_assets,
+    gifts_made_still_in_estate_clts,
+    gifts_made_still_in_estate_pets,
+    assets_outside_of_estate,
+    life_cover_policies_outside_of_estate,
+    pension_assets,
+    joint,
+    inheritance_tax_rate=0,
+    charity_donation=0,
+    nil_rate_band=None,
+    residence_nil_rate_band=LEGACY_RESIDENCE_NIL_RATE_BAND,
+    rnrb_taper_threshold=LEGACY_RNRB_TAPER_THRESHOLD,
+    exact_pence=False,
+    quick_succession_relief=0,
+):
+    # threshold columns come from get_thresholds_batch; left out, the batch
+    # uses the same legacy figures as the scalar path. exact_pence computes
+    # in int64 pence with the rounding points in utils/money.py.
+    # quick_succession_relief is the relief available per household, see
+    # utils/quick_succession_relief.py. Without exact_pence the columns are
+    # float64; get_batch_results turns them back into int pence
+    money_dtype = np.int64 if exact_pence else np.float64
+    (
+        total_assets,
+        gifts_made_still_in_estate_clts,
+        gifts_made_still_in_estate_pets,
+        assets_outside_of_estate,
+        life_cover_policies_outside_of_estate,
+        pension_assets,
+    ) = (
+        to_pence_batch(column) if exact_pence else np.asarray(column, np.float64)
+        for column in (
+            total_assets,
+            gifts_made_still_in_estate_clts,
+            gifts_made_still_in_estate_pets,
+            assets_outside_of_estate,
+            life_cover_policies_outside_of_estate,
+            pension_assets,
+        )
+    )
+    joint = np.asarray(joint, dtype=bool)
+
+    if exact_pence:
+        apply_rate = apply_exact_rate_batch
+        residential_nil_rate_bands = get_exact_residential_nil_rate_bands_batch
+    else:
+        inheritance_tax_rate = np.asarray(inheritance_tax_rate, dtype=np.float64)
+        charity_donation = np.asarray(charity_donation, dtype=np.float64)
+        apply_rate = apply_rate_batch
+        residential_nil_rate_bands = get_residential_nil_rate_bands_batch
+
+    base_estate_for_rnrb_purposes = total_assets
+
+    less_money_going_to_charity = apply_rate(
+        base_estate_for_rnrb_purposes, charity_donation
+    )
+
+    if nil_rate_band is None:
+        nil_rate_band = np.where(joint, 2 * NIL_RATE_BAND, NIL_RATE_BAND)
+
+    less_available_nil_rate_bands_less_clts = (
+        np.asarray(nil_rate_band, dtype=money_dtype) - gifts_made_still_in_estate_clts
+    )
+
+    less_residential_nil_rate_bands = residential_nil_rate_bands(
+        total_assets,
+        np.asarray(residence_nil_rate_band, dtype=money_dtype),
+        np.asarray(rnrb_taper_threshold, dtype=money_dtype),
+    )
+
+    plus_gifts_made_less_pets = gifts_made_still_in_estate_pets
+
+    taxable_estate = get_taxable_estate_batch(
+        base_estate_for_rnrb_purposes,
+        less_available_nil_rate_bands_less_clts,
+        less_residential_nil_rate_bands,
+        plus_gifts_made_less_pets,
+    )
+
+    inheritance_tax = apply_rate(taxable_estate, inheritance_tax_rate)
+    inheritance_tax = inheritance_tax - np.minimum(
+        np.asarray(quick_succession_relief, dtype=money_dtype),
+        np.maximum(inheritance_tax, 0),
+    )
+
+    estate_after_tax = taxable_estate - inheritance_tax
+
+    plus_pets_when_estate_plus_pets_is_less_than_exemptions = (
+        get_plus_pets_when_estate_plus_pets_is_less_than_exemptions_batch(
+            base_estate_for_rnrb_purposes,
+            less_available_nil_rate_bands_less_clts,
+            less_residential_nil_rate_bands,
+            plus_gifts_made_less_pets,
+            taxable_estate,
+        )
+    )
+
+    total_estate_passing_to_beneficiaries_ex_pensions = (
+        get_total_estate_passing_to_beneficiaries_batch(
+            total_assets,
+            gifts_made_still_in_estate_pets,
+            less_available_nil_rate_bands_less_clts,
+            less_residential_nil_rate_bands,
+            base_estate_for_rnrb_purposes,
+            estate_after_tax,
+            assets_outside_of_estate,
+            life_cover_policies_outside_of_estate,
+            plus_pets_when_estate_plus_pets_is_less_than_exemptions,
+            gifts_made_still_in_estate_clts,
+            less_available_nil_rate_bands_less_clts,
+            less_residential_nil_rate_bands,
+        )
+    )
+
+    total_estate_passing_to_beneficiaries_inc_pensions = (
+        total_estate_passing_to_beneficiaries_ex_pensions + pension_assets
+    )
+
+    return {
+        "base_estate_for_rnrb_purposes": base_estate_for_rnrb_purposes,
+        "less_money_going_to_charity": less_money_going_to_charity,
+        "less_available_nil_rate_bands_less_clts": less_available_nil_rate_bands_less_clts,
+        "less_residential_nil_rate_bands": less_residential_nil_rate_bands,
+        "plus_gifts_made_less_pets": plus_gifts_made_less_pets,
+        "taxable_estate": taxable_estate,
+        "inheritance_tax": inheritance_tax,
+        "estate_after_tax": estate_after_tax,
+        "plus_assets_outside_estate": assets_outside_of_estate,
+        "plus_life_cover_policies_outside_estate": life_cover_policies_outside_of_estate,
+        "plus_pets_when_estate_plus_pets_is_less_than_exemptions": plus_pets_when_estate_plus_pets_is_less_than_exemptions,
+        "plus_gifts_made_less_clts": gifts_made_still_in_estate_clts,
+        "plus_available_nil_rate_bands_less_clts": less_available_nil_rate_bands_less_clts,
+        "plus_residential_nil_rate_bands": less_residential_nil_rate_bands,
+        "total_estate_passing_to_beneficiaries_ex_pensions": total_estate_passing_to_beneficiaries_ex_pensions,
+        "plus_pension_assets": pension_assets,
+        "total_estate_passing_to_beneficiaries_inc_pensions": total_estate_passing_to_beneficiaries_inc_pensions,
+    }
+
+
+def get_pence_column(column):
+    # legacy float64 columns hold whole pence; hand them back as int like the
+    # scalar engine does, so 25000000.0 is not written out as 2.5e7
+    if column.dtype.kind == "f" and np.all(np.isfinite(column)):
+        whole = np.floor(column)
+        if np.array_equal(whole, column) and np.all(np.abs(whole) < 2**63):
+            return whole.astype(np.int64).tolist()
+    return column.tolist()
+
+
+def get_batch_results(batch_result):
+    # turn the columnar result back into one dict per household, in int pence
+    columns = [get_pence_column(batch_result[field]) for field in OUTPUT_FIELDS]
+
+    return [dict(zip(OUTPUT_FIELDS, row)) for row in zip(*columns)]
@@ -0,0 +1,183 @@
+from operator import itemgetter
+from time import perf_counter_ns
+
+from utils import instrumentation
+
+
+class Node:
+    __slots__ = ("name", "function", "dependencies", "stage")
+
+    def __init__(self, name, function, dependencies, stage=None):
+        self.name = name
+        self.function = function
+        self.dependencies = dependencies
+        self.stage = stage
+
+
+def get_arguments(dependencies):
+    # (getter, spread): getter pulls a node's arguments out of the values
+    # computed so far in one call; spread when it returns a tuple of them
+    if len(dependencies) == 1:
+        return itemgetter(dependencies[0]), False
+    if dependencies:
+        return itemgetter(*dependencies), True
+    return (lambda values: ()), True
+
+
+class CalculationGraph:
+    # named nodes whose functions take their dependencies' values in order.
+    # Names that no node produces are inputs supplied by the caller
+    def __init__(self):
+        self.nodes = {}
+        self.plans = {}
+        self.steps = {}
+        self.version = 0
+
+    def add(self, name, function, dependencies=(), stage=None):
+        if name in self.nodes:
+            raise ValueError(f"Node already defined: {name}")
+
+        self.nodes[name] = Node(name, function, tuple(dependencies), stage)
+        self.plans.clear()
+        self.steps.clear()
+        self.version += 1
+
+    def node(self, *dependencies, stage=None):
+        # decorator form; the node is named after the function
+        def register(function):
+            self.add(function.__name__, function, dependencies, stage)
+            return function
+
+        return register
+
+    def get_inputs(self):
+        return sorted(
+            {
+                dependency
+                for node in self.nodes.values()
+                for dependency in node.dependencies
+                if dependency not in self.nodes
+            }
+        )
+
+    def get_plan(self, outputs, inputs=()):
+        # nodes needed for `outputs`, dependencies first, skipping anything the
+        # caller already supplies. Plans are cached per (outputs, inputs)
+        key = (tuple(outputs), frozenset(inputs))
+        plan = self.plans.get(key)
+        if plan is not None:
+            return plan
+
+        plan = []
+        visited = set(inputs)
+        visiting = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            node = self.nodes.get(name)
+            if node is None:
+                raise ValueError(f"Missing input or unknown node: {name}")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at node: {name}")
+
+            visiting.add(name)
+            for dependency in node.dependencies:
+                visit(dependency)
+            visiting.discard(name)
+
+            visited.add(name)
+            plan.append(node)
+
+        for output in outputs:
+            visit(output)
+
+        plan = self.plans[key] = tuple(plan)
+        return plan
+
+    def get_steps(self, outputs, inputs=()):
+        # the plan as (name, function, getter, spread, stage) tuples, so a
+        # calculation is one plain call per node; cached like the plan
+        key = (tuple(outputs), frozenset(inputs))
+        steps = self.steps.get(key)
+        if steps is None:
+            steps = self.steps[key] = tuple(
+                (
+                    node.name,
+                    node.function,
+                    *get_arguments(node.dependencies),
+                    node.stage,
+                )
+                for node in self.get_plan(outputs, inputs)
+            )
+        return steps
+
+    def run(self, steps, values, outputs):
+        # values holds the inputs and gains every node's result, in plan
+        # order; stage timings are only taken when utils.instrumentation is
+        # enabled
+        recorder = instrumentation.recorder
+        if recorder is None:
+            for name, function, getter, spread, _ in steps:
+                values[name] = (
+                    function(*getter(values)) if spread else function(getter(values))
+                )
+        else:
+            started = perf_counter_ns()
+            for name, function, getter, spread, stage in steps:
+                values[name] = (
+                    function(*getter(values)) if spread else function(getter(values))
+                )
+                if stage is not None:
+                    started = recorder.lap(stage, started)
+
+        return {output: values[output] for output in outputs}
+
+    def compile(self, outputs, inputs):
+        # for hot paths that always ask for the same outputs: a function
+        # taking the inputs positionally, which skips building the cache key
+        # and the inputs dict by name on every call
+        outputs = tuple(outputs)
+        inputs = tuple(inputs)
+        planned = [None, None]
+
+        def evaluate(*values):
+            # planned again after add(), which clears the steps
+            if planned[0] != self.version:
+                planned[:] = self.version, self.get_steps(outputs, inputs)
+            return self.run(planned[1], dict(zip(inputs, values)), outputs)
+
+        return evaluate
+
+    def evaluate(self, inputs, outputs):
+        # every node runs at most once per call
+        return self.run(self.get_steps(outputs, inputs), dict(inputs), outputs)
+
+    def to_dict(self):
+        return {
+            "inputs": self.get_inputs(),
+            "nodes": [
+                {
+                    "name": node.name,
+                    "dependencies": list(node.dependencies),
+                    "stage": node.stage,
+                }
+                for node in self.nodes.values()
+            ],
+        }
+
+    def to_dot(self, outputs=None):
+        # graphviz source; with outputs, only the nodes they need are drawn
+        if outputs is None:
+            nodes = self.nodes.values()
+        else:
+            nodes = self.get_plan(outputs, self.get_inputs())
+
+        lines = ["digraph calculation {"]
+        for node in nodes:
+            lines.append(f'    "{node.name}";')
+            for dependency in node.dependencies:
+                lines.append(f'    "{dependency}" -> "{node.name}";')
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
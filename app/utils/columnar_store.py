@@ -0,0 +1,295 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from utils import money
+from utils._helpers import get_record_type
+from utils.batch import INPUT_COLUMNS, add_parameter_columns
+from utils.get_estate_value import ESTATE_CATEGORIES, JOINT_ONLY_CATEGORIES
+
+FORMAT_VERSION = 1
+
+# little-endian on disk whatever the machine
+INT64 = np.dtype("<i8")
+
+# item keys that hold a line item's name, first match wins
+NAME_KEYS = ("asset", "gift", "debts_and_mortgages", "protection", "policy")
+
+INT64_RANGE = range(np.iinfo(np.int64).min, np.iinfo(np.int64).max + 1)
+
+# items buffered per column before they are appended to disk
+FLUSH_ITEMS = 65536
+
+# A store is a directory of raw little-endian arrays plus meta.json:
+#   joint.i8, household_ids.i8           one entry per household
+#   <category>.values.i8                 line-item values in pence
+#   <category>.names.i8                  string table index per line item
+#   <category>.offsets.i8                households + 1 offsets into the above
+#   strings.bin, strings.offsets.i8      utf-8 string table
+# Household i's items in a category are values[offsets[i]:offsets[i + 1]].
+
+
+def get_item_name(item):
+    for key in NAME_KEYS:
+        name = item.get(key)
+        if name is not None:
+            if isinstance(name, dict):
+                name = " - ".join(str(value) for value in name.values() if value)
+            return str(name)
+    return ""
+
+
+def get_item_value(item, category):
+    # values are stored as int64 pence; a float must be a whole penny
+    try:
+        value = money.to_pence(item["value"])
+    except KeyError:
+        raise ValueError(f"{category} item has no value") from None
+    except ValueError:
+        raise ValueError(
+            f"{category} item value is not whole pence: {item['value']!r}"
+        ) from None
+    if value not in INT64_RANGE:
+        raise ValueError(f"{category} item value does not fit in int64: {value}")
+    return value
+
+
+class ColumnarStoreWriter:
+    # streams crm records to disk; only the string table is held in memory
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        # meta.json is what makes a store readable, so an older store in the
+        # same directory stops being one as soon as its columns are replaced
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        self.households = 0
+        self.strings = {}
+        self.files = {}
+        self.buffers = {}
+        self.counts = dict.fromkeys(ESTATE_CATEGORIES, 0)
+
+        for name in ("joint", "household_ids"):
+            self.open_column(name)
+        for category in ESTATE_CATEGORIES:
+            for part in ("values", "names", "offsets"):
+                self.open_column(f"{category}.{part}")
+            self.buffers[f"{category}.offsets"].append(0)
+
+    def open_column(self, name):
+        self.files[name] = open(os.path.join(self.path, f"{name}.i8"), "wb")
+        self.buffers[name] = array("q")
+
+    def get_string_id(self, value):
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+        return string_id
+
+    def add(self, crm_record):
+        # values are checked before anything is buffered, so a bad record
+        # raises without leaving part of itself in the store
+        values = {
+            category: [
+                get_item_value(item, category) for item in crm_record.get(category, ())
+            ]
+            for category in ESTATE_CATEGORIES
+        }
+
+        self.buffers["joint"].append(get_record_type(crm_record) == "joint")
+
+        household_id = crm_record.get("household_id")
+        self.buffers["household_ids"].append(
+            -1 if household_id is None else self.get_string_id(str(household_id))
+        )
+
+        for category in ESTATE_CATEGORIES:
+            names = self.buffers[f"{category}.names"]
+            self.buffers[f"{category}.values"].extend(values[category])
+            for item in crm_record.get(category, ()):
+                names.append(self.get_string_id(get_item_name(item)))
+
+            self.counts[category] += len(values[category])
+            self.buffers[f"{category}.offsets"].append(self.counts[category])
+
+        self.households += 1
+        if len(self.buffers["joint"]) >= FLUSH_ITEMS:
+            self.flush()
+        else:
+            for category in ESTATE_CATEGORIES:
+                if len(self.buffers[f"{category}.values"]) >= FLUSH_ITEMS:
+                    self.flush()
+                    break
+
+    def flush(self):
+        for name, buffer in self.buffers.items():
+            if buffer:
+                self.files[name].write(np.frombuffer(buffer, np.int64).astype(INT64))
+                del buffer[:]
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+        encoded = [value.encode("utf-8") for value in self.strings]
+        with open(os.path.join(self.path, "strings.bin"), "wb") as file:
+            file.write(b"".join(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=INT64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        offsets.tofile(os.path.join(self.path, "strings.offsets.i8"))
+
+        with open(os.path.join(self.path, "meta.json"), "w") as file:
+            json.dump(
+                {
+                    "version": FORMAT_VERSION,
+                    "households": self.households,
+                    "strings": len(encoded),
+                    "items": self.counts,
+                },
+                file,
+                indent=2,
+            )
+
+    def abort(self):
+        # closes and removes the column files without writing meta.json, so
+        # a failed write leaves nothing ColumnarStore would open
+        for file in self.files.values():
+            file.close()
+            os.remove(file.name)
+        # and the string table of any store this one was replacing
+        for name in ("strings.bin", "strings.offsets.i8"):
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_columnar_store(path, crm_records):
+    with ColumnarStoreWriter(path) as writer:
+        for crm_record in crm_records:
+            writer.add(crm_record)
+
+    return writer.households
+
+
+class ColumnarStore:
+    # every column is a read-only numpy.memmap; nothing is loaded up front
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as file:
+            self.meta = json.load(file)
+
+        if self.meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store version: {path}")
+
+        self.households = self.meta["households"]
+        self.joint = self.open_column("joint", self.households)
+        self.household_ids = self.open_column("household_ids", self.households)
+
+        self.categories = {}
+        for category in ESTATE_CATEGORIES:
+            items = self.meta["items"][category]
+            self.categories[category] = (
+                self.open_column(f"{category}.values", items),
+                self.open_column(f"{category}.names", items),
+                self.open_column(f"{category}.offsets", self.households + 1),
+            )
+
+        self.string_offsets = self.open_column(
+            "strings.offsets", self.meta["strings"] + 1
+        )
+        self.string_data = self.open_column("strings", None, "bin", np.uint8)
+
+    def open_column(self, name, length, extension="i8", dtype=INT64):
+        file_name = os.path.join(self.path, f"{name}.{extension}")
+        # numpy cannot map an empty file
+        if length == 0 or os.path.getsize(file_name) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_name, dtype=dtype, mode="r", shape=length)
+
+    def __len__(self):
+        return self.households
+
+    def get_string(self, string_id):
+        if string_id < 0:
+            return None
+        start, stop = self.string_offsets[string_id : string_id + 2]
+        return bytes(self.string_data[start:stop]).decode("utf-8")
+
+    def get_household_id(self, i):
+        return self.get_string(int(self.household_ids[i]))
+
+    def get_items(self, i, category):
+        # (name, value) pairs for one household, for inspection
+        values, names, offsets = self.categories[category]
+        start, stop = offsets[i], offsets[i + 1]
+        return [
+            (self.get_string(int(name)), int(value))
+            for name, value in zip(names[start:stop], values[start:stop])
+        ]
+
+    def get_category_totals(self, category, start=0, stop=None):
+        # per-household sums of one category. The leading zero keeps
+        # households with no items at 0, which np.add.reduceat would not
+        stop = self.households if stop is None else stop
+        values, _, offsets = self.categories[category]
+
+        bounds = offsets[start : stop + 1]
+        if len(bounds) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        running = np.zeros(bounds[-1] - bounds[0] + 1, dtype=np.int64)
+        np.cumsum(values[bounds[0] : bounds[-1]], out=running[1:])
+        totals = running[bounds[1:] - bounds[0]] - running[bounds[:-1] - bounds[0]]
+
+        if category in JOINT_ONLY_CATEGORIES:
+            totals[self.joint[start:stop] == 0] = 0
+
+        return totals
+
+    def get_batch_columns(
+        self,
+        inheritance_tax_rates=0,
+        charity_donations=0,
+        dates_of_death=None,
+        start=0,
+        stop=None,
+    ):
+        # same columns as utils.batch.get_batch_columns, straight from disk;
+        # pass start/stop to work through a large book in slices
+        totals = {
+            category: self.get_category_totals(category, start, stop)
+            for category in ESTATE_CATEGORIES
+        }
+
+        columns = {
+            "total_assets": (
+                totals["client1_assets_and_investments"]
+                - totals["client1_debts_and_mortgages"]
+                + totals["client2_assets_and_investments"]
+                - totals["client2_debts_and_mortgages"]
+                + totals["joint_assets_and_investments"]
+                - totals["joint_debts_and_mortgages"]
+            ).astype(np.float64)
+        }
+        for name in INPUT_COLUMNS[1:6]:
+            columns[name] = totals[name].astype(np.float64)
+        columns["joint"] = self.joint[start:stop] != 0
+
+        return add_parameter_columns(
+            columns, inheritance_tax_rates, charity_donations, dates_of_death
+        )
@@ -1,5 +1,7 @@
-from pprint import pprint
+import logging
+from time import perf_counter_ns
 
+from utils import instrumentation
 from utils._helpers import (
     get_assets_and_investments,
     get_debts_and_mortgages,
@@ -12,8 +14,128 @@ from utils._helpers import (
     get_pension_assets,
 )
 
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# crm record keys summed by the single-pass aggregation, in slot order
+ESTATE_CATEGORIES = (
+    "client1_assets_and_investments",
+    "client2_assets_and_investments",
+    "joint_assets_and_investments",
+    "client1_debts_and_mortgages",
+    "client2_debts_and_mortgages",
+    "joint_debts_and_mortgages",
+    "gifts_made_still_in_estate_clts",
+    "gifts_made_still_in_estate_pets",
+    "assets_outside_of_estate",
+    "life_cover_policies_outside_of_estate",
+    "pension_assets",
+)
+
+# client2 and joint lists only count towards a joint record
+JOINT_ONLY_CATEGORIES = frozenset(
+    (
+        "client2_assets_and_investments",
+        "joint_assets_and_investments",
+        "client2_debts_and_mortgages",
+        "joint_debts_and_mortgages",
+    )
+)
+
+# item list key echoed back by the per-category helpers
+ITEM_KEYS = {
+    "gifts_made_still_in_estate_clts": "gifts_made",
+    "gifts_made_still_in_estate_pets": "gifts_made",
+    "assets_outside_of_estate": "assets",
+    "life_cover_policies_outside_of_estate": "protections",
+    "pension_assets": "protections",
+}
+
+
+class EstateTotals:
+    __slots__ = ESTATE_CATEGORIES
+
+    def __init__(self):
+        for category in ESTATE_CATEGORIES:
+            setattr(self, category, 0)
+
+    @property
+    def total_assets(self):
+        return (
+            self.client1_assets_and_investments
+            - self.client1_debts_and_mortgages
+            + self.client2_assets_and_investments
+            - self.client2_debts_and_mortgages
+            + self.joint_assets_and_investments
+            - self.joint_debts_and_mortgages
+        )
+
+
+def get_estate_totals(crm_record, record_type):
+    totals = EstateTotals()
 
-def get_estate_value(crm_record, record_type):
+    # one pass over the record, one running total per category
+    for category in ESTATE_CATEGORIES:
+        if record_type != "joint" and category in JOINT_ONLY_CATEGORIES:
+            continue
+
+        total = 0
+        for item in crm_record.get(category, ()):
+            total += item["value"]
+        setattr(totals, category, total)
+
+    return totals
+
+
+def get_estate_value_from_totals(totals, crm_record=None):
+    # the echoed item lists are only attached when a crm record is passed in
+    def category_value(category):
+        value = {"total": getattr(totals, category)}
+        if crm_record is not None:
+            value[ITEM_KEYS[category]] = crm_record.get(category, [])
+        return value
+
+    total_assets = totals.total_assets
+
+    return {
+        "total_assets": total_assets,
+        "gifts_made_still_in_estate_clts": category_value(
+            "gifts_made_still_in_estate_clts"
+        ),
+        "gifts_made_still_in_estate_pets": category_value(
+            "gifts_made_still_in_estate_pets"
+        ),
+        "assets_outside_of_estate": category_value("assets_outside_of_estate"),
+        "life_cover_policies_outside_of_estate": category_value(
+            "life_cover_policies_outside_of_estate"
+        ),
+        "total_assets_plus_gifts_and_life_cover_policies": get_total_assets_plus_gifts_and_life_cover_policies(
+            total_assets,
+            totals.gifts_made_still_in_estate_clts,
+            totals.gifts_made_still_in_estate_pets,
+            totals.assets_outside_of_estate,
+            totals.life_cover_policies_outside_of_estate,
+        ),
+        "pension_assets": category_value("pension_assets"),
+    }
+
+
+def get_estate_value(crm_record, record_type, single_pass=False, include_items=True):
+
+    recorder = instrumentation.recorder
+    if recorder is not None:
+        started = perf_counter_ns()
+
+    if single_pass:
+        totals = get_estate_totals(crm_record, record_type)
+
+        if recorder is not None:
+            recorder.lap("estate_totals", started)
+
+        return get_estate_value_from_totals(
+            totals, crm_record if include_items else None
+        )
 
     # initialise variables
     client1_assets_and_investments = {}
@@ -35,6 +157,9 @@ def get_estate_value(crm_record, record_type):
         # get joint assets and investments
         joint_assets_and_investments = get_assets_and_investments(crm_record, "joint")
 
+    if recorder is not None:
+        started = recorder.lap("assets_and_investments", started)
+
     #! should other liabilities be included or only debts and mortgages?
     # get client 1 debts and mortgages
     client1_debts_and_mortgages = get_debts_and_mortgages(crm_record, "client1")
@@ -46,13 +171,19 @@ def get_estate_value(crm_record, record_type):
         # get joint debts and mortgages
         joint_debts_and_mortgages = get_debts_and_mortgages(crm_record, "joint")
 
-    # print(f"\n\n")
-    # print(client1_assets_and_investments.get("total", 0))
-    # print(client2_assets_and_investments.get("total", 0))
-    # print(joint_assets_and_investments.get("total", 0))
-    # print(client1_debts_and_mortgages.get("total", 0))
-    # print(client2_debts_and_mortgages.get("total", 0))
-    # print(joint_debts_and_mortgages.get("total", 0))
+    if recorder is not None:
+        started = recorder.lap("debts_and_mortgages", started)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "assets and debts (client1, client2, joint): %s %s %s / %s %s %s",
+            client1_assets_and_investments.get("total", 0),
+            client2_assets_and_investments.get("total", 0),
+            joint_assets_and_investments.get("total", 0),
+            client1_debts_and_mortgages.get("total", 0),
+            client2_debts_and_mortgages.get("total", 0),
+            joint_debts_and_mortgages.get("total", 0),
+        )
 
     # get total assets
     total_assets = get_total_assets(
@@ -68,6 +199,9 @@ def get_estate_value(crm_record, record_type):
 
     gifts_made_still_in_estate_pets = get_gifts_made_still_in_estate_pets(crm_record)
 
+    if recorder is not None:
+        started = recorder.lap("total_assets_and_gifts", started)
+
     assets_outside_of_estate = get_assets_outside_of_estate(crm_record)
 
     life_cover_policies_outside_of_estate = get_life_cover_policies_outside_of_estate(
@@ -86,6 +220,9 @@ def get_estate_value(crm_record, record_type):
 
     pension_assets = get_pension_assets(crm_record)
 
+    if recorder is not None:
+        recorder.lap("outside_estate_and_pensions", started)
+
     return {
         "total_assets": total_assets,
         "gifts_made_still_in_estate_clts": gifts_made_still_in_estate_clts,
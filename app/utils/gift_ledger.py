@@ -0,0 +1,245 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from itertools import accumulate
+
+from utils._helpers import add_years, get_age
+
+LOOKBACK_YEARS = 7
+
+# (whole years before death, share of the full rate charged), as in
+# getGiftTaxRate in src/calculator/threshold-calculator.ts. Each band runs
+# up to the next one's start and the last runs to LOOKBACK_YEARS
+TAPER_BANDS = ((0, 100), (3, 80), (4, 60), (5, 40), (6, 20))
+
+# formats seen in crm records: 2024-11-13, 11/13/2026 and Nov-27
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%b-%y")
+
+GIFT_CATEGORIES = (
+    ("gifts_made_still_in_estate_pets", "pet"),
+    ("gifts_made_still_in_estate_clts", "clt"),
+)
+
+
+def parse_gift_date(value):
+    if isinstance(value, date):
+        return value
+
+    value = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+
+    # a tax year such as 2027/28 is read as its first day
+    if len(value) == 7 and value[4] == "/" and value[:4].isdigit():
+        return date(int(value[:4]), 4, 6)
+
+    raise ValueError(f"Unrecognised gift date: {value!r}")
+
+
+def get_gift_date(item):
+    # an explicit gift date, or the date it leaves the estate less 7 years
+    if item.get("date"):
+        return parse_gift_date(item["date"])
+    if item.get("date_outside"):
+        return add_years(parse_gift_date(item["date_outside"]), -LOOKBACK_YEARS)
+
+    raise ValueError("Gift has no date or date_outside")
+
+
+def get_taper_share(years_before_death):
+    share = TAPER_BANDS[0][1]
+    for years, band_share in TAPER_BANDS:
+        if years_before_death >= years:
+            share = band_share
+    return share
+
+
+class GiftLedger:
+    # gifts kept sorted by date in parallel lists, with prefix sums built on
+    # demand, so any date window is two bisects and a subtraction
+    def __init__(self):
+        self.ordinals = []
+        self.values = []
+        self.types = []
+        self.gifts = []
+        self.undated = []
+        self.prefix_sums = None
+
+    @classmethod
+    def from_crm_record(cls, crm_record):
+        dated = []
+        ledger = cls()
+
+        for category, gift_type in GIFT_CATEGORIES:
+            for item in crm_record.get(category, ()):
+                try:
+                    dated.append((get_gift_date(item), gift_type, item))
+                except ValueError:
+                    ledger.undated.append(item)
+
+        # one sort instead of an insort per gift
+        dated.sort(key=lambda gift: gift[0])
+        for gift_date, gift_type, item in dated:
+            ledger.ordinals.append(gift_date.toordinal())
+            ledger.values.append(item["value"])
+            ledger.types.append(gift_type)
+            ledger.gifts.append(item)
+
+        return ledger
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def add(self, gift_date, gift_type, value, gift=None):
+        if gift_type not in ("pet", "clt"):
+            raise ValueError(f"Unknown gift type: {gift_type}")
+
+        ordinal = parse_gift_date(gift_date).toordinal()
+        index = bisect_right(self.ordinals, ordinal)
+
+        self.ordinals.insert(index, ordinal)
+        self.values.insert(index, value)
+        self.types.insert(index, gift_type)
+        self.gifts.insert(index, gift if gift is not None else {"value": value})
+        self.prefix_sums = None
+
+        return index
+
+    def get_prefix_sums(self):
+        # (all gifts, CLTs only), each with a leading zero
+        if self.prefix_sums is None:
+            clt_values = [
+                value if gift_type == "clt" else 0
+                for value, gift_type in zip(self.values, self.types)
+            ]
+            self.prefix_sums = (
+                list(accumulate(self.values, initial=0)),
+                list(accumulate(clt_values, initial=0)),
+            )
+
+        return self.prefix_sums
+
+    def get_index_range(self, after, until):
+        # gifts dated after `after` and on or before `until`
+        return (
+            bisect_right(self.ordinals, parse_gift_date(after).toordinal()),
+            bisect_right(self.ordinals, parse_gift_date(until).toordinal()),
+        )
+
+    def get_total(self, after, until, gift_type=None):
+        start, stop = self.get_index_range(after, until)
+        all_gifts, clts = self.get_prefix_sums()
+
+        if gift_type is None:
+            return all_gifts[stop] - all_gifts[start]
+        if gift_type == "clt":
+            return clts[stop] - clts[start]
+        return all_gifts[stop] - all_gifts[start] - (clts[stop] - clts[start])
+
+    def get_gifts_within(self, day, years=LOOKBACK_YEARS):
+        # gifts in the `years` up to and including `day`
+        day = parse_gift_date(day)
+        start, stop = self.get_index_range(add_years(day, -years), day)
+        return self.gifts[start:stop]
+
+    def get_prior_clt_total(self, index):
+        # CLTs in the 7 years strictly before gift `index`
+        ordinal = self.ordinals[index]
+        day = date.fromordinal(ordinal)
+        _, clts = self.get_prefix_sums()
+
+        start = bisect_right(self.ordinals, add_years(day, -LOOKBACK_YEARS).toordinal())
+        stop = bisect_left(self.ordinals, ordinal)
+        return clts[stop] - clts[start] if stop > start else 0
+
+    def get_prior_clt_totals(self):
+        # [(index, CLTs in the 7 years before it)] for every PET
+        return [
+            (index, self.get_prior_clt_total(index))
+            for index, gift_type in enumerate(self.types)
+            if gift_type == "pet"
+        ]
+
+    def get_taper_bands(self, date_of_death):
+        # gift totals by taper band, each from two prefix-sum lookups
+        date_of_death = parse_gift_date(date_of_death)
+        bounds = [years for years, _ in TAPER_BANDS] + [LOOKBACK_YEARS]
+
+        bands = []
+        for (years, share), next_years in zip(TAPER_BANDS, bounds[1:]):
+            bands.append(
+                {
+                    "years_from": years,
+                    "years_to": next_years,
+                    "rate_share": share,
+                    "total": self.get_total(
+                        add_years(date_of_death, -next_years),
+                        add_years(date_of_death, -years),
+                    ),
+                }
+            )
+
+        return bands
+
+    def get_gift_impact(self, date_of_death, nil_rate_band, inheritance_tax_rate):
+        # gifts in the 7 years before death, dated in order, as in
+        # calculateGiftImpact in src/calculator/threshold-calculator.ts. PETs
+        # use up the estate's nil rate band; each PET's own band is reduced by
+        # the CLTs made in the 7 years before it. Tax rounds down to the penny
+        date_of_death = parse_gift_date(date_of_death)
+        start, stop = self.get_index_range(
+            add_years(date_of_death, -LOOKBACK_YEARS), date_of_death
+        )
+
+        remaining = nil_rate_band
+        chargeable_gifts = []
+        total_taxable = 0
+        total_tax = 0
+
+        for index in range(start, stop):
+            value = self.values[index]
+            gift_type = self.types[index]
+            gift_date = date.fromordinal(self.ordinals[index])
+
+            if gift_type == "pet":
+                band = max(nil_rate_band - self.get_prior_clt_total(index), 0)
+                remaining = max(remaining - min(value, remaining), 0)
+            else:
+                band = nil_rate_band
+
+            taxable = max(value - min(value, band), 0)
+            years_before_death = get_age(gift_date, date_of_death)
+            share = get_taper_share(years_before_death) if taxable > 0 else 0
+            tax = taxable * inheritance_tax_rate * share // 10000
+
+            if gift_type == "clt":
+                tax = max(tax - self.gifts[index].get("tax_paid_at_transfer", 0), 0)
+
+            total_taxable += taxable
+            total_tax += tax
+            chargeable_gifts.append(
+                {
+                    "gift": self.gifts[index],
+                    "gift_type": gift_type,
+                    "date": gift_date.isoformat(),
+                    "value": value,
+                    "years_before_death": years_before_death,
+                    "rate_share": share,
+                    "taxable": taxable,
+                    "tax": tax,
+                }
+            )
+
+        all_gifts, _ = self.get_prefix_sums()
+
+        return {
+            "total_gifts_in_7_years": all_gifts[stop] - all_gifts[start],
+            "nil_rate_band_used_by_gifts": nil_rate_band - remaining,
+            "nil_rate_band_remaining_for_estate": remaining,
+            "gift_taxable_amount": total_taxable,
+            "gift_tax": total_tax,
+            "chargeable_gifts": chargeable_gifts,
+            "undated_gifts": self.undated,
+        }
@@ -0,0 +1,42 @@
+def normalise_name(name):
+    # CRM names come through with stray case and whitespace ("Elizabeth Bunce ")
+    return " ".join(name.split()).casefold()
+
+
+def get_crm_record(household):
+    # households may be bare crm records or test-case style wrappers
+    return household.get("crm_record", household)
+
+
+class HouseholdStore:
+    def __init__(self, households=()):
+        self.households = []
+        self.by_name = {}
+        self.by_household_id = {}
+
+        for household in households:
+            self.add(household)
+
+    def __len__(self):
+        return len(self.households)
+
+    def add(self, household):
+        crm_record = get_crm_record(household)
+
+        # first household wins on duplicate keys, as with get_testcase
+        for client in ("client1", "client2"):
+            name = crm_record.get(client, {}).get("name")
+            if name:
+                self.by_name.setdefault(normalise_name(name), household)
+
+        household_id = crm_record.get("household_id")
+        if household_id:
+            self.by_household_id.setdefault(str(household_id).strip(), household)
+
+        self.households.append(household)
+
+    def get_by_name(self, name, default=None):
+        return self.by_name.get(normalise_name(name), default)
+
+    def get_by_household_id(self, household_id, default=None):
+        return self.by_household_id.get(str(household_id).strip(), default)
@@ -0,0 +1,96 @@
+from itertools import count
+
+from index import get_potential_inheritance_tax_liability
+from utils._helpers import get_record_type
+from utils.get_estate_value import (
+    ESTATE_CATEGORIES,
+    JOINT_ONLY_CATEGORIES,
+    EstateTotals,
+    get_estate_value_from_totals,
+)
+from utils.result_cache import get_claims_as_of
+
+
+class IncrementalEstate:
+    def __init__(self, crm_record):
+        self.record_type = get_record_type(crm_record)
+        self.quick_succession_relief_claims = crm_record.get(
+            "quick_succession_relief", ()
+        )
+        self.totals = EstateTotals()
+        self.items = {category: {} for category in self.get_categories()}
+        self.item_ids = count()
+        self.results = {}
+
+        for category in self.items:
+            for item in crm_record.get(category, ()):
+                self.add(category, item)
+
+    def get_categories(self):
+        # mirror get_estate_totals: client2/joint lists only count when joint
+        return [
+            category
+            for category in ESTATE_CATEGORIES
+            if self.record_type == "joint" or category not in JOINT_ONLY_CATEGORIES
+        ]
+
+    def get_category_items(self, category):
+        if category not in self.items:
+            raise ValueError(f"{category} is not part of a {self.record_type} estate")
+        return self.items[category]
+
+    def apply(self, category, delta):
+        setattr(self.totals, category, getattr(self.totals, category) + delta)
+
+        # downstream fields are cheap to rebuild from totals, so just drop them
+        self.results.clear()
+
+    def add(self, category, item):
+        items = self.get_category_items(category)
+        item_id = next(self.item_ids)
+
+        items[item_id] = item
+        self.apply(category, item["value"])
+
+        return item_id
+
+    def update(self, category, item_id, item):
+        items = self.get_category_items(category)
+        previous = items[item_id]
+
+        items[item_id] = item
+        self.apply(category, item["value"] - previous["value"])
+
+        return previous
+
+    def remove(self, category, item_id):
+        item = self.get_category_items(category).pop(item_id)
+        self.apply(category, -item["value"])
+
+        return item
+
+    def get_estate_value(self):
+        return get_estate_value_from_totals(self.totals)
+
+    def get_result(
+        self, inheritance_tax_rate=0, charity_donation=0, date_of_death=None
+    ):
+        # claims with no date_of_death are dated against today, so the day
+        # is part of the key, as in utils.result_cache
+        key = (
+            inheritance_tax_rate,
+            charity_donation,
+            date_of_death,
+            get_claims_as_of(self.quick_succession_relief_claims, date_of_death),
+        )
+        if key not in self.results:
+            self.results[key] = get_potential_inheritance_tax_liability(
+                self.get_estate_value(),
+                self.record_type,
+                inheritance_tax_rate,
+                charity_donation,
+                date_of_death,
+                quick_succession_relief_claims=self.quick_succession_relief_claims,
+            )
+
+        return dict(self.results[key])
@@ -0,0 +1,111 @@
+import json
+from bisect import bisect_left
+from time import perf_counter_ns
+
+# histogram upper bounds in nanoseconds, doubling from 64ns to ~67ms
+BUCKET_BOUNDS_NS = tuple(2**power for power in range(6, 27))
+
+# the active recorder; None means instrumentation is off and the hot path
+# only pays for one local "is not None" check per stage
+recorder = None
+
+
+class Histogram:
+    __slots__ = ("count", "sum_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ns = 0
+        # one extra bucket for anything above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+
+    def observe(self, elapsed_ns):
+        self.count += 1
+        self.sum_ns += elapsed_ns
+        self.buckets[bisect_left(BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_ns": self.sum_ns,
+            "buckets": dict(zip(BUCKET_BOUNDS_NS + ("+Inf",), self.buckets)),
+        }
+
+
+class Recorder:
+    def __init__(self, prefix="iht"):
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage, elapsed_ns):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(elapsed_ns)
+
+    def lap(self, stage, started_ns):
+        # record the stage that just finished and start timing the next one
+        now = perf_counter_ns()
+        self.observe(stage, now - started_ns)
+        return now
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def to_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "stages": {
+                stage: histogram.to_dict()
+                for stage, histogram in self.histograms.items()
+            },
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self):
+        lines = []
+
+        for name, value in sorted(self.counters.items()):
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        if self.histograms:
+            metric = f"{self.prefix}_stage_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+
+        for stage, histogram in sorted(self.histograms.items()):
+            # prometheus buckets are cumulative and labelled in seconds
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS_NS, histogram.buckets):
+                cumulative += count
+                lines.append(
+                    f'{metric}_bucket{{stage="{stage}",le="{bound / 1e9:g}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum_ns / 1e9:g}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+
+def enable(new_recorder=None):
+    global recorder
+    recorder = new_recorder if new_recorder is not None else Recorder()
+    return recorder
+
+
+def disable():
+    global recorder
+    previous, recorder = recorder, None
+    return previous
@@ -1,5 +1,125 @@
+import json
 import logging
-import colorlog
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# loggers handed out by get_logger, so queue mode can be switched on later
+_loggers = {}
+
+# (listener, queue handler) while queue mode is on
+_queue_logging = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    # per message template, let `rate` records through every `per` seconds
+    # and, once over the limit, keep one in `sample_every` (0 drops them all)
+    def __init__(self, rate=10, per=1.0, sample_every=0):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self.sample_every = sample_every
+        self.windows = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        # keyed on the unformatted template, so "record_type: %s" is one key
+        # whatever the record type
+        key = (record.name, record.msg)
+        now = time.monotonic()
+
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.per:
+            window = self.windows[key] = [now, 0]
+
+        window[1] += 1
+        if window[1] <= self.rate:
+            return True
+
+        over = window[1] - self.rate
+        if self.sample_every and over % self.sample_every == 0:
+            return True
+
+        self.suppressed += 1
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats on the calling thread; hand the record over
+    # untouched so formatting happens on the listener thread instead
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        # never block the caller: a full queue drops the record
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def get_stream_handler(json_format=False):
+    # Create a handler
+    handler = logging.StreamHandler()
+
+    if json_format:
+        formatter = JsonFormatter()
+
+    # Check if the output stream is a terminal
+    elif handler.stream.isatty():
+        # colorlog is only needed for terminals, so import it lazily
+        import colorlog
+
+        # Use the colored formatter
+        formatter = colorlog.ColoredFormatter(
+            "%(log_color)s%(levelname)s:%(name)s: %(message)s%(reset)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+            reset=True,
+            log_colors={
+                "DEBUG": "cyan",
+                "INFO": "white",
+                "WARNING": "yellow",
+                "ERROR": "red",
+                "CRITICAL": "red,bg_white",
+            },
+            secondary_log_colors={},
+            style="%",
+        )
+    else:
+        # Use a standard formatter
+        formatter = logging.Formatter(
+            "%(asctime)s %(levelname)s:%(name)s: %(message)s",
+            datefmt="%Y-%m-%dT%H:%M:%S.%f%z",
+        )
+
+    # Set the formatter for the handler
+    handler.setFormatter(formatter)
+
+    return handler
+
+
+def set_handler(logger, handler):
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
 
 
 def get_logger(name):
@@ -14,37 +134,54 @@ def get_logger(name):
         # Prevent the logger from propagating messages to the root logger
         logger.propagate = False
 
-        # Create a handler
-        handler = colorlog.StreamHandler()
-
-        # Check if the output stream is a terminal
-        if handler.stream.isatty():
-            # Use the colored formatter
-            formatter = colorlog.ColoredFormatter(
-                "%(log_color)s%(levelname)s:%(name)s: %(message)s%(reset)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-                reset=True,
-                log_colors={
-                    "DEBUG": "cyan",
-                    "INFO": "white",
-                    "WARNING": "yellow",
-                    "ERROR": "red",
-                    "CRITICAL": "red,bg_white",
-                },
-                secondary_log_colors={},
-                style="%",
-            )
+        # Add the handler to the logger
+        if _queue_logging is not None:
+            logger.addHandler(_queue_logging[1])
         else:
-            # Use a standard formatter
-            formatter = logging.Formatter(
-                "%(asctime)s %(levelname)s:%(name)s: %(message)s",
-                datefmt="%Y-%m-%dT%H:%M:%S.%f%z",
-            )
+            logger.addHandler(get_stream_handler())
 
-        # Set the formatter for the handler
-        handler.setFormatter(formatter)
-
-        # Add the handler to the logger
-        logger.addHandler(handler)
+    _loggers[name] = logger
 
     return logger
+
+
+def enable_queue_logging(
+    json_format=False, rate=None, per=1.0, sample_every=0, maxsize=0
+):
+    # loggers enqueue records and return; a listener thread does the
+    # formatting and stream I/O
+    global _queue_logging
+
+    if _queue_logging is not None:
+        disable_queue_logging()
+
+    records = queue.Queue(maxsize)
+    listener = QueueListener(records, get_stream_handler(json_format))
+    queue_handler = DeferredQueueHandler(records)
+
+    # filter before enqueueing so dropped records cost almost nothing
+    if rate is not None:
+        queue_handler.addFilter(RateLimitFilter(rate, per, sample_every))
+
+    for logger in _loggers.values():
+        set_handler(logger, queue_handler)
+
+    listener.start()
+    _queue_logging = (listener, queue_handler)
+
+    return queue_handler
+
+
+def disable_queue_logging():
+    # flushes anything still queued, then puts the direct handlers back
+    global _queue_logging
+
+    if _queue_logging is None:
+        return
+
+    listener, _ = _queue_logging
+    _queue_logging = None
+    listener.stop()
+
+    for logger in _loggers.values():
+        set_handler(logger, get_stream_handler())
@@ -0,0 +1,60 @@
+from fractions import Fraction
+
+# Exact money mode: every amount is an int number of pence, nothing goes
+# through float or Decimal, and rounding happens only at these points:
+#   1. a percentage of an amount (charity donation, inheritance tax) rounds
+#      down to the whole penny, as the legacy // 100 already does for ints
+#   2. the RNRB taper takes away half the excess over the threshold, rounded
+#      down, so an odd penny of excess is rounded in the estate's favour
+#   3. a rate given as a float is read through its shortest repr, so 40.1
+#      is exactly 401/10 per cent, not the nearest binary fraction
+# The array versions of these live in utils/batch.py, which owns numpy.
+
+
+def to_pence(amount):
+    # ints pass through; a float is only accepted if it is a whole penny
+    if isinstance(amount, int):
+        return amount
+    if isinstance(amount, float) and amount.is_integer():
+        return int(amount)
+    raise ValueError(f"Amount is not a whole number of pence: {amount!r}")
+
+
+def get_rate_fraction(rate):
+    # (numerator, denominator) of a percentage
+    if isinstance(rate, int):
+        return rate, 1
+    fraction = Fraction(str(rate)) if isinstance(rate, float) else Fraction(rate)
+    return fraction.numerator, fraction.denominator
+
+
+def apply_rate(amount, rate):
+    # rounding point 1
+    numerator, denominator = get_rate_fraction(rate)
+    return amount * numerator // (100 * denominator)
+
+
+def get_residential_nil_rate_bands(
+    total_assets, residence_nil_rate_band, rnrb_taper_threshold
+):
+    # rounding point 2
+    if total_assets <= rnrb_taper_threshold:
+        return residence_nil_rate_band
+
+    reduction = (total_assets - rnrb_taper_threshold) // 2
+    return max(residence_nil_rate_band - reduction, 0)
+
+
+def get_exact_estate_value(estate_value):
+    # the totals the calculation reads, checked and converted to int pence
+    exact = {"total_assets": to_pence(estate_value["total_assets"])}
+    for category in (
+        "gifts_made_still_in_estate_clts",
+        "gifts_made_still_in_estate_pets",
+        "assets_outside_of_estate",
+        "life_cover_policies_outside_of_estate",
+        "pension_assets",
+    ):
+        exact[category] = {"total": to_pence(estate_value[category]["total"])}
+
+    return exact
@@ -0,0 +1,170 @@
+import numpy as np
+
+from utils._helpers import get_record_type
+from utils.batch import (
+    get_quick_succession_relief_batch,
+    potential_inheritance_tax_liability_batch,
+)
+from utils.get_estate_value import JOINT_ONLY_CATEGORIES, get_estate_totals
+
+ASSET_CATEGORIES = (
+    "client1_assets_and_investments",
+    "client2_assets_and_investments",
+    "joint_assets_and_investments",
+)
+
+# shocked asset classes, in the row/column order of the correlation matrix
+ASSET_CLASSES = ("property", "equities", "bonds")
+
+# checked in order, first match wins; cash-like wording is checked first so
+# "Premium Bonds" or "Equity Release - Current Account" are not shocked
+ASSET_CLASS_KEYWORDS = (
+    (
+        "cash",
+        (
+            "account",
+            "acct",
+            "cash",
+            "deposit",
+            "savings",
+            "premium bond",
+            "fixed rate bond",
+            "loan",
+        ),
+    ),
+    (
+        "property",
+        (
+            "residence",
+            "property",
+            "care home",
+            "house",
+            "flat",
+            "cottage",
+            "land",
+            "farm",
+        ),
+    ),
+    ("bonds", ("bond", "gilt")),
+    (
+        "equities",
+        ("isa", "unit trust", "share", "portfolio", "fund", "equity", "eis", "oeic"),
+    ),
+)
+
+# illustrative annual assumptions, override per run
+DEFAULT_ASSUMPTIONS = {
+    "expected_returns": (0.03, 0.05, 0.02),
+    "volatilities": (0.10, 0.18, 0.07),
+    "correlations": (
+        (1.0, 0.3, 0.1),
+        (0.3, 1.0, 0.2),
+        (0.1, 0.2, 1.0),
+    ),
+}
+
+SIMULATED_FIELDS = (
+    "base_estate_for_rnrb_purposes",
+    "less_residential_nil_rate_bands",
+    "taxable_estate",
+    "inheritance_tax",
+    "total_estate_passing_to_beneficiaries_inc_pensions",
+)
+
+
+def classify_asset(asset):
+    name = asset.get("asset", "").casefold()
+    for asset_class, keywords in ASSET_CLASS_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return asset_class
+
+    # anything unrecognised is held at its current value
+    return "cash"
+
+
+def get_asset_class_values(crm_record, record_type, classify=classify_asset):
+    values = dict.fromkeys(ASSET_CLASSES + ("cash",), 0)
+
+    for category in ASSET_CATEGORIES:
+        if record_type != "joint" and category in JOINT_ONLY_CATEGORIES:
+            continue
+        for asset in crm_record.get(category, ()):
+            values[classify(asset)] += asset["value"]
+
+    return values
+
+
+def get_growth_factors(paths, horizon_years, assumptions, rng):
+    expected_returns = np.asarray(assumptions["expected_returns"], dtype=np.float64)
+    volatilities = np.asarray(assumptions["volatilities"], dtype=np.float64)
+    correlations = np.asarray(assumptions["correlations"], dtype=np.float64)
+
+    # correlated standard normals via the Cholesky factor, shape (paths, classes)
+    shocks = (
+        rng.standard_normal((paths, len(ASSET_CLASSES)))
+        @ np.linalg.cholesky(correlations).T
+    )
+
+    # lognormal growth over the horizon
+    drift = (expected_returns - volatilities**2 / 2) * horizon_years
+    return np.exp(drift + volatilities * np.sqrt(horizon_years) * shocks)
+
+
+def simulate_inheritance_tax(
+    crm_record,
+    inheritance_tax_rate=0,
+    charity_donation=0,
+    paths=100000,
+    horizon_years=1,
+    seed=None,
+    assumptions=DEFAULT_ASSUMPTIONS,
+    percentiles=(5, 25, 50, 75, 95),
+    classify=classify_asset,
+):
+    record_type = get_record_type(crm_record)
+    totals = get_estate_totals(crm_record, record_type)
+    asset_class_values = get_asset_class_values(crm_record, record_type, classify)
+
+    growth = get_growth_factors(
+        paths, horizon_years, assumptions, np.random.default_rng(seed)
+    )
+    shocked_values = np.array(
+        [asset_class_values[asset_class] for asset_class in ASSET_CLASSES],
+        dtype=np.float64,
+    )
+
+    # debts, gifts, policies and pensions are held flat; only assets move
+    total_assets = (
+        totals.total_assets
+        - sum(asset_class_values[asset_class] for asset_class in ASSET_CLASSES)
+        + growth @ shocked_values
+    )
+
+    result = potential_inheritance_tax_liability_batch(
+        total_assets,
+        totals.gifts_made_still_in_estate_clts,
+        totals.gifts_made_still_in_estate_pets,
+        totals.assets_outside_of_estate,
+        totals.life_cover_policies_outside_of_estate,
+        totals.pension_assets,
+        record_type == "joint",
+        inheritance_tax_rate,
+        charity_donation,
+        # claims are dated against today, as in the scalar path
+        quick_succession_relief=get_quick_succession_relief_batch(
+            [crm_record.get("quick_succession_relief")]
+        ),
+    )
+
+    return {
+        "paths": paths,
+        "horizon_years": horizon_years,
+        "asset_class_values": asset_class_values,
+        "mean": {field: float(np.mean(result[field])) for field in SIMULATED_FIELDS},
+        "percentiles": {
+            field: dict(
+                zip(percentiles, np.percentile(result[field], percentiles).tolist())
+            )
+            for field in SIMULATED_FIELDS
+        },
+    }
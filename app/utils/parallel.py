@@ -0,0 +1,87 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from index import potential_inheritance_tax_liability
+from utils.stream import reject
+
+
+def calculate_chunk(chunk):
+    # runs in a worker process; any error is returned rather than raised so
+    # one bad household does not fail the whole chunk
+    started = time.perf_counter_ns()
+    results = []
+    for key, crm_record, rate, donation in chunk:
+        try:
+            result = potential_inheritance_tax_liability(crm_record, rate, donation)
+        except Exception as error:
+            results.append((key, None, f"{type(error).__name__}: {error}"))
+        else:
+            results.append((key, result, None))
+
+    return os.getpid(), time.perf_counter_ns() - started, results
+
+
+def get_chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelRunner:
+    def __init__(self, workers=None, chunk_size=256):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.worker_stats = {}
+
+    def run(self, records):
+        # records are (key, crm_record, rate, donation); yields
+        # (key, result, error) in input order
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            # keep a bounded number of chunks in flight so memory stays flat
+            for chunk in get_chunks(records, self.chunk_size):
+                pending.append(executor.submit(calculate_chunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield from self.collect(pending.popleft())
+
+            while pending:
+                yield from self.collect(pending.popleft())
+
+    def collect(self, future):
+        pid, elapsed_ns, results = future.result()
+
+        stats = self.worker_stats.setdefault(pid, {"households": 0, "busy_ns": 0})
+        stats["households"] += len(results)
+        stats["busy_ns"] += elapsed_ns
+
+        return results
+
+    def calculate_records(self, records, rejects):
+        # drop-in for utils.stream.calculate_records
+        for line_number, result, error in self.run(records):
+            if error is not None:
+                reject(rejects, line_number, error)
+                continue
+
+            yield line_number, result
+
+    def get_throughput(self):
+        return {
+            pid: {
+                "households": stats["households"],
+                "busy_seconds": stats["busy_ns"] / 1e9,
+                "households_per_second": (
+                    stats["households"] * 1e9 / stats["busy_ns"]
+                    if stats["busy_ns"]
+                    else 0.0
+                ),
+            }
+            for pid, stats in sorted(self.worker_stats.items())
+        }
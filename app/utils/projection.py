@@ -0,0 +1,301 @@
+import re
+from datetime import date
+
+import numpy as np
+
+from utils._helpers import add_years, get_record_type
+from utils.batch import (
+    OUTPUT_FIELDS,
+    get_quick_succession_relief_batch,
+    get_thresholds_batch,
+    potential_inheritance_tax_liability_batch,
+)
+from utils.get_estate_value import JOINT_ONLY_CATEGORIES
+from utils.gift_ledger import LOOKBACK_YEARS, get_gift_date, parse_gift_date
+from utils.monte_carlo import (
+    ASSET_CATEGORIES,
+    ASSET_CLASSES,
+    DEFAULT_ASSUMPTIONS as MONTE_CARLO_ASSUMPTIONS,
+    classify_asset,
+)
+
+DEBT_CATEGORIES = (
+    "client1_debts_and_mortgages",
+    "client2_debts_and_mortgages",
+    "joint_debts_and_mortgages",
+)
+
+GIFT_CATEGORIES = ("gifts_made_still_in_estate_pets", "gifts_made_still_in_estate_clts")
+
+# EIS and business property relief holdings leave the estate after 2 years,
+# see docs/notes/salesforce_data_locations/assets.json
+RELIEF_PATTERN = re.compile(r"\b(eis|bpr|business property relief)\b", re.IGNORECASE)
+RELIEF_YEARS = 2
+
+INTEREST_ONLY_PATTERN = re.compile(r"interest only", re.IGNORECASE)
+
+# illustrative annual assumptions, override per run. Growth rates per asset
+# class are the Monte Carlo expected returns; debts are repaid in equal
+# instalments of debt_repayment_rate of today's balance unless interest only
+DEFAULT_ASSUMPTIONS = {
+    "growth_rates": dict(
+        zip(ASSET_CLASSES, MONTE_CARLO_ASSUMPTIONS["expected_returns"]), cash=0.0
+    ),
+    "pension_growth_rate": 0.04,
+    "debt_repayment_rate": 0.04,
+}
+
+# one float64 per output field, as in utils.scenario_sweep
+PROJECTION_DTYPE = np.dtype([(field, np.float64) for field in OUTPUT_FIELDS])
+
+# ordinal used for "never"
+NEVER = date.max.toordinal()
+
+
+class Projection:
+    def __init__(self, dates, table):
+        self.dates = dates
+        # shape (households, len(dates))
+        self.table = table
+
+    def __getitem__(self, field):
+        return self.table[field]
+
+    def get_result(self, household_index, year):
+        return dict(zip(OUTPUT_FIELDS, self.table[household_index, year].tolist()))
+
+
+def get_item_name(item):
+    return item.get("asset") or item.get("debts_and_mortgages") or ""
+
+
+def get_outside_ordinal(item, start_date):
+    # when an asset leaves the estate: its date_outside (as the Salesforce
+    # rules write for EIS), or 2 years from now for an undated EIS/BPR holding
+    if item.get("date_outside"):
+        try:
+            return parse_gift_date(item["date_outside"]).toordinal()
+        except ValueError:
+            pass
+    if RELIEF_PATTERN.search(get_item_name(item)):
+        return add_years(start_date, RELIEF_YEARS).toordinal()
+    return NEVER
+
+
+def get_gift_outside_ordinal(item):
+    # undated gifts are kept in the estate for the whole projection
+    try:
+        return add_years(get_gift_date(item), LOOKBACK_YEARS).toordinal()
+    except ValueError:
+        return NEVER
+
+
+def get_lapse_ordinal(item):
+    protection = item.get("protection")
+    end_date = protection.get("end_date") if isinstance(protection, dict) else None
+    if not end_date:
+        return NEVER
+    try:
+        return parse_gift_date(end_date).toordinal()
+    except ValueError:
+        return NEVER
+
+
+class ItemColumns:
+    # one category's line items across every household, as flat columns:
+    # household index, value and one column per getter
+    def __init__(self, *getters):
+        self.getters = getters
+        self.households = []
+        self.values = []
+        self.columns = [[] for _ in getters]
+
+    def add(self, household, items):
+        for item in items:
+            self.households.append(household)
+            self.values.append(item["value"])
+            for column, getter in zip(self.columns, self.getters):
+                column.append(getter(item))
+
+    def get_arrays(self):
+        # each shape (items, 1) so they broadcast against the (years,) timeline
+        return [
+            np.array(column, dtype=np.float64)[:, np.newaxis]
+            for column in [self.values] + self.columns
+        ]
+
+    def sum_by_household(self, per_item, households):
+        # (items, years) -> (households, years)
+        totals = np.zeros((households, per_item.shape[1]))
+        np.add.at(totals, np.array(self.households, dtype=np.intp), per_item)
+        return totals
+
+
+def get_projection_columns(crm_records, years, ordinals, start_date, assumptions):
+    # per-year input columns, shape (households, years). Items are gathered
+    # across all households so each category is one (items, years) array
+    # expression, summed back per household
+    growth_rates = assumptions["growth_rates"]
+
+    # asset names repeat across a book, so classify each name once
+    classified = {}
+
+    def get_growth_rate(item):
+        name = item.get("asset", "")
+        rate = classified.get(name)
+        if rate is None:
+            rate = classified[name] = growth_rates[classify_asset(item)]
+        return rate
+
+    def get_repayment_rate(item):
+        if INTEREST_ONLY_PATTERN.search(get_item_name(item)):
+            return 0
+        return assumptions["debt_repayment_rate"]
+
+    assets = ItemColumns(
+        get_growth_rate, lambda item: get_outside_ordinal(item, start_date)
+    )
+    debts = ItemColumns(get_repayment_rate)
+    gifts = {
+        category: ItemColumns(get_gift_outside_ordinal) for category in GIFT_CATEGORIES
+    }
+    outside = ItemColumns(get_growth_rate)
+    life_cover = ItemColumns(get_lapse_ordinal)
+    pensions = ItemColumns()
+    joint = []
+
+    for household, crm_record in enumerate(crm_records):
+        record_type = get_record_type(crm_record)
+        joint.append(record_type == "joint")
+
+        for categories, columns in (
+            (ASSET_CATEGORIES, assets),
+            (DEBT_CATEGORIES, debts),
+        ):
+            for category in categories:
+                if record_type == "joint" or category not in JOINT_ONLY_CATEGORIES:
+                    columns.add(household, crm_record.get(category, ()))
+
+        for category, columns in gifts.items():
+            columns.add(household, crm_record.get(category, ()))
+        outside.add(household, crm_record.get("assets_outside_of_estate", ()))
+        life_cover.add(
+            household, crm_record.get("life_cover_policies_outside_of_estate", ())
+        )
+        pensions.add(household, crm_record.get("pension_assets", ()))
+
+    households = len(joint)
+
+    # assets grow by class and leave the estate at their outside date
+    values, rates, outside_ordinals = assets.get_arrays()
+    grown = values * (1 + rates) ** years
+    inside = ordinals < outside_ordinals
+    total_assets = assets.sum_by_household(np.where(inside, grown, 0), households)
+    assets_outside_of_estate = assets.sum_by_household(
+        np.where(inside, 0, grown), households
+    )
+
+    # debts fall by a fixed share of today's balance a year
+    values, repayment = debts.get_arrays()
+    total_assets -= debts.sum_by_household(
+        values * np.clip(1 - repayment * years, 0, 1), households
+    )
+
+    # gifts age out after 7 years and count as outside the estate from then
+    gift_columns = {}
+    for category, columns in gifts.items():
+        values, outside_ordinals = columns.get_arrays()
+        inside = ordinals < outside_ordinals
+        gift_columns[category] = columns.sum_by_household(
+            np.where(inside, values, 0), households
+        )
+        assets_outside_of_estate += columns.sum_by_household(
+            np.where(inside, 0, values), households
+        )
+
+    # assets already outside the estate grow like any other asset
+    values, rates = outside.get_arrays()
+    assets_outside_of_estate += outside.sum_by_household(
+        values * (1 + rates) ** years, households
+    )
+
+    # term policies pay nothing once they have lapsed
+    values, lapse = life_cover.get_arrays()
+    life_cover_policies_outside_of_estate = life_cover.sum_by_household(
+        np.where(ordinals < lapse, values, 0), households
+    )
+
+    (values,) = pensions.get_arrays()
+    pension_assets = pensions.sum_by_household(
+        values * (1 + assumptions["pension_growth_rate"]) ** years, households
+    )
+
+    return {
+        "total_assets": total_assets,
+        "gifts_made_still_in_estate_clts": gift_columns[
+            "gifts_made_still_in_estate_clts"
+        ],
+        "gifts_made_still_in_estate_pets": gift_columns[
+            "gifts_made_still_in_estate_pets"
+        ],
+        "assets_outside_of_estate": assets_outside_of_estate,
+        "life_cover_policies_outside_of_estate": life_cover_policies_outside_of_estate,
+        "pension_assets": pension_assets,
+        "joint": np.broadcast_to(
+            np.array(joint, dtype=bool)[:, np.newaxis], total_assets.shape
+        ),
+    }
+
+
+def project_inheritance_tax(
+    crm_records,
+    years=10,
+    inheritance_tax_rate=0,
+    charity_donation=0,
+    start_date=None,
+    assumptions=DEFAULT_ASSUMPTIONS,
+    tax_year_thresholds=False,
+):
+    # a result for death today and on each of the next `years` anniversaries,
+    # for every household, from one batch calculation over (households, years)
+    start_date = parse_gift_date(start_date or date.today())
+    dates = [add_years(start_date, year) for year in range(years + 1)]
+    ordinals = np.array([day.toordinal() for day in dates], dtype=np.float64)
+    offsets = np.arange(years + 1, dtype=np.float64)
+
+    crm_records = list(crm_records)
+    columns = get_projection_columns(
+        crm_records, offsets, ordinals, start_date, assumptions
+    )
+
+    # relief shrinks as each projected death moves away from the earlier
+    # ones, so claims are dated once per (household, year)
+    claims = [crm_record.get("quick_succession_relief") for crm_record in crm_records]
+    if any(claims):
+        columns["quick_succession_relief"] = get_quick_succession_relief_batch(
+            [household_claims for household_claims in claims for _ in dates],
+            dates * len(claims),
+        ).reshape(columns["joint"].shape)
+
+    # the RNRB and its taper follow the tax year of each projected death
+    if tax_year_thresholds:
+        columns.update(
+            get_thresholds_batch(
+                np.broadcast_to(
+                    np.array(dates, dtype="datetime64[D]"), columns["joint"].shape
+                ),
+                columns["joint"],
+            )
+        )
+
+    result = potential_inheritance_tax_liability_batch(
+        **columns,
+        inheritance_tax_rate=inheritance_tax_rate,
+        charity_donation=charity_donation,
+    )
+
+    table = np.empty(columns["joint"].shape, dtype=PROJECTION_DTYPE)
+    for field in OUTPUT_FIELDS:
+        table[field] = result[field]
+
+    return Projection(dates, table)
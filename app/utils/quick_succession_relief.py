@@ -0,0 +1,172 @@
+from datetime import date
+
+import numpy as np
+
+from utils.gift_ledger import parse_gift_date
+
+# relief percentage by whole years between the earlier death and this one,
+# as getQsrReliefPercentage in src/calculator/qsr-calculator.ts; 5 years or
+# more is the last entry
+RELIEF_PERCENTAGES = np.array([100, 80, 60, 40, 20, 0], dtype=np.int64)
+
+DAYS_PER_YEAR = 365.25
+
+# a claim with no qsr_amount is only limited by its percentage
+NO_CAP = np.iinfo(np.int64).max
+
+# £10 trillion in pence; keeps amount * percentage and per-household sums
+# well inside int64
+MAX_AMOUNT = 10**15
+
+CLAIM_FIELDS = (
+    "years_before_death",
+    "relief_percentage",
+    "relief_available",
+    "relief_applied",
+)
+
+
+def get_default_date_of_death():
+    # claims on an estate with no date of death are dated against today
+    return date.today()
+
+
+def get_claim_amount(claim, field, default=None):
+    # whole pence between 0 and MAX_AMOUNT; bad data is a ValueError naming
+    # the field, so callers reject the row instead of failing the run
+    value = claim.get(field)
+    if value is None:
+        if default is None:
+            raise ValueError(f"Quick succession relief claim has no {field}")
+        return default
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Quick succession relief {field} is not whole pence")
+    if not 0 <= value <= MAX_AMOUNT:
+        raise ValueError(f"Quick succession relief {field} is out of range")
+    return value
+
+
+def get_claim_years(claim, date_of_death):
+    years = claim.get("years_before_death")
+    if years is not None:
+        if not isinstance(years, (int, float)) or isinstance(years, bool):
+            raise ValueError(
+                "Quick succession relief years_before_death is not a number"
+            )
+        if years != years:
+            raise ValueError("Quick succession relief years_before_death is NaN")
+        return years
+
+    if claim.get("previous_death") is None:
+        raise ValueError(
+            "Quick succession relief claim has no previous_death or years_before_death"
+        )
+    previous_death = parse_gift_date(claim["previous_death"])
+    return (date_of_death - previous_death).days / DAYS_PER_YEAR
+
+
+class ClaimColumns:
+    # every claim in a batch as flat columns, with the household it belongs to.
+    # A claim is {"previous_death": date, "tax_paid_on_inheritance": pence}
+    # with an optional "qsr_amount" cap, or "years_before_death" in place of
+    # the date
+    def __init__(self, claims_by_household, dates_of_death=None):
+        households = []
+        years = []
+        tax_paid = []
+        caps = []
+
+        # one date of death per household, or one for the whole batch
+        if np.ndim(dates_of_death) == 0:
+            dates_of_death = [dates_of_death] * len(claims_by_household)
+        default_date = get_default_date_of_death()
+
+        for household, (claims, date_of_death) in enumerate(
+            zip(claims_by_household, dates_of_death)
+        ):
+            if not claims:
+                continue
+            date_of_death = parse_gift_date(date_of_death or default_date)
+
+            for claim in claims:
+                if not isinstance(claim, dict):
+                    raise ValueError("Quick succession relief claim is not an object")
+                households.append(household)
+                years.append(get_claim_years(claim, date_of_death))
+                tax_paid.append(get_claim_amount(claim, "tax_paid_on_inheritance"))
+                caps.append(get_claim_amount(claim, "qsr_amount", NO_CAP))
+
+        self.rows = len(claims_by_household)
+        self.households = np.array(households, dtype=np.intp)
+        self.years = np.array(years, dtype=np.float64)
+        self.tax_paid = np.array(tax_paid, dtype=np.int64)
+        self.caps = np.array(caps, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.households)
+
+    def get_relief_percentages(self):
+        # one table lookup per claim
+        index = np.clip(np.floor(self.years), 0, len(RELIEF_PERCENTAGES) - 1)
+        return RELIEF_PERCENTAGES[index.astype(np.intp)]
+
+    def get_relief_available(self):
+        # rounds down to the penny, like every other percentage of an amount
+        return np.minimum(
+            self.tax_paid * self.get_relief_percentages() // 100, self.caps
+        )
+
+    def get_household_totals(self):
+        # relief available per household, shape (rows,)
+        totals = np.zeros(self.rows, dtype=np.int64)
+        np.add.at(totals, self.households, self.get_relief_available())
+        return totals
+
+    def apportion(self, inheritance_tax):
+        # relief applied per claim, against each household's tax before
+        # relief. The claim on the earliest earlier death is used first and
+        # the rest take what tax is left
+        available = self.get_relief_available()
+        order = np.lexsort((-self.years, self.households))
+        households = self.households[order]
+        sorted_available = available[order]
+
+        # relief ahead of each claim within its household: the running total
+        # less the running total where the household's claims start
+        ahead = np.cumsum(sorted_available) - sorted_available
+        starts = np.flatnonzero(np.r_[True, households[1:] != households[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        ahead -= ahead[group_start]
+
+        tax = np.asarray(inheritance_tax)[households]
+        applied = np.empty(len(order), dtype=np.result_type(tax, available))
+        applied[order] = np.clip(tax - ahead, 0, sorted_available)
+
+        return available, applied
+
+
+def get_quick_succession_relief(claims, date_of_death, inheritance_tax):
+    # one estate's claims; relief is capped at the tax before relief
+    columns = ClaimColumns([claims], [date_of_death])
+    if len(columns) == 0:
+        return {"relief_applied": 0, "claims": []}
+
+    available, applied = columns.apportion([inheritance_tax])
+
+    return {
+        "relief_applied": applied.sum().item(),
+        "claims": [
+            {"claim": claim, **dict(zip(CLAIM_FIELDS, row))}
+            for claim, row in zip(
+                claims,
+                zip(
+                    columns.years.tolist(),
+                    columns.get_relief_percentages().tolist(),
+                    available.tolist(),
+                    applied.tolist(),
+                ),
+            )
+        ],
+    }
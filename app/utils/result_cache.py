@@ -0,0 +1,142 @@
+import copy
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+
+
+def get_record_hash(crm_record, inheritance_tax_rate=0, charity_donation=0, **options):
+    # sort_keys makes the hash independent of CRM field order; 40 and 40.0
+    # stay distinct because they give int and float results respectively
+    key = [crm_record, inheritance_tax_rate, charity_donation]
+
+    # options left at None are dropped so keys stay stable as options are added
+    options = {name: value for name, value in options.items() if value is not None}
+    if options:
+        key.append(options)
+
+    canonical = json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_claims_as_of(claims, date_of_death):
+    # quick succession relief claims with no date_of_death are dated against
+    # today, so a result for them is only good for the day. None for
+    # everything else, which leaves their keys unchanged
+    if date_of_death is not None or not claims:
+        return None
+
+    # numpy is only imported for records that have claims
+    from utils import quick_succession_relief
+
+    return quick_succession_relief.get_default_date_of_death()
+
+
+def is_flat(items):
+    # plain output fields; nested outputs such as gift_impact or
+    # quick_succession_relief need a deep copy on the way in and out
+    return all(isinstance(value, (int, float, str, type(None))) for _, value in items)
+
+
+def get_result_size(key, items):
+    return (
+        sys.getsizeof(key)
+        + sys.getsizeof(items)
+        + sum(sys.getsizeof(value) for _, value in items)
+    )
+
+
+class ResultCache:
+    def __init__(self, max_entries=100000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        # results are stored as item tuples so every caller gets a fresh dict,
+        # and nested values are copied so no caller shares them
+        items, _, flat = entry
+        return dict(items) if flat else copy.deepcopy(dict(items))
+
+    def put(self, key, result):
+        items = tuple(result.items())
+        flat = is_flat(items)
+        if not flat:
+            items = copy.deepcopy(items)
+        size = get_result_size(key, items)
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+
+        self.entries[key] = (items, size, flat)
+        self.size += size
+
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def get_or_compute(
+        self,
+        calculate,
+        crm_record,
+        inheritance_tax_rate=0,
+        charity_donation=0,
+        key=None,
+        **options,
+    ):
+        # canonicalising a large record costs more than a lookup, so callers
+        # that already hold a record hash can pass it in as key
+        if key is None:
+            key = get_record_hash(
+                crm_record,
+                inheritance_tax_rate,
+                charity_donation,
+                claims_as_of=get_claims_as_of(
+                    crm_record.get("quick_succession_relief"),
+                    options.get("date_of_death"),
+                ),
+                **options,
+            )
+
+        result = self.get(key)
+        if result is None:
+            result = calculate(
+                crm_record, inheritance_tax_rate, charity_donation, **options
+            )
+            self.put(key, result)
+
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
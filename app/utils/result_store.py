@@ -0,0 +1,166 @@
+import hashlib
+import json
+import sqlite3
+
+import config
+from index import OUTPUTS, potential_inheritance_tax_liability
+from utils.household_store import get_crm_record
+from utils.result_cache import get_claims_as_of, get_record_hash
+
+# output columns are left untyped so SQLite keeps ints as ints and floats
+# as floats, as potential_inheritance_tax_liability returned them
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    household_id TEXT PRIMARY KEY,
+    record_hash TEXT NOT NULL,
+    parameters_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    {outputs}
+);
+CREATE INDEX IF NOT EXISTS results_inheritance_tax ON results (inheritance_tax);
+""".format(outputs=",\n    ".join(OUTPUTS))
+
+INSERT = "INSERT OR REPLACE INTO results VALUES ({})".format(
+    ", ".join("?" * (4 + len(OUTPUTS)))
+)
+
+
+def get_config_hash():
+    # every figure the calculation reads from config, so results are
+    # recomputed when a tax year is added or a band changes
+    key = [
+        config.NIL_RATE_BAND,
+        config.LEGACY_RESIDENCE_NIL_RATE_BAND,
+        config.LEGACY_RNRB_TAPER_THRESHOLD,
+        config.TAX_YEARS,
+    ]
+    canonical = json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    # the last result per household in SQLite, with the hashes it was
+    # computed from, so a run only recalculates what changed
+    def __init__(self, path, batch_size=1000):
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def get_hashes(self):
+        # {household_id: (record_hash, parameters_hash, config_hash)} in one scan
+        return {
+            row[0]: row[1:]
+            for row in self.connection.execute(
+                "SELECT household_id, record_hash, parameters_hash, config_hash "
+                "FROM results"
+            )
+        }
+
+    def write(self, rows, deleted=()):
+        # one transaction per call
+        with self.connection:
+            self.connection.executemany(INSERT, rows)
+            self.connection.executemany(
+                "DELETE FROM results WHERE household_id = ?",
+                ((household_id,) for household_id in deleted),
+            )
+
+    def refresh(
+        self,
+        households,
+        inheritance_tax_rate=0,
+        charity_donation=0,
+        date_of_death=None,
+        exact_pence=False,
+        calculate=potential_inheritance_tax_liability,
+        prune=True,
+    ):
+        # households are crm records (or test-case wrappers) with a
+        # household_id. With prune, stored households missing from this run
+        # are deleted; pass prune=False to refresh part of a book. Returns
+        # counts of computed, unchanged and deleted households
+        parameters_hash = get_record_hash(
+            None,
+            inheritance_tax_rate,
+            charity_donation,
+            date_of_death=date_of_death,
+            exact_pence=exact_pence or None,
+        )
+        config_hash = get_config_hash()
+        stored = self.get_hashes()
+
+        rows = []
+        seen = set()
+        computed = unchanged = 0
+
+        for household in households:
+            crm_record = get_crm_record(household)
+            household_id = crm_record.get("household_id")
+            if household_id is None:
+                raise ValueError("Household has no household_id")
+            household_id = str(household_id).strip()
+            seen.add(household_id)
+
+            # with no date_of_death, records with claims go stale as the
+            # days pass
+            record_hash = get_record_hash(
+                crm_record,
+                claims_as_of=get_claims_as_of(
+                    crm_record.get("quick_succession_relief"), date_of_death
+                ),
+            )
+            hashes = (record_hash, parameters_hash, config_hash)
+            if stored.get(household_id) == hashes:
+                unchanged += 1
+                continue
+
+            result = calculate(
+                crm_record,
+                inheritance_tax_rate,
+                charity_donation,
+                date_of_death=date_of_death,
+                exact_pence=exact_pence,
+            )
+            rows.append((household_id, *hashes, *(result[field] for field in OUTPUTS)))
+            computed += 1
+
+            if len(rows) >= self.batch_size:
+                self.write(rows)
+                rows = []
+
+        # the last rows and any deletions share one transaction
+        deleted = stored.keys() - seen if prune else ()
+        if rows or deleted:
+            self.write(rows, deleted)
+
+        return {"computed": computed, "unchanged": unchanged, "deleted": len(deleted)}
+
+    def get(self, household_id, default=None):
+        row = self.connection.execute(
+            "SELECT {} FROM results WHERE household_id = ?".format(", ".join(OUTPUTS)),
+            (str(household_id).strip(),),
+        ).fetchone()
+        return default if row is None else dict(zip(OUTPUTS, row))
+
+    def get_households_above(self, threshold, field="inheritance_tax"):
+        # [(household_id, value)] largest first; inheritance_tax is indexed
+        if field not in OUTPUTS:
+            raise ValueError(f"Unknown output field: {field}")
+
+        return self.connection.execute(
+            f"SELECT household_id, {field} FROM results WHERE {field} > ? "
+            f"ORDER BY {field} DESC",
+            (threshold,),
+        ).fetchall()
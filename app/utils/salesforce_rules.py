@@ -0,0 +1,401 @@
+import json
+import os
+import re
+from datetime import date
+
+from utils._helpers import add_years, get_age
+from utils.get_estate_value import JOINT_ONLY_CATEGORIES
+
+RULES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "docs",
+    "notes",
+    "salesforce_data_locations",
+)
+
+# mapping file -> where its rows land in the crm_record
+RULE_FILES = {
+    "assets.json": "assets_and_investments",
+    "assets_outside_estate.json": "assets_outside_of_estate",
+    "clts_still_in_estate.json": "gifts_made_still_in_estate_clts",
+    "debts_or_mortgages.json": "debts_and_mortgages",
+    "life_cover_policies_os_estate.json": "life_cover_policies_outside_of_estate",
+    "pension_assets.json": "pension_assets",
+    "pets_still_in_estate.json": "gifts_made_still_in_estate_pets",
+}
+
+# categories split by owner, e.g. client1_assets_and_investments
+OWNED_CATEGORIES = ("assets_and_investments", "debts_and_mortgages")
+
+OUTSIDE_CATEGORY = "assets_outside_of_estate"
+
+# "Other Filters" wording -> how much of the plan lands in the category,
+# checked in order so "total invested - ..." wins over "total invested"
+VALUE_BASES = (
+    ("total invested - total withdrawn", "invested_less_withdrawn"),
+    ("total invested - discounted amount", "invested_less_discount"),
+    ("total invested", "invested"),
+    ("all growth + income paid out", "growth_plus_withdrawn"),
+    ("all growth + discount", "growth_plus_discount"),
+    ("all growth", "growth"),
+)
+
+FOR_YEARS = re.compile(r"\bfor (\d+) years?\b")
+AFTER_YEARS = re.compile(r"\bafter (\d+) years?\b")
+
+
+class Rule:
+    __slots__ = (
+        "plan_type",
+        "category",
+        "record_type",
+        "designated",
+        "from_years",
+        "until_years",
+        "value_basis",
+    )
+
+    def __init__(self, plan_type, category, from_years, until_years, value_basis):
+        self.plan_type = plan_type
+        self.category = category
+        self.record_type = None
+        self.designated = False
+        self.from_years = from_years
+        self.until_years = until_years
+        self.value_basis = value_basis
+
+    @property
+    def conditional(self):
+        return self.record_type is not None or self.designated
+
+    def get_signature(self):
+        return (
+            self.category,
+            self.record_type,
+            self.designated,
+            self.from_years,
+            self.until_years,
+            self.value_basis,
+        )
+
+    def matches(self, row):
+        if self.record_type is not None:
+            if normalise(row.get("record_type")) != self.record_type:
+                return False
+        return not self.designated or bool(row.get("designation"))
+
+
+def normalise(value):
+    return (value or "").strip().casefold()
+
+
+def split_values(values):
+    return [value.strip() for value in values.split(",") if value.strip()]
+
+
+def parse_timing(other_filters):
+    # returns (from_years, until_years, value_basis)
+    text = normalise(other_filters)
+
+    value_basis = "value"
+    for wording, basis in VALUE_BASES:
+        if wording in text:
+            value_basis = basis
+            break
+
+    match = FOR_YEARS.search(text)
+    if match:
+        return 0, int(match.group(1)), value_basis
+
+    match = AFTER_YEARS.search(text)
+    if match:
+        return int(match.group(1)), None, value_basis
+
+    return 0, None, value_basis
+
+
+def parse_entry(entry, category):
+    # one mapping row -> ([(section, product, sub_product)], rule), or None
+    # when the row cannot be keyed on a product (e.g. JISA by client age)
+    section = normalise(entry.get("Salesforce Section Used to Identify"))
+    field = normalise(entry.get("Field used to Identify"))
+    values = (entry.get("Values Required") or "").strip()
+    plan_type = (entry.get("Plan Type") or "").strip()
+
+    rule = Rule(plan_type, category, *parse_timing(entry.get("Other Filters")))
+
+    if field in ("product", "type", "type of gift"):
+        # "Provider and EIS" means any provider's EIS product
+        if values.casefold().startswith("provider and "):
+            values = values[len("provider and ") :]
+        keys = [(section, normalise(value), None) for value in split_values(values)]
+
+    elif field == "product and designation":
+        product, _, _ = values.partition(" and ")
+        rule.designated = True
+        keys = [(section, normalise(product), None)]
+
+    elif field.startswith("product and sub product"):
+        parts = [normalise(part) for part in values.split(" and ")]
+        sub_product = "" if parts[1] == "blank" else parts[1]
+        if len(parts) > 2:
+            # "Client (Corporate/Trust)" -> the Corporate/Trust record type
+            record_type = re.search(r"\((.*)\)", parts[2])
+            rule.record_type = record_type.group(1) if record_type else parts[2]
+        keys = [(section, parts[0], sub_product)]
+
+    elif not field and not values:
+        # "Trustee Bond & IRIB" is identified by its plan type alone
+        keys = [(section, normalise(name), None) for name in plan_type.split("&")]
+
+    else:
+        return None
+
+    return keys, rule
+
+
+def compile_rules(directory=RULES_DIRECTORY):
+    # (section, product, sub_product) -> rules to try; sub_product None is the
+    # fallback for any sub product
+    parsed = []
+    for file_name, category in RULE_FILES.items():
+        with open(os.path.join(directory, file_name)) as file:
+            for entry in json.load(file):
+                keyed = parse_entry(entry, category)
+                if keyed is not None:
+                    parsed.append(keyed)
+
+    # a plan type's conditions apply in every file it appears in, so the
+    # Gift Plan growth rule is also limited to Corporate/Trust bonds
+    conditions = {}
+    for _, rule in parsed:
+        if rule.conditional:
+            conditions.setdefault(rule.plan_type.casefold(), rule)
+    for _, rule in parsed:
+        condition = conditions.get(rule.plan_type.casefold())
+        if condition is not None:
+            rule.record_type = rule.record_type or condition.record_type
+            rule.designated = rule.designated or condition.designated
+
+    # "For N years, then outside the estate" already moves the plan outside,
+    # so the matching "After N years" rule would count it twice
+    moved_outside = {
+        (rule.plan_type.casefold(), rule.until_years)
+        for _, rule in parsed
+        if rule.until_years is not None
+    }
+
+    table = {}
+    for keys, rule in parsed:
+        if (rule.plan_type.casefold(), rule.from_years) in moved_outside:
+            continue
+        for key in keys:
+            rules = table.setdefault(key, [])
+            # Gift Plan, Enhanced Gift Plan and Later Life Planning Scheme
+            # share one key and one treatment
+            signature = rule.get_signature()
+            if all(existing.get_signature() != signature for existing in rules):
+                rules.append(rule)
+
+    return table
+
+
+_rules = None
+
+
+def get_rules():
+    # compiled on first use and shared afterwards
+    global _rules
+    if _rules is None:
+        _rules = compile_rules()
+    return _rules
+
+
+def get_amount(row, field, default=0):
+    # a missing field takes the default; anything but a number is rejected
+    # by classify_rows rather than failing the whole pass
+    if field not in row:
+        return default
+    value = row[field]
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise ValueError(f"{field} is not a number: {value!r}")
+    return value
+
+
+def get_rule_value(rule, row):
+    value = get_amount(row, "value")
+    invested = get_amount(row, "invested", value)
+    basis = rule.value_basis
+
+    if basis == "value":
+        return value
+    if basis == "invested":
+        return invested
+    if basis == "invested_less_withdrawn":
+        return invested - get_amount(row, "withdrawn")
+    if basis == "invested_less_discount":
+        return invested - get_amount(row, "discount")
+    if basis == "growth":
+        return value - invested
+    if basis == "growth_plus_withdrawn":
+        return value - invested + get_amount(row, "withdrawn")
+    if basis == "growth_plus_discount":
+        return value - invested + get_amount(row, "discount")
+
+    raise ValueError(f"Unknown value basis: {basis}")
+
+
+def get_item(category, row, value, date_outside):
+    name = row.get("name") or " ".join(
+        str(row[field])
+        for field in ("provider", "product", "policy_number")
+        if row.get(field)
+    )
+
+    if category == "life_cover_policies_outside_of_estate":
+        item = {
+            "protection": {
+                "provider": row.get("provider"),
+                "policy": row.get("product"),
+                "end_date": row.get("end_date"),
+                "policy_number": row.get("policy_number"),
+            },
+            "owner": row.get("owner"),
+            "value": value,
+        }
+    elif category == "pension_assets":
+        item = {
+            "provider": row.get("provider"),
+            "policy": row.get("product"),
+            "policy_number": row.get("policy_number"),
+            "owner": row.get("owner"),
+            "value": value,
+        }
+    elif category.startswith("gifts_made"):
+        item = {"gift": name, "value": value}
+    elif category.endswith("debts_and_mortgages"):
+        item = {"debts_and_mortgages": name, "value": value}
+    else:
+        item = {"asset": name, "value": value}
+
+    if date_outside is not None:
+        item["date_outside"] = date_outside.isoformat()
+
+    return item
+
+
+def match_rules(candidates, row):
+    # a matching conditional rule (Designated UT, Corporate/Trust Gift Plan)
+    # replaces the unconditional rules for the same key
+    if not candidates:
+        return []
+    matched = [rule for rule in candidates if rule.matches(row)]
+    return [rule for rule in matched if rule.conditional] or matched
+
+
+def get_category(rule, row):
+    if rule.category not in OWNED_CATEGORIES:
+        return rule.category
+
+    owner = normalise(row.get("owner")) or "client1"
+    if owner not in ("client1", "client2", "joint"):
+        raise ValueError(f"Unknown owner: {row.get('owner')}")
+
+    return f"{owner}_{rule.category}"
+
+
+def new_record(row):
+    crm_record = {"client1": {"name": row.get("client1_name")}}
+    for category in (
+        "client1_assets_and_investments",
+        "client1_debts_and_mortgages",
+        "gifts_made_still_in_estate_clts",
+        "gifts_made_still_in_estate_pets",
+        "assets_outside_of_estate",
+        "life_cover_policies_outside_of_estate",
+        "pension_assets",
+    ):
+        crm_record[category] = []
+
+    return crm_record
+
+
+def add_client2(crm_record, name):
+    crm_record["client2"] = {"name": name}
+    for category in JOINT_ONLY_CATEGORIES:
+        crm_record.setdefault(category, [])
+
+
+def classify_rows(rows, as_of=None, rules=None):
+    # one pass over raw Salesforce plan rows -> ({household_id: crm_record},
+    # [(row, reason)]). Values are in pence; start_date is an ISO date string
+    rules = get_rules() if rules is None else rules
+    as_of = as_of or date.today()
+    if isinstance(as_of, str):
+        as_of = date.fromisoformat(as_of)
+
+    crm_records = {}
+    rejects = []
+
+    for row in rows:
+        section = normalise(row.get("section"))
+        product = normalise(row.get("product"))
+
+        # an exact sub product first, then rules for any sub product
+        matched = match_rules(
+            rules.get((section, product, normalise(row.get("sub_product")))), row
+        ) or match_rules(rules.get((section, product, None)), row)
+        if not matched:
+            rejects.append((row, "no matching rule"))
+            continue
+
+        try:
+            start_date = row.get("start_date")
+            if start_date and not isinstance(start_date, str):
+                raise ValueError(f"start_date is not an ISO date: {start_date!r}")
+            start_date = date.fromisoformat(start_date) if start_date else None
+            age = get_age(start_date, as_of) if start_date else 0
+
+            items = []
+            for rule in matched:
+                if age < rule.from_years:
+                    # "After N years" and not held that long yet
+                    continue
+
+                value = get_rule_value(rule, row)
+                if value <= 0:
+                    continue
+
+                category = get_category(rule, row)
+                date_outside = None
+                if rule.until_years is not None:
+                    if age >= rule.until_years:
+                        # "For N years, then outside the estate"
+                        category = OUTSIDE_CATEGORY
+                    elif start_date:
+                        date_outside = add_years(start_date, rule.until_years)
+
+                item_category = rule.category
+                if category == OUTSIDE_CATEGORY:
+                    item_category = OUTSIDE_CATEGORY
+                items.append(
+                    (category, get_item(item_category, row, value, date_outside))
+                )
+        except ValueError as error:
+            rejects.append((row, str(error)))
+            continue
+
+        household_id = row.get("household_id")
+        crm_record = crm_records.get(household_id)
+        if crm_record is None:
+            crm_record = crm_records[household_id] = new_record(row)
+        if "client2" not in crm_record and (
+            row.get("client2_name")
+            or normalise(row.get("owner")) in ("client2", "joint")
+        ):
+            add_client2(crm_record, row.get("client2_name"))
+
+        for category, item in items:
+            crm_record.setdefault(category, []).append(item)
+
+    return crm_records, rejects
@@ -0,0 +1,61 @@
+import numpy as np
+
+from utils._helpers import get_record_type
+from utils.batch import (
+    OUTPUT_FIELDS,
+    get_quick_succession_relief_batch,
+    potential_inheritance_tax_liability_batch,
+)
+from utils.get_estate_value import get_estate_totals
+
+# one float64 per output field, so a grid cell is a single record
+SCENARIO_DTYPE = np.dtype([(field, np.float64) for field in OUTPUT_FIELDS])
+
+
+class ScenarioGrid:
+    def __init__(self, inheritance_tax_rates, charity_donations, table):
+        self.inheritance_tax_rates = inheritance_tax_rates
+        self.charity_donations = charity_donations
+        # shape (len(inheritance_tax_rates), len(charity_donations))
+        self.table = table
+
+    def __getitem__(self, field):
+        return self.table[field]
+
+    def get_result(self, rate_index, donation_index):
+        return dict(zip(OUTPUT_FIELDS, self.table[rate_index, donation_index].tolist()))
+
+
+def sweep_scenarios(crm_record, inheritance_tax_rates, charity_donations):
+    record_type = get_record_type(crm_record)
+
+    # aggregate once; every grid cell shares the same estate totals
+    totals = get_estate_totals(crm_record, record_type)
+
+    inheritance_tax_rates = np.asarray(inheritance_tax_rates, dtype=np.float64)
+    charity_donations = np.asarray(charity_donations, dtype=np.float64)
+
+    # rates run down the rows and donations across the columns, so the batch
+    # engine broadcasts the whole grid in one pass
+    result = potential_inheritance_tax_liability_batch(
+        totals.total_assets,
+        totals.gifts_made_still_in_estate_clts,
+        totals.gifts_made_still_in_estate_pets,
+        totals.assets_outside_of_estate,
+        totals.life_cover_policies_outside_of_estate,
+        totals.pension_assets,
+        record_type == "joint",
+        inheritance_tax_rate=inheritance_tax_rates[:, np.newaxis],
+        charity_donation=charity_donations[np.newaxis, :],
+        quick_succession_relief=get_quick_succession_relief_batch(
+            [crm_record.get("quick_succession_relief")]
+        ),
+    )
+
+    table = np.empty(
+        (len(inheritance_tax_rates), len(charity_donations)), dtype=SCENARIO_DTYPE
+    )
+    for field in OUTPUT_FIELDS:
+        table[field] = result[field]
+
+    return ScenarioGrid(inheritance_tax_rates, charity_donations, table)
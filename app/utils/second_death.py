@@ -0,0 +1,217 @@
+from datetime import date
+
+import numpy as np
+
+from utils._helpers import get_record_type
+from utils.batch import (
+    get_residential_nil_rate_bands_batch,
+    get_thresholds_batch,
+    potential_inheritance_tax_liability_batch,
+)
+from utils.get_estate_value import get_estate_totals
+
+# the two death orders, in the order their rows are stacked
+ORDERS = ("client1_first", "client2_first")
+
+ORDER_FIELDS = (
+    "first_death_estate",
+    "first_death_spouse_exemption",
+    "first_death_chargeable",
+    "first_death_tax",
+    "transferred_nil_rate_band_percentage",
+    "transferred_residence_nil_rate_band_percentage",
+    "second_death_estate",
+    "second_death_nil_rate_band",
+    "second_death_residence_nil_rate_band",
+    "second_death_tax",
+    "total_tax",
+)
+
+
+def get_joint_columns(crm_records):
+    # one aggregation pass per household, shared by both death orders
+    columns = {
+        name: []
+        for name in (
+            "client1_net",
+            "client2_net",
+            "joint_net",
+            "gifts_made_still_in_estate_clts",
+            "gifts_made_still_in_estate_pets",
+            "assets_outside_of_estate",
+            "life_cover_policies_outside_of_estate",
+            "pension_assets",
+        )
+    }
+
+    for i, crm_record in enumerate(crm_records):
+        record_type = get_record_type(crm_record)
+        if record_type != "joint":
+            raise ValueError(f"Record {i} is not a joint household")
+        # claims are on one estate and neither death order says which
+        if crm_record.get("quick_succession_relief"):
+            raise ValueError(
+                f"Record {i} has quick succession relief claims, which the "
+                "second death model cannot assign to either death"
+            )
+
+        totals = get_estate_totals(crm_record, record_type)
+        columns["client1_net"].append(
+            totals.client1_assets_and_investments - totals.client1_debts_and_mortgages
+        )
+        columns["client2_net"].append(
+            totals.client2_assets_and_investments - totals.client2_debts_and_mortgages
+        )
+        columns["joint_net"].append(
+            totals.joint_assets_and_investments - totals.joint_debts_and_mortgages
+        )
+        for name in tuple(columns)[3:]:
+            columns[name].append(getattr(totals, name))
+
+    return {
+        name: np.array(values, dtype=np.float64) for name, values in columns.items()
+    }
+
+
+def model_second_deaths(
+    crm_records,
+    inheritance_tax_rate=0,
+    date_of_death=None,
+    spouse_share=1.0,
+    client1_first_probability=0.5,
+):
+    # Each client's estate is their own net assets plus half the joint ones.
+    # On first death spouse_share of it passes to the survivor exempt, and
+    # the rest uses the first RNRB (after taper) and then NRB. The unused
+    # fractions pass to the survivor, whose estate then carries the household
+    # gifts, outside-estate assets, life cover and pensions. Both deaths use
+    # the single-person bands of the tax year of date_of_death
+    columns = get_joint_columns(crm_records)
+    households = len(columns["joint_net"])
+
+    def stack(client1_value, client2_value):
+        # rows 0..n-1: client1 dies first; rows n..2n-1: client2 dies first
+        return np.concatenate([client1_value, client2_value])
+
+    def both(value):
+        return np.tile(np.broadcast_to(value, (households,)), 2)
+
+    half_joint = columns["joint_net"] / 2
+    first_death_estate = stack(
+        columns["client1_net"] + half_joint, columns["client2_net"] + half_joint
+    )
+    survivor_own = stack(
+        columns["client2_net"] + half_joint, columns["client1_net"] + half_joint
+    )
+
+    thresholds = get_thresholds_batch(
+        both(np.datetime64(date_of_death or date.today(), "D")),
+        np.zeros(2 * households, dtype=bool),
+    )
+    nil_rate_band = thresholds["nil_rate_band"]
+    residence_nil_rate_band = thresholds["residence_nil_rate_band"]
+    rnrb_taper_threshold = thresholds["rnrb_taper_threshold"]
+    inheritance_tax_rate = both(np.asarray(inheritance_tax_rate, dtype=np.float64))
+
+    # first death: spouse exemption, then RNRB, then NRB
+    spouse_exemption = np.maximum(first_death_estate, 0) * both(spouse_share)
+    chargeable = np.maximum(first_death_estate - spouse_exemption, 0)
+    tapered_rnrb = get_residential_nil_rate_bands_batch(
+        first_death_estate, residence_nil_rate_band, rnrb_taper_threshold
+    )
+    used_rnrb = np.minimum(tapered_rnrb, chargeable)
+    used_nrb = np.minimum(nil_rate_band, chargeable - used_rnrb)
+    first_death_tax = (chargeable - used_rnrb - used_nrb) * inheritance_tax_rate // 100
+
+    # unused bands transfer as a fraction of the band that was available:
+    # the NRB, and the RNRB after the taper. An estate left wholly to the
+    # spouse passes on 100% of both, however much of the RNRB was tapered
+    transferred_nrb = np.divide(
+        nil_rate_band - used_nrb,
+        nil_rate_band,
+        out=np.zeros_like(nil_rate_band),
+        where=nil_rate_band > 0,
+    )
+    transferred_rnrb = np.divide(
+        tapered_rnrb - used_rnrb,
+        tapered_rnrb,
+        out=np.zeros_like(tapered_rnrb),
+        where=tapered_rnrb > 0,
+    )
+
+    # second death: one batch call for every household and both orders
+    second_death_estate = survivor_own + spouse_exemption
+    second_death_nil_rate_band = nil_rate_band * (1 + transferred_nrb)
+    second_death_residence_nil_rate_band = residence_nil_rate_band * (
+        1 + transferred_rnrb
+    )
+    second_death = potential_inheritance_tax_liability_batch(
+        second_death_estate,
+        both(columns["gifts_made_still_in_estate_clts"]),
+        both(columns["gifts_made_still_in_estate_pets"]),
+        both(columns["assets_outside_of_estate"]),
+        both(columns["life_cover_policies_outside_of_estate"]),
+        both(columns["pension_assets"]),
+        np.zeros(2 * households, dtype=bool),
+        inheritance_tax_rate,
+        nil_rate_band=second_death_nil_rate_band,
+        residence_nil_rate_band=second_death_residence_nil_rate_band,
+        rnrb_taper_threshold=rnrb_taper_threshold,
+    )
+    second_death_tax = second_death["inheritance_tax"]
+
+    stacked = {
+        "first_death_estate": first_death_estate,
+        "first_death_spouse_exemption": spouse_exemption,
+        "first_death_chargeable": chargeable,
+        "first_death_tax": first_death_tax,
+        "transferred_nil_rate_band_percentage": transferred_nrb * 100,
+        "transferred_residence_nil_rate_band_percentage": transferred_rnrb * 100,
+        "second_death_estate": second_death_estate,
+        "second_death_nil_rate_band": second_death_nil_rate_band,
+        "second_death_residence_nil_rate_band": second_death_residence_nil_rate_band,
+        "second_death_tax": second_death_tax,
+        "total_tax": first_death_tax + second_death_tax,
+    }
+
+    result = {
+        order: {
+            field: stacked[field][i * households : (i + 1) * households]
+            for field in ORDER_FIELDS
+        }
+        for i, order in enumerate(ORDERS)
+    }
+
+    client1_first = result["client1_first"]["total_tax"]
+    client2_first = result["client2_first"]["total_tax"]
+    probability = np.broadcast_to(
+        np.asarray(client1_first_probability, dtype=np.float64), (households,)
+    )
+
+    result["cheaper_order"] = np.where(
+        client2_first < client1_first, ORDERS[1], ORDERS[0]
+    )
+    result["cheaper_total_tax"] = np.minimum(client1_first, client2_first)
+    result["expected_total_tax"] = (
+        probability * client1_first + (1 - probability) * client2_first
+    )
+
+    return result
+
+
+def get_second_death_results(result):
+    # one dict per household, as get_batch_results does for the batch engine
+    households = len(result["expected_total_tax"])
+
+    return [
+        {
+            **{
+                order: {field: result[order][field][i].item() for field in ORDER_FIELDS}
+                for order in ORDERS
+            },
+            "cheaper_order": str(result["cheaper_order"][i]),
+            "cheaper_total_tax": result["cheaper_total_tax"][i].item(),
+            "expected_total_tax": result["expected_total_tax"][i].item(),
+        }
+        for i in range(households)
+    ]
@@ -0,0 +1,94 @@
+import json
+
+
+def read_lines(stream):
+    # number lines from 1 so rejects can point back at the export. Lines may
+    # be bytes, which parse_records decodes one at a time so a bad byte only
+    # rejects its own row
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            yield line_number, line
+
+
+def reject(rejects, line_number, error, raw=None):
+    rejects.write(json.dumps({"line": line_number, "error": error, "raw": raw}) + "\n")
+
+
+def parse_records(lines, rejects, inheritance_tax_rate=0, charity_donation=0):
+    for line_number, line in lines:
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError as error:
+                raw = line.decode("utf-8", "replace")
+                reject(rejects, line_number, f"invalid utf-8: {error}", raw)
+                continue
+
+        try:
+            payload = json.loads(line)
+        except ValueError as error:
+            reject(rejects, line_number, f"invalid json: {error}", line)
+            continue
+        except RecursionError:
+            reject(rejects, line_number, "invalid json: nested too deeply", line)
+            continue
+
+        if not isinstance(payload, dict):
+            reject(rejects, line_number, "record is not a json object", line)
+            continue
+
+        # rows are either a bare crm record or a test-case style wrapper
+        if "crm_record" in payload:
+            crm_record = payload["crm_record"]
+            rate = payload.get("inheritance_tax_rate", inheritance_tax_rate)
+            donation = payload.get("charity_donation", charity_donation)
+        else:
+            crm_record = payload
+            rate = inheritance_tax_rate
+            donation = charity_donation
+
+        if not isinstance(crm_record, dict) or "client1" not in crm_record:
+            reject(rejects, line_number, "missing client1", line)
+            continue
+
+        if not all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in (rate, donation)
+        ):
+            reject(rejects, line_number, "invalid rate or donation", line)
+            continue
+
+        yield line_number, crm_record, rate, donation
+
+
+def calculate_records(records, rejects, calculate):
+    for line_number, crm_record, rate, donation in records:
+        # any error from one household, an OverflowError from a huge value
+        # included, rejects that line rather than ending the run
+        try:
+            result = calculate(crm_record, rate, donation)
+        except Exception as error:
+            reject(rejects, line_number, f"{type(error).__name__}: {error}")
+            continue
+
+        yield line_number, result
+
+
+def write_results(results, output, rejects=None):
+    # NaN and Infinity are not json; with a rejects stream those rows are
+    # rejected, otherwise the ValueError is raised
+    count = 0
+    for line_number, result in results:
+        try:
+            line = json.dumps({"line": line_number, "result": result}, allow_nan=False)
+        except ValueError as error:
+            if rejects is None:
+                raise
+            reject(rejects, line_number, f"result is not valid json: {error}")
+            continue
+
+        output.write(line + "\n")
+        count += 1
+
+    return count
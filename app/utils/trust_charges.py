@@ -0,0 +1,324 @@
+import numpy as np
+
+# as in src/calculator/trust-calculator.ts
+HYPOTHETICAL_RATE = 20
+PERIODIC_MULTIPLIER = 3 / 10
+MAX_PERIODIC_RATE = 6
+QUARTERS_IN_TEN_YEARS = 40
+MONTHS_IN_TEN_YEARS = 120
+MONTHS_IN_QUARTER = 3
+GRACE_PERIOD_MONTHS = 3
+
+# non-relevant property counts towards the notional transfer for
+# anniversaries before this date
+NOVEMBER_2015_RULE_CHANGE = np.datetime64("2015-11-18", "D")
+
+# interest in possession trusts for a deceased person are outside the
+# relevant property regime
+IPDI = "ipdi"
+
+TEN_YEAR_CHARGE_FIELDS = (
+    "chargeable",
+    "notional_transfer",
+    "excess_over_nil_rate_band",
+    "hypothetical_tax",
+    "effective_rate",
+    "anniversary_rate",
+    "tax_on_relevant_property",
+    "capped_tax",
+)
+
+EXIT_CHARGE_FIELDS = (
+    "chargeable",
+    "rate_missing",
+    "grace_period_applied",
+    "start_date",
+    "quarters_elapsed",
+    "effective_rate",
+    "tax_payable",
+)
+
+
+def to_days(dates, rows=None):
+    # ISO strings, dates or datetime64, NaT for missing; None is all NaT
+    if dates is None:
+        return np.full(rows, np.datetime64("NaT"), dtype="datetime64[D]")
+    days = np.asarray(dates, dtype="datetime64[D]")
+    return days if rows is None else np.broadcast_to(days, (rows,))
+
+
+def get_month_and_day(days):
+    # (datetime64[M], day of month from 1)
+    months = days.astype("datetime64[M]")
+    return months, (days - months.astype("datetime64[D]")).astype(np.int64) + 1
+
+
+def add_months_batch(days, months):
+    # Date.setMonth arithmetic, as addMonths in trust-calculator.ts: 31 Jan +
+    # 1 month overflows into March, and 29 Feb + 10 years is 1 Mar. Grace
+    # periods and anniversaries both use it, so an anniversary falls on the
+    # first day get_complete_months_batch counts the decade as complete
+    start, day = get_month_and_day(days)
+    return (start + months).astype("datetime64[D]") + (day - 1)
+
+
+def get_complete_months_batch(start_dates, end_dates):
+    # completeMonthsBetween in src/calculator/trust-calculator.ts
+    start_months, start_days = get_month_and_day(start_dates)
+    end_months, end_days = get_month_and_day(end_dates)
+
+    months = (end_months - start_months).astype(np.int64) - (end_days < start_days)
+    return np.maximum(months, 0)
+
+
+def get_last_anniversaries_batch(settlement_dates, as_of):
+    # the latest ten-year anniversary on or before as_of, NaT before the first
+    decades = get_complete_months_batch(settlement_dates, as_of) // MONTHS_IN_TEN_YEARS
+    anniversaries = add_months_batch(settlement_dates, decades * MONTHS_IN_TEN_YEARS)
+    return np.where(decades > 0, anniversaries, np.datetime64("NaT"))
+
+
+def get_ten_year_charges_batch(
+    anniversary_dates,
+    relevant_property_values,
+    available_nil_rate_bands,
+    related_settlements=0,
+    non_relevant_property=0,
+    trust_types=None,
+    notional_lifetime_transfers=None,
+):
+    # calculateTenYearCharge, one row per trust. Relevant property is taken
+    # after reliefs; rates are percentages. Rows with a NaT anniversary or an
+    # IPDI trust type are not chargeable
+    relevant_property_values = np.asarray(relevant_property_values, dtype=np.float64)
+    rows = len(relevant_property_values)
+    anniversary_dates = to_days(anniversary_dates, rows)
+    available_nil_rate_bands = np.broadcast_to(
+        np.asarray(available_nil_rate_bands, dtype=np.float64), (rows,)
+    )
+
+    chargeable = ~np.isnat(anniversary_dates)
+    if trust_types is not None:
+        chargeable &= np.asarray(trust_types) != IPDI
+
+    include_non_relevant_property = anniversary_dates < NOVEMBER_2015_RULE_CHANGE
+    notional_transfer = (
+        relevant_property_values
+        + related_settlements
+        + np.where(include_non_relevant_property, non_relevant_property, 0)
+    )
+    if notional_lifetime_transfers is not None:
+        # NaN falls back to the calculated transfer
+        notional_lifetime_transfers = np.asarray(
+            notional_lifetime_transfers, dtype=np.float64
+        )
+        notional_transfer = np.where(
+            np.isnan(notional_lifetime_transfers),
+            notional_transfer,
+            notional_lifetime_transfers,
+        )
+
+    excess_over_nil_rate_band = np.maximum(
+        notional_transfer - available_nil_rate_bands, 0
+    )
+    hypothetical_tax = excess_over_nil_rate_band * HYPOTHETICAL_RATE / 100
+    effective_rate = np.divide(
+        hypothetical_tax * 100,
+        notional_transfer,
+        out=np.zeros(rows),
+        where=notional_transfer != 0,
+    )
+    anniversary_rate = effective_rate * PERIODIC_MULTIPLIER
+    tax_on_relevant_property = relevant_property_values * anniversary_rate / 100
+    capped_tax = np.minimum(
+        tax_on_relevant_property, relevant_property_values * MAX_PERIODIC_RATE / 100
+    )
+
+    result = {
+        "chargeable": chargeable,
+        "notional_transfer": notional_transfer,
+        "excess_over_nil_rate_band": excess_over_nil_rate_band,
+        "hypothetical_tax": hypothetical_tax,
+        "effective_rate": effective_rate,
+        "anniversary_rate": anniversary_rate,
+        "tax_on_relevant_property": tax_on_relevant_property,
+        "capped_tax": capped_tax,
+    }
+    for field in TEN_YEAR_CHARGE_FIELDS[1:]:
+        result[field] = np.where(chargeable, result[field], 0)
+
+    return result
+
+
+def get_exit_charges_batch(
+    settlement_dates,
+    exit_dates,
+    exit_values,
+    ten_year_anniversary_rates,
+    last_ten_year_charge_dates=None,
+    trust_types=None,
+):
+    # calculateExitCharge, one row per trust: the anniversary rate scaled by
+    # complete quarters since the last ten-year charge (or settlement), with
+    # nothing due on exits within 3 months of either date. A chargeable row
+    # with a NaN rate is flagged rate_missing and its tax is NaN
+    exit_values = np.asarray(exit_values, dtype=np.float64)
+    rows = len(exit_values)
+    settlement_dates = to_days(settlement_dates, rows)
+    exit_dates = to_days(exit_dates, rows)
+    last_ten_year_charge_dates = to_days(last_ten_year_charge_dates, rows)
+    has_last_charge = ~np.isnat(last_ten_year_charge_dates)
+
+    chargeable = ~np.isnat(exit_dates)
+    if trust_types is not None:
+        chargeable &= np.asarray(trust_types) != IPDI
+
+    # NaT compares False, so a missing last charge date never gives grace
+    grace_period_applied = chargeable & (
+        (exit_dates <= add_months_batch(settlement_dates, GRACE_PERIOD_MONTHS))
+        | (
+            exit_dates
+            <= add_months_batch(last_ten_year_charge_dates, GRACE_PERIOD_MONTHS)
+        )
+    )
+    chargeable &= ~grace_period_applied
+
+    start_dates = np.where(
+        has_last_charge, last_ten_year_charge_dates, settlement_dates
+    )
+    quarters_elapsed = np.where(
+        chargeable,
+        get_complete_months_batch(
+            start_dates, np.where(chargeable, exit_dates, start_dates)
+        )
+        // MONTHS_IN_QUARTER,
+        0,
+    )
+    rates = np.broadcast_to(
+        np.asarray(ten_year_anniversary_rates, dtype=np.float64), (rows,)
+    )
+    rate_missing = chargeable & np.isnan(rates)
+    effective_rate = np.where(
+        chargeable, rates * quarters_elapsed / QUARTERS_IN_TEN_YEARS, 0
+    )
+
+    return {
+        "chargeable": chargeable,
+        "rate_missing": rate_missing,
+        "grace_period_applied": grace_period_applied,
+        "start_date": start_dates,
+        "quarters_elapsed": quarters_elapsed,
+        "effective_rate": effective_rate,
+        "tax_payable": exit_values * effective_rate / 100,
+    }
+
+
+def trust_charges_batch(
+    trust_types,
+    settlement_dates,
+    relevant_property_values,
+    available_nil_rate_bands,
+    as_of,
+    related_settlements=0,
+    non_relevant_property=0,
+    exit_dates=None,
+    exit_values=0,
+    exit_rates=None,
+):
+    # periodic charge at each trust's latest ten-year anniversary on or before
+    # as_of, and the exit charge on any exit_date. Quarters and the grace
+    # period run from the latest anniversary on or before the exit itself.
+    # Exits use the rate charged at the as_of anniversary, capped at 6%, when
+    # that is the same anniversary, or exit_rates where given. Any other exit
+    # (before the first anniversary, or after a different one) has no rate to
+    # use: it is flagged rate_missing with a NaN tax rather than charged at 0
+    trust_types = np.asarray(trust_types)
+    rows = len(trust_types)
+    settlement_dates = to_days(settlement_dates, rows)
+    exit_dates = to_days(exit_dates, rows)
+    anniversaries = get_last_anniversaries_batch(settlement_dates, to_days(as_of, rows))
+    exit_anniversaries = get_last_anniversaries_batch(settlement_dates, exit_dates)
+
+    ten_year = get_ten_year_charges_batch(
+        anniversaries,
+        relevant_property_values,
+        available_nil_rate_bands,
+        related_settlements,
+        non_relevant_property,
+        trust_types,
+    )
+
+    # NaT never compares equal, so no anniversary means no rate
+    rates = np.where(
+        exit_anniversaries == anniversaries,
+        np.minimum(ten_year["anniversary_rate"], MAX_PERIODIC_RATE),
+        np.nan,
+    )
+    if exit_rates is not None:
+        exit_rates = np.asarray(exit_rates, dtype=np.float64)
+        rates = np.where(np.isnan(exit_rates), rates, exit_rates)
+
+    exit = get_exit_charges_batch(
+        settlement_dates,
+        exit_dates,
+        np.broadcast_to(np.asarray(exit_values, dtype=np.float64), (rows,)),
+        rates,
+        exit_anniversaries,
+        trust_types,
+    )
+
+    return {
+        "anniversary_date": anniversaries,
+        "exit_anniversary_date": exit_anniversaries,
+        "ten_year_charge": ten_year,
+        "exit_charge": exit,
+    }
+
+
+def get_row(result, fields):
+    row = {}
+    for field in fields:
+        value = result[field][0]
+        row[field] = str(value) if isinstance(value, np.datetime64) else value.item()
+    return row
+
+
+def get_ten_year_charge(
+    trust_type,
+    anniversary_date,
+    relevant_property_value,
+    available_nil_rate_band,
+    related_settlements=0,
+    non_relevant_property=0,
+    notional_lifetime_transfer=None,
+):
+    # one trust through the batch path
+    result = get_ten_year_charges_batch(
+        [anniversary_date],
+        [relevant_property_value],
+        available_nil_rate_band,
+        related_settlements,
+        non_relevant_property,
+        [trust_type],
+        None if notional_lifetime_transfer is None else [notional_lifetime_transfer],
+    )
+    return get_row(result, TEN_YEAR_CHARGE_FIELDS)
+
+
+def get_exit_charge(
+    trust_type,
+    settlement_date,
+    exit_date,
+    exit_value,
+    ten_year_anniversary_rate,
+    last_ten_year_charge_date=None,
+):
+    result = get_exit_charges_batch(
+        [settlement_date],
+        [exit_date],
+        [exit_value],
+        ten_year_anniversary_rate,
+        None if last_ten_year_charge_date is None else [last_ten_year_charge_date],
+        [trust_type],
+    )
+    return get_row(result, EXIT_CHARGE_FIELDS)